@@ -0,0 +1,145 @@
+import argparse
+import random
+import re
+import time
+
+from five9.utils.campaign_profile_comprehension import (
+    demystify_filter,
+    expression_to_string,
+    parse_profile_filter,
+    prettify,
+    remystify_filter,
+)
+
+
+def previous_prettify(ugly="", open_set="{[(<", close_set="}])>"):
+    """prettify before the linear rewrite, kept to compare output and timing"""
+    ugly += " "
+    level = 0
+    while ugly.find("  ") > -1:
+        ugly = ugly.replace("  ", " ")
+    while ugly.find("( (") > -1:
+        ugly = ugly.replace("( (", "((")
+    while ugly.find(") )") > -1:
+        ugly = ugly.replace(") )", "))")
+    output = ""
+    for idx, char in enumerate(ugly):
+        if char in open_set:
+            level += 1
+            output += char + "\n" + "\t" * (level)
+        elif char in close_set:
+            level -= 1
+            output += "\n" + "\t" * level + char
+            if ugly[idx + 1] not in close_set:
+                output += "\n"
+        elif ugly[idx - 1 : idx + 4] == " AND ":
+            output += "\n" + "\t" * level + char
+        elif ugly[idx - 1 : idx + 3] == " OR ":
+            output += "\n" + "\t" * level + char
+        else:
+            output += char
+    return output
+
+
+def previous_demystify_filter(profile_filter):
+    """demystify_filter before the linear rewrite, with one str.replace per criterion"""
+    grouping_expression = re.sub(r"(\d+)", r"[\1]", profile_filter["grouping"]["expression"])
+    for idx, criteria in enumerate(profile_filter["crmCriteria"]):
+        rightValue = (criteria["rightValue"] or "null").replace("(", "|||||").replace(")", "+_+_+_+_")
+        condition = f'{criteria["leftValue"]} ::{criteria["compareOperator"]}:: {rightValue}'
+        grouping_expression = grouping_expression.replace(f"[{idx + 1}]", f"[{condition}][{idx + 1}]")
+    return (
+        previous_prettify(grouping_expression, "(", ")")
+        .replace("|||||", "(")
+        .replace("+_+_+_+_", ")")
+    )
+
+
+def generate_filter(criteria_count):
+    """Generates a Custom grouped campaign profile filter with nested groups"""
+    operators = ["Equals", "NotEqual", "Like", "Less", "LessOrEqual", "Greater", "GreaterOrEqual"]
+    criteria = [
+        {
+            "leftValue": f"field_{random.randint(1, 40)}",
+            "compareOperator": random.choice(operators),
+            "rightValue": random.choice([None, "CA", "100", "(555) 123-4567", f"value {i}"]),
+        }
+        for i in range(criteria_count)
+    ]
+
+    numbers = [str(i + 1) for i in range(criteria_count)]
+    while len(numbers) > 1:
+        size = min(len(numbers), random.randint(2, 5))
+        operator = random.choice([" AND ", " OR "])
+        group = "(" + operator.join(numbers[:size]) + ")"
+        numbers = [group] + numbers[size:]
+        random.shuffle(numbers)
+
+    return {
+        "crmCriteria": criteria,
+        "grouping": {"expression": numbers[0], "type": "Custom"},
+        "orderByFields": [],
+    }
+
+
+def benchmark(criteria_count, repeat):
+    profile_filter = generate_filter(criteria_count)
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        previous = previous_demystify_filter(profile_filter)
+    previous_seconds = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        current = demystify_filter(profile_filter)
+    current_seconds = (time.perf_counter() - start) / repeat
+
+    if previous != current:
+        raise Exception(f"{criteria_count} criteria: demystify_filter output differs")
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        expression = expression_to_string(parse_profile_filter(profile_filter))
+    parse_seconds = (time.perf_counter() - start) / repeat
+
+    if expression != profile_filter["grouping"]["expression"]:
+        raise Exception(f"{criteria_count} criteria: expression does not round trip")
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        remystified = remystify_filter(current)
+    remystify_seconds = (time.perf_counter() - start) / repeat
+
+    if remystified != profile_filter:
+        raise Exception(f"{criteria_count} criteria: remystify_filter does not round trip")
+
+    print(
+        f"{criteria_count:>6} criteria  previous demystify {previous_seconds * 1000:>9.2f} ms"
+        f"  demystify {current_seconds * 1000:>7.2f} ms ({previous_seconds / current_seconds:>5.1f}x)"
+        f"  parse + write {parse_seconds * 1000:>7.2f} ms"
+        f"  remystify {remystify_seconds * 1000:>7.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compares the campaign profile filter demystify, expression parsing and remystify times on generated filters"
+    )
+    parser.add_argument(
+        "--criteria",
+        type=int,
+        nargs="*",
+        default=[10, 100, 500, 1000, 2000],
+        help="Numbers of criteria of the generated filters",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark")
+    args = parser.parse_args()
+
+    random.seed(9)
+    for criteria_count in args.criteria:
+        benchmark(criteria_count, args.repeat)
+
+    text = "( ( 1 AND 2 )  OR ( 3 AND 4 ) ) " * 2000
+    if previous_prettify(text) != prettify(text):
+        raise Exception("prettify output differs")
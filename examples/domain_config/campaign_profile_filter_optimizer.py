@@ -0,0 +1,59 @@
+import argparse
+import json
+import os
+
+from five9.utils.campaign_profile_comprehension import demystify_filter
+from five9.utils.campaign_profile_optimizer import print_optimization_report
+from five9.utils.domain_capture import Five9DomainConfig
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Finds duplicate, redundant and contradictory criteria in campaign profile filters and writes minimized filters"
+    )
+
+    parser.add_argument(
+        "snapshot",
+        type=str,
+        help="Domain snapshot folder or snapshot archive file with the campaign profile filters",
+    )
+
+    parser.add_argument(
+        "--profiles",
+        nargs="*",
+        help="Campaign profiles to optimize. Defaults to all profiles with criteria",
+    )
+
+    parser.add_argument(
+        "--output",
+        type=str,
+        required=False,
+        help="Folder for the minimized filters, written as <profile>.json and demystified <profile>.sql files",
+    )
+
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print every finding",
+    )
+
+    args = parser.parse_args()
+
+    domain = Five9DomainConfig.from_snapshot(args.snapshot)
+    reports = domain.optimize_campaign_profile_filters(args.profiles)
+
+    for name, report in reports.items():
+        print_optimization_report(report, name, verbose=args.verbose)
+
+        if args.output and report["filter"] is not None:
+            os.makedirs(args.output, exist_ok=True)
+            with open(os.path.join(args.output, f"{name}.json"), "w") as json_file:
+                json.dump(report["filter"], json_file, indent=4)
+            if report["filter"]["grouping"]["type"] == "Custom":
+                with open(os.path.join(args.output, f"{name}.sql"), "w") as sql_file:
+                    sql_file.write(demystify_filter(report["filter"]))
+
+    before = sum(report["before"]["criteria"] for report in reports.values())
+    after = sum(report["after"]["criteria"] for report in reports.values() if report["after"] is not None)
+    print(f"\n{len(reports)} campaign profiles, {before} -> {after} criteria")
+
+    domain.close()
@@ -0,0 +1,91 @@
+import argparse
+import json
+
+from five9.utils.campaign_profile_evaluator import (
+    ContactTable,
+    compile_profile_filter,
+    contact_field_types,
+    evaluate_profile_filter,
+    print_selectivity_report,
+)
+from five9.utils.domain_capture import Five9DomainConfig
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Counts the contact records selected by campaign profile filters, offline from a contact CSV file"
+    )
+
+    parser.add_argument(
+        "contacts",
+        type=str,
+        help="Contact CSV file with a header row of contact field names",
+    )
+
+    parser.add_argument(
+        "--snapshot",
+        type=str,
+        required=False,
+        help="Domain snapshot folder or snapshot archive file with the campaign profile filters and contact field types",
+    )
+
+    parser.add_argument(
+        "--profiles",
+        nargs="*",
+        help="Campaign profiles of the snapshot to evaluate. Defaults to all profiles with criteria",
+    )
+
+    parser.add_argument(
+        "--filter_file",
+        type=str,
+        required=False,
+        help="Evaluate this filter instead, a getCampaignProfileFilter JSON file or a demystified filter file",
+    )
+
+    parser.add_argument("--delimiter", type=str, default=",", help="CSV delimiter")
+
+    parser.add_argument(
+        "--case_sensitive",
+        action="store_true",
+        help="Compare strings case sensitively",
+    )
+
+    args = parser.parse_args()
+
+    domain = None
+    field_types = {}
+    if args.snapshot:
+        domain = Five9DomainConfig.from_snapshot(args.snapshot)
+        field_types = contact_field_types(domain.domain_objects.get("getContactFields", None))
+
+    profile_filters = {}
+    if args.filter_file:
+        with open(args.filter_file) as filter_file:
+            text = filter_file.read()
+        try:
+            profile_filters[args.filter_file] = json.loads(text)
+        except json.JSONDecodeError:
+            profile_filters[args.filter_file] = text
+    elif domain is not None:
+        captured = domain.domain_objects["getCampaignProfiles_campaign_profile_filters"]
+        for name in args.profiles or captured.keys():
+            if args.profiles or len(captured[name]["crmCriteria"] or []) > 0:
+                profile_filters[name] = captured[name]
+    else:
+        parser.error("--snapshot or --filter_file is required")
+
+    compiled = {
+        name: compile_profile_filter(profile_filter, field_types, args.case_sensitive)
+        for name, profile_filter in profile_filters.items()
+    }
+
+    # the columns of all filters are loaded once
+    fields = list(dict.fromkeys(field for item in compiled.values() for field in item.fields))
+    contacts = ContactTable.from_csv(args.contacts, columns=fields, delimiter=args.delimiter)
+    print(f"Loaded {contacts.row_count} records, {len(fields)} fields")
+
+    for name, profile_filter in compiled.items():
+        report = evaluate_profile_filter(profile_filter, contacts)
+        print_selectivity_report(report, name)
+
+    if domain is not None:
+        domain.close()
@@ -2,6 +2,8 @@ import os
 import time
 import tqdm
 from five9.utils.common import common_parser_arguments, create_five9_client
+from five9.utils.dependency_graph import CAMPAIGN, CONTACT_FIELD
+from five9.utils.domain_capture import Five9DomainConfig
 
 
 def get_campaigns_by_campaign_status(client, target_status):
@@ -15,6 +17,39 @@ def get_campaigns_by_campaign_status(client, target_status):
     return target_campaigns
 
 
+def remove_contact_fields(client, fields_to_remove):
+    print(f"\nRemoving fields: {fields_to_remove}")
+    for field in fields_to_remove:
+        try:
+            client.service.deleteContactField(field)
+            print(f"\tDeleted field '{field}'")
+        except Exception as e:
+            print(f"\tFAILED to delete field '{field}': {e}\n")
+
+    print("\nAll targeted fields removed.\n")
+
+
+def campaigns_using_fields(snapshot, fields):
+    """
+    The names of the campaigns that use the fields, through their campaign profile
+    filters or their IVR scripts, from the dependency graph of a domain snapshot.
+
+    A snapshot is required: the campaigns, profiles and IVR scripts of the live
+    domain are not fetched, and without the IVR scripts a field used by an IVR
+    would not be found.
+    """
+    graph = Five9DomainConfig.from_snapshot(snapshot).build_dependency_graph()
+    affected_campaigns = set()
+    for field in fields:
+        affected_campaigns.update(
+            name
+            for node_type, name in graph.used_by(
+                CONTACT_FIELD, field, dependent_type=CAMPAIGN, transitive=True
+            )
+        )
+    return affected_campaigns
+
+
 # if main script
 if __name__ == "__main__":
     additional_args = [
@@ -23,7 +58,18 @@ if __name__ == "__main__":
             "type": str,
             "required": True,
             "help": "List of contact fields to remove (pipe delimited)",
-        }
+        },
+        {
+            "name": "--snapshot",
+            "type": str,
+            "required": False,
+            "help": "Recent domain snapshot folder or archive used to stop only the campaigns using the fields, including through IVR scripts.  Without it every running campaign is stopped",
+        },
+        {
+            "name": "--stop_all_campaigns",
+            "action": "store_true",
+            "help": "Stop every running campaign instead of only the campaigns using the fields",
+        },
     ]
     args = common_parser_arguments(additional_args)
 
@@ -36,22 +82,38 @@ if __name__ == "__main__":
     # Fetch all running campaigns
     originally_running_campaigns = get_campaigns_by_campaign_status(client, "RUNNING")
 
-    if originally_running_campaigns:
+    # only stop the running campaigns that use the fields through their profile or
+    # IVR scripts, which needs the IVR scripts of a snapshot; otherwise stop them all
+    campaigns_to_stop = originally_running_campaigns
+    if args.snapshot is None and not args.stop_all_campaigns:
+        print("\nNo --snapshot given, the IVR scripts using the fields are unknown: stopping every running campaign\n")
+    if args.snapshot is not None and not args.stop_all_campaigns and originally_running_campaigns:
+        affected_campaigns = campaigns_using_fields(args.snapshot, fields_to_remove)
+        print(
+            f"\n{len(affected_campaigns)} of {len(originally_running_campaigns)} running campaigns use the fields to remove\n"
+        )
+        campaigns_to_stop = [
+            campaign
+            for campaign in originally_running_campaigns
+            if campaign.name in affected_campaigns
+        ]
+
+    if campaigns_to_stop:
         # create the /private subfolder if it doesn't exist
         os.makedirs("private", exist_ok=True)
 
         # write the list of running campaigns to a file in the /private subfolder
         with open("private/running_campaigns.txt", "w") as f:
-            for campaign in originally_running_campaigns:
+            for campaign in campaigns_to_stop:
                 f.write(f"{campaign.name}\n")
 
         # using tqdm, stop running campaigns
         with tqdm.tqdm(
-            total=len(originally_running_campaigns),
+            total=len(campaigns_to_stop),
             desc="Requesting campaigns to stop",
             mininterval=1,
         ) as pbar:
-            for campaign in originally_running_campaigns:
+            for campaign in campaigns_to_stop:
                 try:
                     client.service.stopCampaign(campaign.name)
                     time.sleep(0.3)
@@ -92,23 +154,15 @@ if __name__ == "__main__":
 
         print("\nAll campaigns are stopped.\n")
 
-        # remove specific contact fields
-        print(f"\nRemoving fields: {fields_to_remove}")
-        for field in fields_to_remove:
-            try:
-                client.service.deleteContactField(field)
-                print(f"\tDeleted field '{field}'")
-            except Exception as e:
-                print(f"\tFAILED to delete field '{field}': {e}\n")
+        remove_contact_fields(client, fields_to_remove)
 
-        print("\nAll targeted fields removed.\n")
         # restart all previously running campaigns
         with tqdm.tqdm(
-            total=len(originally_running_campaigns),
+            total=len(campaigns_to_stop),
             desc="Requesting campaigns to start",
             mininterval=1,
         ) as pbar:
-            for campaign in originally_running_campaigns:
+            for campaign in campaigns_to_stop:
                 try:
                     client.service.startCampaign(campaign.name)
                     time.sleep(0.3)
@@ -117,6 +171,9 @@ if __name__ == "__main__":
                 finally:
                     pbar.update(1)
                     pbar.set_postfix({"Started": pbar.n})
+    elif originally_running_campaigns:
+        print("\nNo running campaigns use the fields to remove.\n")
+        remove_contact_fields(client, fields_to_remove)
     else:
         print("\nNo running campaigns found.\n")
 
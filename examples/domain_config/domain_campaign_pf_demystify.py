@@ -46,13 +46,32 @@ if __name__ == "__main__":
         help="verbose level set true to see all the output",
     )
 
+    parser.add_argument(
+        "--snapshot",
+        type=str,
+        required=False,
+        help="Existing domain snapshot folder or snapshot archive file to demystify offline, without API access",
+    )
+
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        required=False,
+        help="Worker processes for domains with many distinct filters, defaults to the number of CPUs",
+    )
+
     args = parser.parse_args()
 
-    domain = domain_capture.Five9DomainConfig(
-        username=args.username,
-        password=args.password,
-        account=args.account_alias,
-        api_hostname_alias=args.hostalias,
-        methods=["getCampaignProfiles"],
+    if args.snapshot:
+        domain = domain_capture.Five9DomainConfig.from_snapshot(args.snapshot)
+    else:
+        domain = domain_capture.Five9DomainConfig(
+            username=args.username,
+            password=args.password,
+            account=args.account_alias,
+            api_hostname_alias=args.hostalias,
+            methods=["getCampaignProfiles"],
+        )
+    domain.demystify_campaign_profile_filters(
+        verbose=args.verbose or False, max_workers=args.max_workers
     )
-    domain.demystify_campaign_profile_filters(verbose=args.verbose or False)
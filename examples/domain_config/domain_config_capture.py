@@ -39,6 +39,24 @@ if __name__ == "__main__":
         help="Five9 host alias (us, ca, eu, frk, in)",
     )
 
+    parser.add_argument(
+        "--full_git_status",
+        action="store_true",
+        help="Print the full git status and stage the whole snapshot folder when committing",
+    )
+
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Also write the snapshot to a single compressed archive file next to the snapshot folder",
+    )
+
+    parser.add_argument(
+        "--spill_to_disk",
+        action="store_true",
+        help="Keep the captured objects in a temporary SQLite file instead of memory",
+    )
+
     args = parser.parse_args()
 
     password = args.password
@@ -51,6 +69,10 @@ if __name__ == "__main__":
         password=password,
         account=args.account_alias,
         api_hostname_alias=args.hostalias,
+        spill_to_disk=args.spill_to_disk,
     )
 
-    domain.get_domain_objects()
+    domain.get_domain_objects(
+        full_git_status=args.full_git_status, write_archive=args.archive
+    )
+    domain.close()
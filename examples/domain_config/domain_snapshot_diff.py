@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import tempfile
+
+from git import Repo
+
+from five9.utils.domain_capture import Five9DomainConfig
+from five9.utils.snapshot_diff import export_snapshot_revision, print_changeset
+from five9.utils.snapshot_serializer import snapshot_json_default
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Shows the configuration objects that changed between two domain snapshots"
+    )
+
+    parser.add_argument(
+        "snapshot",
+        type=str,
+        help="The current domain snapshot folder or snapshot archive file",
+    )
+
+    parser.add_argument(
+        "previous",
+        type=str,
+        nargs="?",
+        help="The previous domain snapshot folder or snapshot archive file",
+    )
+
+    parser.add_argument(
+        "--revision",
+        type=str,
+        default="HEAD~1",
+        help="Compare with this commit of the snapshot folder when no previous snapshot is given",
+    )
+
+    parser.add_argument(
+        "--sections",
+        nargs="*",
+        help="Only compare these object types, such as getSkills getIVRScripts_ivrs",
+    )
+
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print the changed fields of every modified object",
+    )
+
+    parser.add_argument(
+        "--json",
+        type=str,
+        required=False,
+        help="Also write the changeset to this JSON file",
+    )
+
+    args = parser.parse_args()
+
+    domain = Five9DomainConfig.from_snapshot(args.snapshot)
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            previous = args.previous
+            if previous is None:
+                print(f"Comparing with revision {args.revision}")
+                previous = export_snapshot_revision(
+                    Repo(os.path.abspath(args.snapshot)),
+                    args.revision,
+                    os.path.join(temp_dir, os.path.basename(os.path.abspath(args.snapshot))),
+                )
+
+            changeset = domain.diff_from(previous, sections=args.sections)
+    finally:
+        domain.close()
+
+    print_changeset(changeset, verbose=args.verbose)
+
+    if args.json:
+        with open(args.json, "w") as changeset_file:
+            json.dump(changeset, changeset_file, indent=4, default=snapshot_json_default)
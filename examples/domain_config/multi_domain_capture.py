@@ -0,0 +1,105 @@
+import argparse
+import json
+
+from five9.utils.multi_domain_capture import capture_domains, print_capture_report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Captures the domain configuration of several domains in parallel in the domain_snapshots folder"
+    )
+
+    parser.add_argument(
+        "accounts",
+        nargs="*",
+        help="Stored credential aliases from private/credentials.py, optionally with a host alias (alias:hostalias)",
+    )
+
+    parser.add_argument(
+        "--accounts_file",
+        type=str,
+        required=False,
+        help="File with one alias[:hostalias] account per line",
+    )
+
+    parser.add_argument(
+        "--hostalias",
+        type=str,
+        default="us",
+        help="Five9 host alias for accounts given without one (us, ca, eu, frk, in)",
+    )
+
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=4,
+        help="Maximum number of domains captured at the same time",
+    )
+
+    parser.add_argument(
+        "--api_sleep_interval",
+        type=float,
+        default=0.2,
+        help="Seconds between the object detail requests of each domain",
+    )
+
+    parser.add_argument(
+        "--log_dir",
+        type=str,
+        default="domain_snapshots/capture_logs",
+        help="Folder for the output of each capture",
+    )
+
+    parser.add_argument(
+        "--report",
+        type=str,
+        required=False,
+        help="Also write the combined capture report to this JSON file",
+    )
+
+    parser.add_argument(
+        "--full_git_status",
+        action="store_true",
+        help="Print the full git status and stage the whole snapshot folder when committing",
+    )
+
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Also write each snapshot to a single compressed archive file",
+    )
+
+    parser.add_argument(
+        "--spill_to_disk",
+        action="store_true",
+        help="Keep the captured objects in temporary SQLite files instead of memory",
+    )
+
+    args = parser.parse_args()
+
+    accounts = list(args.accounts)
+    if args.accounts_file:
+        with open(args.accounts_file, "r") as accounts_file:
+            accounts.extend(
+                line.strip()
+                for line in accounts_file
+                if line.strip() and not line.startswith("#")
+            )
+
+    if len(accounts) == 0:
+        parser.error("No accounts provided")
+
+    capture_report = capture_domains(
+        accounts,
+        max_workers=args.max_workers,
+        api_sleep_interval=args.api_sleep_interval,
+        full_git_status=args.full_git_status,
+        write_archive=args.archive,
+        spill_to_disk=args.spill_to_disk,
+        log_dir=args.log_dir,
+        default_hostalias=args.hostalias,
+    )
+    print_capture_report(capture_report)
+
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(capture_report, report_file, indent=4)
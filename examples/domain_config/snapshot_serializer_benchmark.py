@@ -0,0 +1,150 @@
+import argparse
+import datetime
+import json
+import os
+import random
+import time
+
+from five9.utils.domain_capture import SnapshotFolder
+from five9.utils.snapshot_serializer import snapshot_dumps
+
+
+def fix_datetimes(obj):
+    """datetime conversion used by write_object_to_target_path before snapshot_dumps"""
+    if isinstance(obj, dict):
+        return {k: fix_datetimes(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [fix_datetimes(i) for i in obj]
+    elif isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    else:
+        return obj
+
+
+def previous_dumps(domain_object):
+    return json.dumps(fix_datetimes(domain_object), sort_keys=True, indent=4)
+
+
+def generate_campaigns(count):
+    """Generates outbound campaign details shaped like getOutboundCampaign responses"""
+    timer = {"days": 0, "hours": 0, "minutes": 5, "seconds": 0}
+    campaigns = []
+    for i in range(count):
+        campaigns.append(
+            {
+                "name": f"outbound_campaign_{i}",
+                "description": f"Generated campaign {i}",
+                "mode": "ADVANCED",
+                "profileName": f"profile_{i % 50}",
+                "state": "RUNNING",
+                "type": "OUTBOUND",
+                "trainingMode": False,
+                "autoRecord": True,
+                "callsAgentRatio": 1.5,
+                "maxDroppedCallsPercentage": 3.0,
+                "dialingRatio": 250,
+                "lastModified": datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=i),
+                "callWrapup": {
+                    "agentNotReady": False,
+                    "dispostionName": "No Disposition",
+                    "enabled": True,
+                    "reasonCodeName": None,
+                    "timeout": timer,
+                },
+                "maxPreviewTime": timer,
+                "maxQueueTime": timer,
+                "CRMRedialTimeout": timer,
+                "stateDialingRule": {
+                    "rule": "REGION",
+                    "states": [f"STATE_{s}" for s in range(50)],
+                },
+                "lists": [
+                    {"listName": f"list_{i}_{n}", "priority": n, "ratio": n * 10}
+                    for n in range(20)
+                ],
+            }
+        )
+    return campaigns
+
+
+def generate_ivrs(count, modules_per_ivr):
+    """Generates IVR script definitions with large xmlDefinition values"""
+    ivrs = []
+    for i in range(count):
+        modules = "".join(
+            f"<play><moduleName>Play{m}</moduleName><data><prompt><name>prompt_{m}</name></prompt>"
+            f"<variableName>Custom.var_{random.randint(0, 200)}</variableName></data></play>"
+            for m in range(modules_per_ivr)
+        )
+        ivrs.append(
+            {
+                "name": f"ivr_{i}",
+                "description": None,
+                "xmlDefinition": f"<ivrScript><modules>{modules}</modules></ivrScript>",
+            }
+        )
+    return ivrs
+
+
+def benchmark(label, domain_objects, repeat):
+    previous_seconds = 0
+    snapshot_seconds = 0
+    for i in range(repeat):
+        start = time.perf_counter()
+        previous = [previous_dumps(domain_object) for domain_object in domain_objects]
+        previous_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        current = [snapshot_dumps(domain_object) for domain_object in domain_objects]
+        snapshot_seconds += time.perf_counter() - start
+
+        if previous != current:
+            raise Exception(f"{label}: snapshot_dumps output differs from json.dumps")
+
+    size = sum(len(text) for text in current)
+    print(
+        f"{label:<28} {len(domain_objects):>6} objects {size / 1048576:>8.1f} MB"
+        f"  previous {previous_seconds / repeat:>7.3f}s"
+        f"  snapshot_dumps {snapshot_seconds / repeat:>7.3f}s"
+        f"  ({previous_seconds / snapshot_seconds:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compares snapshot_dumps with the previous fix_datetimes + json.dumps snapshot serialization"
+    )
+    parser.add_argument(
+        "--campaigns", type=int, default=2000, help="Number of generated campaigns"
+    )
+    parser.add_argument("--ivrs", type=int, default=200, help="Number of generated IVRs")
+    parser.add_argument(
+        "--modules_per_ivr",
+        type=int,
+        default=2000,
+        help="Number of modules in each generated IVR script",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark")
+    parser.add_argument(
+        "--snapshot",
+        type=str,
+        required=False,
+        help="Also benchmark the objects of an existing domain snapshot folder",
+    )
+    args = parser.parse_args()
+
+    random.seed(9)
+    benchmark("generated campaigns", generate_campaigns(args.campaigns), args.repeat)
+    benchmark(
+        "generated IVRs", generate_ivrs(args.ivrs, args.modules_per_ivr), args.repeat
+    )
+
+    if args.snapshot:
+        snapshot = SnapshotFolder(os.path.abspath(args.snapshot))
+        for key in snapshot:
+            section = snapshot[key]
+            if isinstance(section, list):
+                domain_objects = [section]
+            else:
+                domain_objects = [section[name] for name in section]
+            benchmark(key, domain_objects, args.repeat)
@@ -1,11 +1,11 @@
 import os
 import argparse
+import concurrent.futures
 import csv
 import logging
-import jsbeautifier
 import difflib  # Import difflib for comparison
 from five9 import five9_session
-from five9.utils.ivr_utils import extract_jsfunctions_from_ivr
+from five9.utils.ivr_utils import analyze_ivrs
 
 if __name__ == "__main__":
 
@@ -25,6 +25,18 @@ if __name__ == "__main__":
         default="us",
         help="Five9 host alias (us, ca, eu, frk, in)",
     )
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Processes that parse, decompress and format the IVR scripts, defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default="private/ivr_function_cache",
+        help="Folder that caches the decompressed and formatted functions between runs",
+    )
 
     args = parser.parse_args()
     logging.info(args)
@@ -42,8 +54,16 @@ if __name__ == "__main__":
     ivrs = client.service.getIVRScripts()
 
     all_functions = {}
-    beautifier_options = jsbeautifier.default_options()
-    beautifier_options.indent_size = 4  # Set indentation level
+    beautifier_options = {"indent_size": 4}  # Set indentation level
+
+    # Parse, decompress and format the functions of all scripts in a process pool,
+    # the analyses are returned in the order of the scripts
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.max_workers) as executor:
+        analyses, failed = analyze_ivrs(
+            ivrs, beautify_options=beautifier_options, executor=executor, cache_dir=args.cache_dir
+        )
+    if failed:
+        print(f"Skipped the IVR scripts that are not valid XML: {', '.join(failed)}")
 
     # Subfolder for storing files
     subfolder = f"private/{client.domain_name}/ivr_function_exports"
@@ -55,8 +75,8 @@ if __name__ == "__main__":
 
     with open(differences_log, "w") as diff_file:
         for script in ivrs:
-            scriptxml = script["xmlDefinition"]
-            functions = extract_jsfunctions_from_ivr(scriptxml)
+            analysis = analyses.get(script["name"], None)
+            functions = analysis["functions"] if analysis is not None else []
 
             if functions:
                 # Prepare new filename for the current script's JS functions
@@ -65,20 +85,21 @@ if __name__ == "__main__":
                 with open(
                     os.path.join(subfolder, f'{script["name"]}.js'), "w", encoding="utf-8"
                 ) as new_file:
-                    functions_str = [function["js"] for function in functions]
-                    formatted_js = [jsbeautifier.beautify(f, beautifier_options) for f in functions_str]
+                    formatted_js = [function["js"] for function in functions]
                     new_file.write("\n".join(formatted_js))
 
                 for function in functions:
                     function_name = function["name"]
-                    function_js = jsbeautifier.beautify(function["js"], beautifier_options)
+                    function_js = function["js"]
 
                     # Check if the function already exists in another script
                     if function_name in all_functions:
                         existing_function = all_functions[function_name]
                         existing_js = existing_function["js"]
 
-                        if existing_js != function_js:
+                        # copies of a shared function have the same compressed body and key,
+                        # only the functions with another key are compared and diffed
+                        if existing_function["key"] != function["key"] and existing_js != function_js:
                             # Log the difference
                             diff_file.write(f"Difference found in function '{function_name}'\n")
                             diff_file.write(f"Script 1: {existing_function['script_name']}\n")
@@ -96,6 +117,7 @@ if __name__ == "__main__":
                     all_functions[function_name] = {
                         "script_name": script["name"],
                         "js": function_js,
+                        "key": function["key"],
                     }
 
             else:
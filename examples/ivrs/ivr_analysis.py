@@ -0,0 +1,118 @@
+import argparse
+import concurrent.futures
+import logging
+import os
+import time
+
+from five9 import five9_session
+from five9.utils.domain_capture import Five9DomainConfig
+from five9.utils.ivr_utils import analyze_ivrs, build_ivr_indexes, iter_ivr_scripts
+from five9.utils.tabular_output import TableWriter
+
+
+def write_index(index, filename, object_header, output_format="csv"):
+    with TableWriter(filename, [object_header, "IVR Script Name"], output_format=output_format) as writer:
+        for object_name, script_names in index.items():
+            for script_name in script_names:
+                writer.write_row([object_name, script_name])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Indexes the variables, skills, prompts, JavaScript functions and modules of all IVR scripts, parsing each script once"
+    )
+
+    parser.add_argument("--username", type=str, help="Five9 username")
+    parser.add_argument("--password", type=str, help="Five9 password")
+    parser.add_argument(
+        "--hostalias",
+        type=str,
+        default="us",
+        help="Five9 host alias (us, ca, eu, frk, in)",
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=str,
+        required=False,
+        help="Analyze the IVR scripts of a domain snapshot folder or snapshot archive file instead",
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default="private/ivr_analysis",
+        help="Folder for the index files",
+    )
+    parser.add_argument(
+        "--format",
+        type=str,
+        default="csv",
+        choices=["csv", "parquet", "arrow"],
+        help="Format of the index files, parquet and arrow need pyarrow",
+    )
+    parser.add_argument(
+        "--fetch_workers",
+        type=int,
+        default=4,
+        help="Concurrent getIVRScripts requests, each fetches the scripts whose name starts with one character",
+    )
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Processes that parse the IVR scripts, defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "--include_examples",
+        action="store_true",
+        help="Also analyze the IVR scripts with EXAMPLE in their name",
+    )
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    start_time = time.time()
+    if args.snapshot:
+        domain = Five9DomainConfig.from_snapshot(args.snapshot)
+        ivrs = list(domain.domain_objects["getIVRScripts_ivrs"].values())
+        domain.close()
+    else:
+        client = five9_session.Five9Client(
+            five9username=args.username or input("Enter your Five9 username: "),
+            five9password=args.password,
+            api_hostname_alias=args.hostalias.lower(),
+        )
+        ivrs = list(iter_ivr_scripts(client.throttled_service, max_workers=args.fetch_workers))
+    logging.info(f"Time taken to load {len(ivrs)} IVR scripts: {time.time() - start_time:.2f} seconds")
+
+    analysis_start_time = time.time()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.max_workers) as executor:
+        analyses, failed = analyze_ivrs(
+            ivrs,
+            exclude=None if args.include_examples else lambda name: "EXAMPLE" in name,
+            decompress_functions=False,
+            executor=executor,
+        )
+    if failed:
+        logging.warning(f"IVR scripts that are not valid XML and not analyzed: {', '.join(failed)}")
+    indexes = build_ivr_indexes(analyses)
+    logging.info(
+        f"Time taken to analyze {len(analyses)} IVR scripts: {time.time() - analysis_start_time:.2f} seconds"
+    )
+
+    for index_name, object_header in [
+        ("variables", "Variable Name"),
+        ("skills", "Skill Name"),
+        ("prompts", "Prompt Name"),
+        ("functions", "Function Name"),
+    ]:
+        filename = os.path.join(args.output_dir, f"ivr_{index_name}.{args.format}")
+        write_index(indexes[index_name], filename, object_header, args.format)
+        logging.info(f"{len(indexes[index_name])} {index_name} saved to: {filename}")
+
+    with TableWriter(
+        os.path.join(args.output_dir, f"ivr_module_counts.{args.format}"),
+        ["Module Type", "Count"],
+        output_format=args.format,
+    ) as writer:
+        writer.write_rows(indexes["module_counts"].items())
@@ -0,0 +1,91 @@
+import argparse
+import concurrent.futures
+import logging
+import os
+import time
+
+from five9 import five9_session
+from five9.utils.domain_capture import Five9DomainConfig
+from five9.utils.ivr_index import INDEX_KINDS, IvrReferenceIndex
+from five9.utils.ivr_utils import iter_ivr_scripts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Answers which IVR scripts and modules use a variable, skill, prompt, function or module type from a local index"
+    )
+
+    parser.add_argument("--username", type=str, help="Five9 username")
+    parser.add_argument("--password", type=str, help="Five9 password")
+    parser.add_argument(
+        "--hostalias",
+        type=str,
+        default="us",
+        help="Five9 host alias (us, ca, eu, frk, in)",
+    )
+    parser.add_argument(
+        "--index",
+        type=str,
+        default="private/ivr_reference_index.sqlite",
+        help="SQLite file of the index",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Update the index from the IVR scripts of the domain, only added and changed scripts are parsed",
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=str,
+        required=False,
+        help="Update the index from a domain snapshot folder or snapshot archive file instead",
+    )
+    parser.add_argument(
+        "--fetch_workers",
+        type=int,
+        default=4,
+        help="Concurrent getIVRScripts requests, each fetches the scripts whose name starts with one character",
+    )
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Processes that parse the changed IVR scripts, defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "--query",
+        nargs=2,
+        metavar=("KIND", "NAME"),
+        help=f"Scripts and modules using NAME, KIND is one of {', '.join(INDEX_KINDS)}. NAME may be a glob pattern such as 'Agent.*'",
+    )
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    os.makedirs(os.path.dirname(args.index) or ".", exist_ok=True)
+
+    with IvrReferenceIndex(args.index) as index:
+        if args.update or args.snapshot:
+            if args.snapshot:
+                domain = Five9DomainConfig.from_snapshot(args.snapshot)
+                ivrs = list(domain.domain_objects["getIVRScripts_ivrs"].values())
+                domain.close()
+            else:
+                client = five9_session.Five9Client(
+                    five9username=args.username or input("Enter your Five9 username: "),
+                    five9password=args.password,
+                    api_hostname_alias=args.hostalias.lower(),
+                )
+                # the changed scripts are analyzed in batches as they are fetched
+                ivrs = iter_ivr_scripts(client.throttled_service, max_workers=args.fetch_workers)
+
+            with concurrent.futures.ProcessPoolExecutor(max_workers=args.max_workers) as executor:
+                result = index.update(ivrs, executor=executor)
+            logging.info(f"Time taken to update the index: {result['seconds']:.2f} seconds")
+
+        if args.query:
+            kind, pattern = args.query
+            query_start_time = time.time()
+            for object_name in index.names(kind, pattern):
+                print(object_name)
+                for script, module_names in index.lookup(kind, object_name).items():
+                    print(f"    {script}: {', '.join(module_names)}" if module_names else f"    {script}")
+            logging.info(f"Query time: {(time.time() - query_start_time) * 1000:.1f} ms")
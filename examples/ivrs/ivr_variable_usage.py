@@ -1,6 +1,7 @@
 import os
 import csv
 import argparse
+import concurrent.futures
 from five9.utils.ivr_utils import ivr_variable_usage
 from five9 import five9_session
 
@@ -41,6 +42,12 @@ if __name__ == "__main__":
     )
     parser.add_argument("--verbose", action="store_false", help="Print verbose output")
     parser.add_argument("--outputfile", type=str, help="Output file for variable usage")
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Processes that parse the IVR scripts, defaults to the number of CPUs",
+    )
 
     args = parser.parse_args()
     five9Username = args.username or input("Enter your Five9 username: ")
@@ -62,7 +69,8 @@ if __name__ == "__main__":
 
     ivrs = client.service.getIVRScripts()
 
-    ivr_variables = ivr_variable_usage(ivrs, verbose=True)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.max_workers) as executor:
+        ivr_variables = ivr_variable_usage(ivrs, verbose=True, executor=executor)
 
     # Write the variable usage to a CSV file
     write_ordered_dict_to_csv(ivr_variables, outputfile_path)
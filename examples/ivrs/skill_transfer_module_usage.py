@@ -1,5 +1,5 @@
 import argparse
-import xml.etree.ElementTree as ET
+import concurrent.futures
 import json
 import csv
 import time
@@ -8,38 +8,10 @@ import logging  # Add import for logging module
 from getpass import getpass
 
 from five9 import five9_session
+from five9.utils.ivr_utils import analyze_ivrs
 import os
 
 
-# Function to extract skill transfer modules and their skills
-def extract_skill_transfers(xml_root):
-    skill_transfers = []
-
-    for skill_transfer in xml_root.findall(".//skillTransfer"):
-        module_name_elem = skill_transfer.find("moduleName")
-        module_name = (
-            module_name_elem.text if module_name_elem is not None else "Unnamed Module"
-        )
-
-        skills = []
-        for extrnal_obj in skill_transfer.findall(".//extrnalObj"):
-            skill_name_elem = extrnal_obj.find("name")
-            if skill_name_elem is not None:
-                skills.append({"name": skill_name_elem.text, "type": "skill"})
-
-        # Handle variable-selected skills
-        for skill_var in skill_transfer.findall(".//listOfSkillsEx"):
-            var_selected_elem = skill_var.find("varSelected")
-            if var_selected_elem is not None and var_selected_elem.text == "true":
-                variable_name_elem = skill_var.find("variableName")
-                if variable_name_elem is not None:
-                    skills.append({"name": variable_name_elem.text, "type": "variable"})
-
-        skill_transfers.append({"moduleName": module_name, "skills": skills})
-
-    return skill_transfers
-
-
 if __name__ == "__main__":
     # Parse command line arguments
     parser = argparse.ArgumentParser(
@@ -63,6 +35,12 @@ if __name__ == "__main__":
     parser.add_argument(
         "--password", type=str, required=False, default=None, help="Five9 password"
     )
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Processes that parse the IVR scripts, defaults to the number of CPUs",
+    )
 
     args = parser.parse_args()
 
@@ -105,19 +83,26 @@ if __name__ == "__main__":
         writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
         writer.writeheader()
 
-        for ivr in ivrs:
-            # Extract and print skill transfer modules
-            root = ET.fromstring(ivr.xmlDefinition)
-            skill_transfer_modules = extract_skill_transfers(root)
+        # Parse each IVR script once, skipping the IVR names that start with "EXAMPLES..Five9.."
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.max_workers) as executor:
+            analyses, failed = analyze_ivrs(
+                ivrs,
+                exclude=lambda name: name.startswith("EXAMPLES..Five9.."),
+                decompress_functions=False,
+                executor=executor,
+            )
+        if failed:
+            print(f"Skipped the IVR scripts that are not valid XML: {', '.join(failed)}")
+
+        for name, analysis in analyses.items():
+            skill_transfer_modules = analysis["skill_transfers"]
 
-            # Skip if skill_transfer_modules list is empty or if the IVR name starts with "EXAMPLES..Five9.."
-            if len(skill_transfer_modules) == 0 or ivr.name.startswith(
-                "EXAMPLES..Five9.."
-            ):
+            # Skip if skill_transfer_modules list is empty
+            if len(skill_transfer_modules) == 0:
                 continue
 
             ivr_skill_usage.append(
-                {"ivr": ivr.name, "skill_transfer_modules": skill_transfer_modules}
+                {"ivr": name, "skill_transfer_modules": skill_transfer_modules}
             )
 
             for module in skill_transfer_modules:
@@ -125,7 +110,7 @@ if __name__ == "__main__":
                 for skill in module["skills"]:
                     writer.writerow(
                         {
-                            "IVR Script": ivr.name,
+                            "IVR Script": name,
                             "Skill Transfer Module Name": module["moduleName"],
                             "Skill Target": skill["name"],
                             "Target Type": skill["type"],
@@ -1,10 +1,12 @@
 import csv
 import datetime
+import io
 import time
 
 import zeep
 
 from five9 import five9_session
+from five9.utils.tabular_output import TableWriter
 
 import logging
 
@@ -19,6 +21,11 @@ criteria_datetime_start = datetime.date.today()
 criteria_datetime_end = datetime.date.today() + datetime.timedelta(days=1)
 report_folder = "staging"
 report_name = "staging_callLog"
+# csv, or parquet and arrow for typed columnar files (requires pyarrow)
+report_output_format = "csv"
+# the types of the report columns in parquet and arrow files, such as
+# {"ANI": "string", "TALK TIME": "float"}, the other columns are inferred
+report_column_types = {}
 
 # Criteria object contains required parameters forthe runReport method
 report_criteria = {
@@ -93,11 +100,23 @@ print(reportResultCsv)
 
 # This is more convenient if you don't want to parse the csv data
 # reportResult = client.service.getReportResult(report_run_id)
-
-row_count_in_result = len(reportResultCsv.records)
-print(f"Row count: {row_count_in_result}\n")
+# row_count_in_result = len(reportResult.records)
+# print(f"Row count: {row_count_in_result}\n")
 
 # print(reportResult)
 
 # Insert the data into your database
 # or write to a file for another process to consume
+report_reader = csv.reader(io.StringIO(reportResultCsv))
+report_output_path = f"private/{report_name}.{report_output_format}"
+# the column types of the text result are inferred from the first rows, such as
+# counts as int, and widened to float or string if later rows do not fit
+with TableWriter(
+    report_output_path,
+    next(report_reader),
+    output_format=report_output_format,
+    types=report_column_types,
+    parse_strings=True,
+) as writer:
+    writer.write_rows(report_reader)
+print(f"{writer.row_count} rows written to {report_output_path}")
@@ -6,10 +6,8 @@ import re
 import time
 from getpass import getpass
 
-from tqdm import tqdm
-import zeep
-
 from five9.five9_session import Five9Client
+from five9.utils.bulk_executor import UpdateJournal, run_bulk_updates
 from five9.utils.general import get_random_password
 
 
@@ -104,7 +102,9 @@ def pseudo_enforce_SSO(
     safe_mode=True,
     simulated_delay=0,
     temp_email="tempemail@temp.com",
-    output_subdir="private"
+    output_subdir="private",
+    max_workers=4,
+    resume=False,
 ):
     """
     Updates user accounts in the Five9 domain to pseudo-enforce Single Sign-On (SSO) compliance.
@@ -128,6 +128,14 @@ def pseudo_enforce_SSO(
         Useful for dry runs. Default is True.
     temp_email (optional): str
         Temporary email address to set during the update. Default is "five9-password-reset@somecompany.com".
+    max_workers (optional): int
+        Number of users updated concurrently, within the client throttle. Default is 4.
+    resume (optional): bool
+        Skip the users updated by an interrupted run, logged in <output_subdir>/sso_journal.jsonl
+        with the original email of each user, which is restored instead of the current email.
+        Without resume every user is updated again, but the original emails of the users an
+        interrupted run did not finish are still read from the journal.
+        A user whose email is temp_email without an original email in the journal fails. Default is False.
 
     Returns:
     tuple: (modified_users, error_users)
@@ -177,69 +185,73 @@ def pseudo_enforce_SSO(
         else:
             missing_users.append(user)
 
-    errors = 0
-    processed = 0
-    updated = 0
+    filename_prefix = "" if not safe_mode else "dry_run_"
+    journal = UpdateJournal(
+        os.path.join(output_subdir, f"{filename_prefix}sso_journal.jsonl"), resume=resume
+    )
 
-    total_users = len(users_to_update)
-    error_users = []
-    modified_users = []
+    def update(user):
+        if safe_mode:
+            time.sleep(simulated_delay)
+            return None
 
-    # create a tqdm progress bar
-    with tqdm(total=total_users, desc="Updating users", mininterval=1) as pbar:
-        filename_prefix = "" if not safe_mode else "dry_run_"
-        
-        for user in users_to_update[processed:]:
-            try:
-                original_email = user.generalInfo.EMail.strip()
-
-                if not safe_mode:
-                    user.generalInfo.EMail = temp_email
-                    modified_user = client.service.modifyUser(user.generalInfo)
-
-                    user.generalInfo.password = get_random_password()
-                    user.generalInfo.canChangePassword = False
-                    user.generalInfo.mustChangePassword = False
-
-                    modified_user = client.service.modifyUser(user.generalInfo)
-                    time.sleep(0.15)
-
-                    modified_user.generalInfo.EMail = original_email
-                    modified_user = client.service.modifyUser(modified_user.generalInfo)
-
-                    modified_user_data = {
-                        "userName": modified_user.generalInfo.userName,
-                        "federationId": modified_user.generalInfo.federationId,
-                        "email": modified_user.generalInfo.EMail,
-                        "userProfilename": modified_user.generalInfo.userProfileName,
-                    }
-                    modified_users.append(modified_user_data)
-                updated += 1
-
-                if safe_mode == True:
-                    time.sleep(simulated_delay)
-                    modified_user_data = user
-                write_data = {
-                    "userName": user.generalInfo.userName,
-                }
-                append_to_csv(f"{filename_prefix}modified_users.csv", write_data, subdir=output_subdir)
-
-            except zeep.exceptions.Fault as e:
-                error_user_data = {
-                    "userName": user.generalInfo.userName,
-                    "federationId": user.generalInfo.federationId,
-                    "error": str(e),
-                }
-                append_to_csv(f"{filename_prefix}error_users.csv", error_user_data, subdir=output_subdir)
-                error_users.append(error_user_data)
-                errors += 1
-                print(f"Error updating {user.generalInfo.userName}: {e}")
-
-            processed += 1
-            pbar.update(1)
-            pbar.set_postfix(
-                {"Updated": updated, "Errors": errors, "Processed": processed}
-            )
+        # the original email is saved in the journal before it is replaced, a retried
+        # or resumed user may already have the temp email
+        user_name = user.generalInfo.userName
+        original_email = journal.data.get(user_name, {}).get("email", None)
+        if original_email is None:
+            original_email = (user.generalInfo.EMail or "").strip()
+            if original_email.lower() == temp_email.lower():
+                raise ValueError(
+                    f"{user_name} has the temporary email {temp_email} and no original email in the journal"
+                )
+            journal.record_data(user_name, email=original_email)
+
+        service = client.throttled_service
+        user.generalInfo.EMail = temp_email
+        modified_user = service.modifyUser(user.generalInfo)
+
+        user.generalInfo.password = get_random_password()
+        user.generalInfo.canChangePassword = False
+        user.generalInfo.mustChangePassword = False
+
+        modified_user = service.modifyUser(user.generalInfo)
+
+        modified_user.generalInfo.EMail = original_email
+        modified_user = service.modifyUser(modified_user.generalInfo)
+
+        return {
+            "userName": modified_user.generalInfo.userName,
+            "federationId": modified_user.generalInfo.federationId,
+            "email": modified_user.generalInfo.EMail,
+            "userProfilename": modified_user.generalInfo.userProfileName,
+        }
+
+    result = run_bulk_updates(
+        users_to_update,
+        update,
+        key=lambda user: user.generalInfo.userName,
+        max_workers=max_workers,
+        journal=journal,
+    )
+    journal.close()
+
+    modified_users = [data for data in result["updated"].values() if data is not None]
+    error_users = []
+    for user in users_to_update:
+        user_name = user.generalInfo.userName
+        if user_name in result["updated"]:
+            append_to_csv(f"{filename_prefix}modified_users.csv", {"userName": user_name}, subdir=output_subdir)
+        elif user_name in result["failed"]:
+            error = result["failed"][user_name]
+            error_user_data = {
+                "userName": user_name,
+                "federationId": user.generalInfo.federationId,
+                "error": str(error),
+            }
+            append_to_csv(f"{filename_prefix}error_users.csv", error_user_data, subdir=output_subdir)
+            error_users.append(error_user_data)
+            print(f"Error updating {user_name}: {error}")
 
     return modified_users, error_users
 
@@ -313,6 +325,19 @@ if __name__ == "__main__":
         help="subdirectory to store output files",
     )
 
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=4,
+        help="Number of users updated concurrently, within the client throttle (default: 4)",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the users updated by an interrupted run",
+    )
+
     args = parser.parse_args()
 
     # Set logging level
@@ -355,5 +380,7 @@ if __name__ == "__main__":
         temp_email=temp_email,
         safe_mode=safe_mode,
         simulated_delay=args.simulated_delay,
-        output_subdir=output_subdir
+        output_subdir=output_subdir,
+        max_workers=args.max_workers,
+        resume=args.resume,
     )
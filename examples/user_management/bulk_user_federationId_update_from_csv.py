@@ -1,21 +1,24 @@
 import csv
-import time
-from tqdm import tqdm
 import argparse
+from five9.utils.bulk_executor import UpdateJournal, run_bulk_updates
 from five9.utils.common import common_parser_arguments, create_five9_client
 from five9 import five9_session
-import zeep
 from pathlib import Path
 from datetime import datetime
 
 
-def update_user_federation_ids(client, csv_path):
+def update_user_federation_ids(client, csv_path, max_workers=4, resume=False):
     """
     Updates federation IDs of users in the Five9 domain based on a provided CSV file.
 
+    The users are updated concurrently through the throttled service and logged in
+    <csv_path>.journal.jsonl, so resume skips the users updated by an interrupted run.
+
     Parameters:
         client (five9_session.Five9Client): Authenticated Five9 client object.
         csv_path (str): Path to the CSV file containing user data.
+        max_workers (int): Number of concurrent modifyUser requests. Defaults to 4.
+        resume (bool): Skip the users updated by a previous run. Defaults to False.
 
     Returns:
         tuple: (updated_users, error_users, skip_users)
@@ -38,31 +41,32 @@ def update_user_federation_ids(client, csv_path):
         else:
             skip_users.append(user)
 
-    updated_users = []
+    def update(user):
+        user.generalInfo.federationId = user_federation_Ids[user.generalInfo.userName]
+        user.generalInfo.EMail = user.generalInfo.EMail.strip()
+        return client.throttled_service.modifyUser(user.generalInfo)
+
+    journal = UpdateJournal(f"{csv_path}.journal.jsonl", resume=resume)
+    result = run_bulk_updates(
+        users_to_update,
+        update,
+        key=lambda user: user.generalInfo.userName,
+        max_workers=max_workers,
+        journal=journal,
+    )
+
+    updated_users = list(result["updated"].values())
     error_users = []
+    for user in users_to_update:
+        error = result["failed"].get(user.generalInfo.userName, None)
+        if error is not None:
+            user.errorMessage = str(error)
+            error_users.append(user)
 
-    total_users = len(users_to_update)
-
-    with tqdm(total=total_users, desc="Updating users", mininterval=1) as pbar:
-        for user in users_to_update:
-            try:
-                user_federationId = user_federation_Ids.get(
-                    user["generalInfo"]["userName"], "skip"
-                )
-                if user_federationId != "skip":
-                    user.generalInfo.federationId = user_federationId
-                    user.generalInfo.EMail = user.generalInfo.EMail.strip()
-                    modified_user = client.service.modifyUser(user.generalInfo)
-                    updated_users.append(modified_user)
-                    time.sleep(0.3)
-            except zeep.exceptions.Fault as e:
-                user.errorMessage = str(e)
-                error_users.append(user)
-            finally:
-                pbar.update(1)
-                pbar.set_postfix(
-                    {"Updated": len(updated_users), "Errors": len(error_users)}
-                )
+    if error_users:
+        journal.close()
+    else:
+        journal.remove()
 
     return updated_users, error_users, skip_users
 
@@ -94,6 +98,18 @@ if __name__ == "__main__":
             "required": False,
             "help": "Path to the error log file",
         },
+        {
+            "name": "--max_workers",
+            "default": 4,
+            "type": int,
+            "required": False,
+            "help": "Concurrent modifyUser requests, within the client throttle. Defaults to 4",
+        },
+        {
+            "name": "--resume",
+            "action": "store_true",
+            "help": "Skip the users updated by an interrupted run, from <filename>.journal.jsonl",
+        },
     ]
     args = common_parser_arguments(additional_args)
 
@@ -108,7 +124,11 @@ if __name__ == "__main__":
         print("\nSIMULATION MODE\n")
 
     # Update federation IDs
-    updated_users, error_users, skip_users = update_user_federation_ids(client, csv_path)
+    updated_users, error_users, skip_users = update_user_federation_ids(
+        client, csv_path, max_workers=args.max_workers, resume=args.resume
+    )
+    if error_users:
+        print(f"\nRerun with --resume to skip the users already updated")
 
     print(f"\nTotal users updated: {len(updated_users)}")
     print(f"Total errors: {len(error_users)}")
@@ -3,9 +3,103 @@ import zeep
 from tqdm import tqdm
 
 from five9 import five9_session
+from five9.utils.skill_sync import (
+    plan_skill_sync,
+    run_skill_sync,
+    skill_name_pattern,
+    user_skill_index,
+)
 
 
-def manage_user_skills(client, users_to_update, skills_to_add, skills_to_remove):
+def sync_user_skills(
+    client,
+    users_to_update,
+    skills_to_add,
+    skills_to_remove,
+    use_profiles=True,
+    max_workers=4,
+    dry_run=False,
+):
+    """
+    Brings the skills of the specified users to the target skills with the fewest requests.
+
+    One getSkillsInfo request returns the users of the skills to add and remove, so
+    only the missing skills are added, the skills the users have are removed, and
+    the levels that differ from the levels of a dict are modified.  When
+    use_profiles is set, the skills of a user profile whose users are all updated
+    are changed once with modifyUserProfileSkills, or user by user when the profile
+    change fails.  The requests run concurrently through the throttled
+    service.
+
+    Parameters:
+    client: Zeep Client object
+        The client used to interact with the Five9 domain.
+    users_to_update: list of str
+        List of usernames for which skills will be managed.
+    skills_to_add: list of str, or dict of skill name to level
+        Skill names to be added to the users, at level 1 when a list, the current
+        levels are only changed by a dict.
+    skills_to_remove: list of str
+        Skill names to be removed from the users.
+    use_profiles: bool
+        Change the skills of fully updated user profiles instead of their users. Defaults to True.
+    max_workers: int
+        Number of concurrent requests. Defaults to 4.
+    dry_run: bool
+        Print the planned changes without making them. Defaults to False.
+
+    Returns:
+    tuple: (updated_count, error_count)
+        updated_count: The number of users and profiles updated.
+        error_count: The number of users and profiles that could not be updated.
+    """
+    skill_names = list(skills_to_add) + list(skills_to_remove)
+    skills_info = client.service.getSkillsInfo(skill_name_pattern(skill_names)) or []
+    skill_ids = {skill_info.skill.name: skill_info.skill.id for skill_info in skills_info}
+    for skill_name in skill_names:
+        if skill_name not in skill_ids:
+            print(f"Error retrieving skill '{skill_name}': not found")
+    skills_to_add = (
+        {name: level for name, level in skills_to_add.items() if name in skill_ids}
+        if isinstance(skills_to_add, dict)
+        else [name for name in skills_to_add if name in skill_ids]
+    )
+    skills_to_remove = [name for name in skills_to_remove if name in skill_ids]
+
+    profiles = client.service.getUserProfiles() if use_profiles else None
+    plan = plan_skill_sync(
+        user_skill_index(skills_info=skills_info),
+        users_to_update,
+        skills_to_add,
+        skills_to_remove,
+        profiles=profiles,
+    )
+    request_count = sum(len(operations) for operations in plan["users"].values()) + len(plan["profiles"])
+    print(
+        f"{len(plan['users'])} users and {len(plan['profiles'])} profiles to update with {request_count} requests, "
+        f"{len(plan['unchanged'])} users already have the target skills"
+    )
+
+    if dry_run:
+        for profile_name, changes in plan["profiles"].items():
+            print(f"\tprofile {profile_name}: add {changes['add']}, remove {changes['remove']}")
+        for user_name, operations in plan["users"].items():
+            for operation, skill_name, level in operations:
+                print(f"\t{user_name}: {operation} {skill_name} (level {level})")
+        return 0, 0
+
+    results = run_skill_sync(client.throttled_service, plan, skill_ids, max_workers=max_workers)
+    updated_count = 0
+    error_count = 0
+    for result in results.values():
+        updated_count += len(result["updated"])
+        error_count += len(result["failed"])
+        for name, error in result["failed"].items():
+            print(f"Error updating skills for '{name}': {error}")
+    return updated_count, error_count
+
+
+def manage_user_skills(client, users_to_update, skills_to_add, skills_to_remove, sync=False):
     """
     Manages skills for specified users in the Five9 domain.
 
@@ -21,6 +115,8 @@ def manage_user_skills(client, users_to_update, skills_to_add, skills_to_remove)
         Skill names to be added to the users.
     skills_to_remove: list of str
         Skill names to be removed from the users.
+    sync: bool
+        Only make the changes the users need, concurrently, see sync_user_skills. Defaults to False.
 
     Returns:
     tuple: (updated_count, error_count)
@@ -31,6 +127,8 @@ def manage_user_skills(client, users_to_update, skills_to_add, skills_to_remove)
     zeep.exceptions.Fault
         If an error occurs during the skill management process.
     """
+    if sync:
+        return sync_user_skills(client, users_to_update, skills_to_add, skills_to_remove)
 
     skills_add_objs = []
     skills_remove_objs = []
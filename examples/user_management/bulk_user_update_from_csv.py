@@ -2,9 +2,9 @@ import argparse
 import csv
 from datetime import datetime
 
-import tqdm
-
+from five9.utils.bulk_executor import UpdateJournal, run_bulk_updates
 from five9.utils.general import datatype_conversion
+from five9.utils.user_diff import apply_user_changes, diff_users
 from five9 import five9_session
 
 
@@ -12,12 +12,23 @@ def update_user_details(
     client: five9_session.Five9Client,
     target_filename: str = "users.csv",
     simulation_mode: bool = True,
+    max_workers: int = 4,
+    journal_path: str = None,
+    resume: bool = False,
 ):
     """Retrieve user general info from a csv file and update the Five9 user object in VCC
 
+    The users are updated concurrently through the throttled service, and each updated
+    user is logged in journal_path (default <target_filename>.journal.jsonl) so resume
+    skips the users updated by an interrupted run.
+
     Args:
         client (five9_session.Five9Client): A Five9 client object that is authenticated and connected.
         target_filename (str, optional): A string specifying the name of the CSV file to save the user details to. Defaults to "users.csv".
+        simulation_mode (bool, optional): Print the fields that would change without updating VCC. Defaults to True.
+        max_workers (int, optional): The number of concurrent modifyUser requests. Defaults to 4.
+        journal_path (str, optional): The journal of the updated users. Defaults to <target_filename>.journal.jsonl.
+        resume (bool, optional): Skip the users updated by a previous run in the journal. Defaults to False.
 
     Returns:
         None: This function does not return anything, but it updates users in Five9 if any of the target values differ from what's in VCC.
@@ -26,14 +37,6 @@ def update_user_details(
     # Get the user general information from the Five9 API
     vcc_users = client.service.getUsersGeneralInfo()
 
-    # get allowed fields from the properties of first user object in the list
-    allowed_fields = dir(vcc_users[0])
-
-    users_from_csv = {}
-    users_to_update = []
-
-    update_errors = []
-
     # open the csv file
     with open(target_filename, "r") as file:
         reader = csv.DictReader(
@@ -43,79 +46,65 @@ def update_user_details(
             quoting=csv.QUOTE_ALL,
             skipinitialspace=True,
         )
-        # identify the headers in the csv file
-        headers = reader.fieldnames
-        # if the headers in the csv file are not in the allowed fields, exit with exception
-        if not set(headers).issubset(set(allowed_fields)):
-            disallowed_fields = set(headers) - set(allowed_fields)
-            allowed_fields_string = "\n\t".join(allowed_fields)
-
-            disallowed_fields_string = ", ".join(sorted(disallowed_fields))
-
-            raise Exception(
-                f"These headers in the csv file:\n\t{disallowed_fields_string}\n\nare not in the allowed fields list:\n\t{allowed_fields_string}"
-            )
-
-        # loop through each row in the csv file, add to the users_from_csv dictionary with the userName as the key
         # each row is a dictionary with the header as the key and the value as the value
-        for row in reader:
-            users_from_csv[row["userName"]] = row
+        users_from_csv = list(reader)
 
+    # compare the csv columns with the VCC users, the headers that are not user
+    # fields raise an exception listing the allowed fields
     print("\nChecking for fields to update")
-    for vcc_user in vcc_users:
-        try:
-            target_user = users_from_csv.get(vcc_user.userName, None)
-            user_needs_update = False
-            if target_user is not None:
-                # for each property in the target_user, compare to the values in the user object
-                # if the values are different, update the user object with the value from the target_user
-                for target_field_name, target_field_value in target_user.items():
-                    # get the datatype of the vcc_user[target_field_name]
-                    datatype = type(vcc_user[target_field_name])
-                    # convert the target_field_value to the datatype of the vcc_user[target_field_name]
-                    target_field_value = datatype_conversion(
-                        datatype, target_field_value
-                    )
-
-                    if target_field_value != vcc_user[target_field_name]:
-                        if simulation_mode == True:
-                            print(
-                                f'\t{vcc_user.userName}: {target_field_name} = "{target_field_value}"'
-                            )
-                        vcc_user[target_field_name] = target_field_value
-                        user_needs_update = True
-
-                if user_needs_update:
-                    # update the user object in Five9
-                    users_to_update.append(vcc_user)
-
-        except Exception as e:
-            update_errors.append((vcc_user, e))
+    diff = diff_users(vcc_users, users_from_csv)
+
+    update_errors = []
+    for user_name, field_errors in diff["errors"].items():
+        for field_name, error in field_errors.items():
+            update_errors.append((user_name, f"{field_name}: {error}"))
+
+    users_by_name = {user.userName: user for user in vcc_users}
+    users_to_update = []
+    for user_name, changes in diff["changes"].items():
+        # users with values that could not be converted are not updated
+        if user_name in diff["errors"]:
+            continue
+        if simulation_mode == True:
+            for field_name, (current_value, new_value) in changes.items():
+                print(f'\t{user_name}: {field_name} "{current_value}" -> "{new_value}"')
+        users_to_update.append(apply_user_changes(users_by_name[user_name], changes))
+
+    if len(diff["unmatched"]) > 0:
+        print(f"\nUsers in the csv file that are not in the domain: {', '.join(diff['unmatched'])}")
 
     print(f"\n               Total domain users: {len(vcc_users)}")
     print(f"Total users with fields to update: {len(users_to_update)}\n")
 
     # update the users in Five9
-    if len(users_to_update) > 0:
-        for user in tqdm.tqdm(users_to_update):
-            try:
-                if simulation_mode == False:
-                    client.service.modifyUser(user)
-            except Exception as e:
-                update_errors.append((user, e))
+    if len(users_to_update) > 0 and simulation_mode == False:
+        journal = UpdateJournal(journal_path or f"{target_filename}.journal.jsonl", resume=resume)
+        result = run_bulk_updates(
+            users_to_update,
+            client.throttled_service.modifyUser,
+            key=lambda user: user.userName,
+            max_workers=max_workers,
+            journal=journal,
+        )
+        update_errors.extend(result["failed"].items())
+        if result["failed"]:
+            journal.close()
+            print(f"\nRerun with --resume to skip the {len(journal.completed)} users already updated")
+        else:
+            journal.remove()
     print("\n")
 
     if len(update_errors) > 0:
         print(f"\nErrors updating users:")
-        for user, error in update_errors:
-            print(f"{user.userName}: {error}")
+        for user_name, error in update_errors:
+            print(f"{user_name}: {error}")
 
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         error_filename = f"private/update_user_errors_{timestamp}.txt"
         print(f"\nWriting errors to {error_filename}\n")
         with open(error_filename, "w") as file:
-            for user, error in update_errors:
-                file.write(f"{user.userName}: {error}\n")
+            for user_name, error in update_errors:
+                file.write(f"{user_name}: {error}\n")
 
 
 if __name__ == "__main__":
@@ -173,14 +162,24 @@ if __name__ == "__main__":
         help="Simulation mode goes through the motions but doesn't update VCC.  Defaults to False",
         required=False,
     )
-    args = vars(parser.parse_args())
-
     parser.add_argument(
         "--hostalias",
         type=str,
         default="us",
         help="Five9 host alias (us, ca, eu, frk, in)",
     )
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=4,
+        help="Concurrent modifyUser requests, within the client throttle. Defaults to 4",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the users updated by an interrupted run, from <filename>.journal.jsonl",
+    )
+    args = vars(parser.parse_args())
 
     five9_username = args["username"] or None
     five9_password = args["password"] or None
@@ -203,5 +202,9 @@ if __name__ == "__main__":
     )
 
     update_user_details(
-        client, target_filename=target_filename, simulation_mode=simulation_mode
+        client,
+        target_filename=target_filename,
+        simulation_mode=simulation_mode,
+        max_workers=args["max_workers"],
+        resume=args["resume"],
     )
@@ -1,7 +1,7 @@
 import argparse  # retained for type hints if needed
-import csv
 from datetime import datetime
 import logging
+import re
 import time
 import os
 import json
@@ -11,6 +11,9 @@ import tqdm
 
 from five9 import five9_session
 from five9.utils.common import common_parser_arguments, create_five9_client
+from five9.utils.general import zeep_values
+from five9.utils.prefix_partition import PartitionCheckpoint, is_oversized_response, partition_by_prefix
+from five9.utils.tabular_output import TableWriter, output_format_for_path
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -39,6 +42,70 @@ def compute_fieldnames(
     return fieldnames
 
 
+def compile_user_row_flattener(
+    fieldnames, target_generalInfo_fields, target_permissions, include_media_types
+):
+    """Compile a function that flattens a user into a CSV row.
+
+    The column of every generalInfo field, media type and role permission is resolved
+    once, so each user is flattened in one pass over its values with dict lookups.
+
+    Returns:
+        function: flatten(user) returning the list of values in fieldnames order.
+            Missing values are "", media types and permissions without a column are skipped.
+    """
+    column_index = {fieldname: index for index, fieldname in enumerate(fieldnames)}
+    general_columns = [
+        (column_index[field], field)
+        for field in target_generalInfo_fields
+        if field in column_index
+    ]
+    media_columns = {}
+    if include_media_types:
+        media_columns = {
+            fieldname[len("media_enabled_"):]: index
+            for fieldname, index in column_index.items()
+            if fieldname.startswith("media_enabled_")
+        }
+    permission_columns = {
+        role_key: {
+            perm: column_index[f"{role_key}_{perm}"]
+            for perm in perms
+            if f"{role_key}_{perm}" in column_index
+        }
+        for role_key, perms in target_permissions.items()
+    }
+    width = len(fieldnames)
+
+    def flatten(user):
+        row = [""] * width
+        user_values = zeep_values(user)
+        general = zeep_values(user_values.get("generalInfo"))
+        for index, field in general_columns:
+            row[index] = general.get(field, "")
+        if media_columns:
+            media_type_config = zeep_values(general.get("mediaTypeConfig"))
+            for media_type in media_type_config.get("mediaTypes") or []:
+                media_type = zeep_values(media_type)
+                index = media_columns.get(media_type.get("type"))
+                if index is not None:
+                    row[index] = media_type.get("enabled")
+        if permission_columns:
+            roles = zeep_values(user_values.get("roles"))
+            for role_key, columns in permission_columns.items():
+                role = roles.get(role_key)
+                if not role:
+                    continue
+                for perm in zeep_values(role).get("permissions") or []:
+                    perm = zeep_values(perm)
+                    index = columns.get(perm.get("type"))
+                    if index is not None:
+                        row[index] = perm.get("value")
+        return row
+
+    return flatten
+
+
 def write_user_chunk(
     users,
     fieldnames,
@@ -47,66 +114,69 @@ def write_user_chunk(
     include_media_types,
     target_filename,
     append: bool,
+    flatten=None,
+    output_format=None,
 ):
-    """Write a chunk of user records to CSV.
+    """Write a chunk of user records to CSV, or to a Parquet or Arrow file.
 
     Ensures directory exists, writes header only when needed, and appends rows.
+    Pass the flatten function of compile_user_row_flattener to reuse it across chunks.
+    The output format defaults to the target_filename extension, see tabular_output.
     """
     if not users:
         return
 
-    dirpath = os.path.dirname(target_filename)
-    if dirpath and not os.path.exists(dirpath):
-        os.makedirs(dirpath)
-        logging.info(f"Created directory: {dirpath}")
+    if flatten is None:
+        flatten = compile_user_row_flattener(
+            fieldnames, target_generalInfo_fields, target_permissions, include_media_types
+        )
 
-    file_exists = os.path.exists(target_filename)
-    write_header = not append or (append and not file_exists)
-    mode = "a" if append else "w"
+    with TableWriter(
+        target_filename, fieldnames, output_format=output_format, append=append
+    ) as writer:
+        writer.write_rows(map(flatten, users))
+
+
+def character_prefix_children(characters, separators="._-@"):
+    """Child prefixes of a userName regex prefix: one per character and separator, and
+    one for the names that end or continue with another character, which is not split
+    further."""
+    split_characters = characters + separators
+
+    def children(prefix):
+        if prefix.endswith(")"):
+            return []
+        return [prefix + re.escape(character) for character in split_characters] + [
+            f"{prefix}(?![{re.escape(split_characters)}])"
+        ]
+
+    return children
+
+
+def numeric_prefix_children(width):
+    """Child prefixes of a numeric userName prefix, down to width digits."""
+
+    def children(prefix):
+        if len(prefix) >= width:
+            return []
+        return [prefix + digit for digit in "0123456789"]
+
+    return children
 
-    with open(target_filename, mode, newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if write_header:
-            writer.writeheader()
-        for user in users:
-            row = {fn: "" for fn in fieldnames}
-            for attribute in target_generalInfo_fields:
-                try:
-                    row[attribute] = user.generalInfo[attribute]
-                except Exception:
-                    row[attribute] = ""
-            if include_media_types:
-                try:
-                    for media_type in user.generalInfo.mediaTypeConfig.mediaTypes:
-                        row[f"media_enabled_{media_type.type}"] = media_type.enabled
-                except Exception:
-                    pass
-            for role_key, perms in target_permissions.items():
-                role_container = getattr(user, "roles", {})
-                if isinstance(role_container, dict):
-                    role = role_container.get(role_key)
-                else:
-                    try:
-                        role = role_container[role_key]
-                    except Exception:
-                        role = None
-                if role:
-                    if isinstance(role, dict):
-                        permissions_list = role.get("permissions", [])
-                    else:
-                        permissions_list = getattr(role, "permissions", [])
-                    for perm in permissions_list:
-                        p_type = getattr(perm, "type", None)
-                        if p_type is None and isinstance(perm, dict):
-                            p_type = perm.get("type")
-                        p_value = getattr(perm, "value", None)
-                        if p_value is None and isinstance(perm, dict):
-                            p_value = perm.get("value")
-                        if p_type in perms:
-                            col_name = f"{role_key}_{p_type}"
-                            if col_name in row:
-                                row[col_name] = p_value
-            writer.writerow(row)
+
+def numeric_prefix_roots(width, start):
+    """The shortest numeric prefixes covering start..10**width-1 zero-padded."""
+    roots = []
+    pending = list("0123456789")
+    while pending:
+        prefix = pending.pop(0)
+        if int(prefix.ljust(width, "9")) < start:
+            continue
+        if int(prefix.ljust(width, "0")) >= start:
+            roots.append(prefix)
+        else:
+            pending[0:0] = [prefix + digit for digit in "0123456789"]
+    return roots
 
 
 def capture_user_details(
@@ -121,8 +191,29 @@ def capture_user_details(
     enumerate_numeric_prefixes: bool = False,
     numeric_prefix_width: int = 3,
     numeric_prefix_start: int = 0,
+    max_workers: int = 4,
+    max_prefix_splits: int = 4,
+    operation_timeout: float = 120,
+    checkpoint_path: str = None,
+    resume: bool = False,
+    output_format: str = None,
 ):
-    """Retrieve user details and write to CSV with optional chunked retrieval for large domains."""
+    """Retrieve user details and write to CSV with optional chunked retrieval for large domains.
+
+    Big domain mode fetches the users by userName prefix with partition_by_prefix: a
+    prefix whose request takes longer than operation_timeout seconds, or ends with a
+    gateway timeout, is split into longer prefixes, up to
+    max_prefix_splits characters (numeric prefixes up to numeric_prefix_width digits),
+    empty prefixes are not split, and max_workers prefixes are fetched concurrently within the throttled
+    rate.  The finished prefixes are saved in checkpoint_path (default
+    <target_filename>.checkpoint.json), and resume continues an interrupted capture.
+
+    output_format is "csv", "parquet" or "arrow", by default from the target_filename
+    extension.  Parquet and Arrow files are typed and written in row groups, they need
+    pyarrow and cannot be resumed.
+    """
+    if output_format is None:
+        output_format = output_format_for_path(target_filename)
 
     if target_users:
         logging.info(f"Limiting user details capture to targeted users: {target_users}")
@@ -141,9 +232,6 @@ def capture_user_details(
                     "Chunked mode requires explicit target_permissions; falling back to single batch."
                 )
             else:
-                first_chunk = True
-                fieldnames = None
-                total_users = 0
                 if enumerate_numeric_prefixes:
                     upper = 10**numeric_prefix_width
                     if numeric_prefix_start < 0:
@@ -152,71 +240,113 @@ def capture_user_details(
                         logging.error("numeric_prefix_start beyond range; aborting.")
                         return
                     logging.info(
-                        f"Enumerating numeric prefixes {numeric_prefix_start:0{numeric_prefix_width}d}..{upper-1:0{numeric_prefix_width}d}"
-                    )
-                    prefix_iter = (
-                        f"{i:0{numeric_prefix_width}d}"
-                        for i in range(numeric_prefix_start, upper)
+                        f"Partitioning numeric prefixes {numeric_prefix_start:0{numeric_prefix_width}d}..{upper-1:0{numeric_prefix_width}d}"
                     )
-                    total_prefixes = upper - numeric_prefix_start
+                    roots = numeric_prefix_roots(numeric_prefix_width, numeric_prefix_start)
+                    children = numeric_prefix_children(numeric_prefix_width)
+                    max_depth = None
                 else:
-                    prefix_iter = big_domain_characters
-                    total_prefixes = len(big_domain_characters)
+                    roots = None
+                    children = character_prefix_children(big_domain_characters)
+                    max_depth = max_prefix_splits
+                # the userName pattern is a regular expression
+                pattern_format = "^{prefix}.*"
 
-                progress = tqdm.tqdm(
-                    prefix_iter, total=total_prefixes, desc="User chunks", unit="chunk"
-                )
-                for prefix in progress:
-                    pattern = (
-                        f"{prefix}.*"
-                        if not enumerate_numeric_prefixes
-                        else f"{prefix}*"
+                if checkpoint_path is None:
+                    checkpoint_path = f"{target_filename}.checkpoint.json"
+                if resume and output_format != "csv":
+                    logging.warning(f"{output_format} files cannot be resumed; capturing all prefixes again.")
+                    resume = False
+                if not resume and os.path.exists(checkpoint_path):
+                    os.remove(checkpoint_path)
+                checkpoint = PartitionCheckpoint(checkpoint_path)
+                fieldnames = checkpoint.state.get("fieldnames", None)
+                total_users = checkpoint.state.get("users", 0)
+                if fieldnames is not None and os.path.exists(target_filename):
+                    # rows written after the last checkpoint are fetched again
+                    with open(target_filename, "r+b") as f:
+                        f.truncate(checkpoint.state["csv_bytes"])
+                    logging.info(
+                        f"Resuming: {len(checkpoint.completed)} prefixes and {total_users} users already written"
                     )
-                    try:
-                        chunk_users = client.service.getUsersInfo(pattern)
-                        time.sleep(0.3)
-                    except Exception as e:
-                        logging.error(
-                            f"Error retrieving users for pattern {pattern}: {e}"
-                        )
-                        progress.set_postfix(pattern=pattern, users="ERR")
-                        continue
-                    if not chunk_users:
+                elif fieldnames is not None:
+                    logging.warning(f"{target_filename} is missing; capturing all prefixes again.")
+                    fieldnames = None
+                    total_users = 0
+                    checkpoint.completed.clear()
+
+                # the throttled service spaces the calls of all workers, and a response
+                # that is not returned within the timeout is fetched by longer prefixes
+                service = client.throttled_service
+                previous_timeout = client.transport.operation_timeout
+                client.transport.operation_timeout = operation_timeout
+                try:
+                    def fetch(prefix):
+                        return service.getUsersInfo(pattern_format.format(prefix=prefix))
+
+                    flatten = None
+                    writer = None
+                    progress = tqdm.tqdm(desc="User chunks", unit="chunk")
+                    for prefix, chunk_users in partition_by_prefix(
+                        fetch,
+                        children,
+                        roots=roots,
+                        max_workers=max_workers,
+                        checkpoint=checkpoint,
+                        # a response too large for the timeout is split, other errors are retried on resume
+                        split_on=is_oversized_response,
+                        max_depth=max_depth,
+                    ):
+                        progress.update(1)
+                        if chunk_users:
+                            if fieldnames is None:
+                                fieldnames = compute_fieldnames(
+                                    chunk_users[0],
+                                    target_generalInfo_fields,
+                                    target_permissions,
+                                    include_media_types,
+                                )
+                            if writer is None:
+                                # the columns are resolved once for all chunks
+                                flatten = compile_user_row_flattener(
+                                    fieldnames,
+                                    target_generalInfo_fields,
+                                    target_permissions,
+                                    include_media_types,
+                                )
+                                # a new capture overwrites the file and writes the header
+                                writer = TableWriter(
+                                    target_filename,
+                                    fieldnames,
+                                    output_format=output_format,
+                                    append=total_users > 0,
+                                )
+                            writer.write_rows(map(flatten, chunk_users))
+                            writer.flush()
+                            total_users += len(chunk_users)
+                            if output_format == "csv":
+                                checkpoint.state.update(
+                                    fieldnames=fieldnames,
+                                    users=total_users,
+                                    csv_bytes=os.path.getsize(target_filename),
+                                )
                         progress.set_postfix(
-                            pattern=pattern, users=0, total=total_users
-                        )
-                        continue
-                    if first_chunk:
-                        fieldnames = compute_fieldnames(
-                            chunk_users[0],
-                            target_generalInfo_fields,
-                            target_permissions,
-                            include_media_types,
-                        )
-                        write_user_chunk(
-                            chunk_users,
-                            fieldnames,
-                            target_generalInfo_fields,
-                            target_permissions,
-                            include_media_types,
-                            target_filename,
-                            append=False,
+                            pattern=pattern_format.format(prefix=prefix), users=len(chunk_users), total=total_users
                         )
-                        first_chunk = False
-                    else:
-                        write_user_chunk(
-                            chunk_users,
-                            fieldnames,
-                            target_generalInfo_fields,
-                            target_permissions,
-                            include_media_types,
-                            target_filename,
-                            append=True,
-                        )
-                    total_users += len(chunk_users)
-                    progress.set_postfix(
-                        pattern=pattern, users=len(chunk_users), total=total_users
+                    progress.close()
+                    if writer is not None:
+                        writer.close()
+                finally:
+                    # the other requests of the client keep their timeout
+                    client.transport.operation_timeout = previous_timeout
+
+                if checkpoint.failed:
+                    logging.error(
+                        f"{len(checkpoint.failed)} prefixes failed, rerun with --resume to retry them: "
+                        f"{sorted(checkpoint.failed)[:10]}"
                     )
+                else:
+                    checkpoint.remove()
                 logging.info(f"Completed chunked capture: {total_users} users written")
                 return
         logging.info("Retrieving all users (single batch).")
@@ -273,6 +403,7 @@ def capture_user_details(
         include_media_types,
         target_filename,
         append=False,
+        output_format=output_format,
     )
 
 
@@ -283,7 +414,14 @@ if __name__ == "__main__":
             "default": None,
             "required": False,
             "type": str,
-            "help": "Output CSV (default private/users_YYYY-MM-DD.csv)",
+            "help": "Output CSV (default private/users_YYYY-MM-DD.csv), .parquet or .arrow for typed columnar files",
+        },
+        {
+            "name": "--format",
+            "default": None,
+            "required": False,
+            "choices": ["csv", "parquet", "arrow"],
+            "help": "Output format, defaults to the --filename extension. parquet and arrow need pyarrow",
         },
         {
             "name": "--config",
@@ -319,6 +457,30 @@ if __name__ == "__main__":
             "default": 0,
             "help": "Starting numeric prefix (e.g. 100 to skip 000-099)",
         },
+        {
+            "name": "--max_workers",
+            "type": int,
+            "default": 4,
+            "help": "Concurrent prefix requests in big domain mode, spaced by the client throttle",
+        },
+        {
+            "name": "--operation_timeout",
+            "type": float,
+            "default": 120,
+            "help": "Seconds before a prefix request is abandoned and split into longer prefixes in big domain mode",
+        },
+        {
+            "name": "--checkpoint",
+            "default": None,
+            "required": False,
+            "type": str,
+            "help": "Checkpoint of the finished prefixes (default <filename>.checkpoint.json)",
+        },
+        {
+            "name": "--resume",
+            "action": "store_true",
+            "help": "Resume an interrupted big domain capture from its checkpoint",
+        },
     ]
     args = common_parser_arguments(additional_args=additional_args)
     client = create_five9_client(args)
@@ -355,6 +517,11 @@ if __name__ == "__main__":
         numeric_prefix_width=args.numeric_prefix_width,
         numeric_prefix_start=args.numeric_prefix_start,
         include_media_types=include_media_types_flag,
+        max_workers=args.max_workers,
+        operation_timeout=args.operation_timeout,
+        checkpoint_path=args.checkpoint,
+        resume=args.resume,
+        output_format=args.format,
     )
 
     # log the file
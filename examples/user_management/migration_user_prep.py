@@ -1,3 +1,4 @@
+from five9.utils.bulk_executor import UpdateJournal, run_bulk_updates
 from five9.utils.common import common_parser_arguments, create_five9_client
 import logging
 from pathlib import Path
@@ -15,7 +16,18 @@ if __name__ == "__main__":
             "default": True,
             "action": "store_true",
             "help": "Run the script in dry-run mode without making changes",
-        }
+        },
+        {
+            "name": "--max_workers",
+            "default": 4,
+            "type": int,
+            "help": "Concurrent updateUser requests, within the client throttle",
+        },
+        {
+            "name": "--resume",
+            "action": "store_true",
+            "help": "Skip the users updated by an interrupted run, from private/migration_user_prep_journal.jsonl",
+        },
     ]
 
     args = common_parser_arguments(additional_args=additional_args)
@@ -97,12 +109,28 @@ if __name__ == "__main__":
 
         if len(modify_user_permissions) > 0:
             logging.info(f"User {user.generalInfo.userName}| {modify_user_permissions}")
-            if not args.dry_run:
-                client.service.updateUser(user)
-            
+            users_to_modify.append(user)
+
             # ensure private folder exists and write details to private/users_to_modify.txt
             Path("private").mkdir(exist_ok=True)
             with open(Path("private") / "users_to_modify.txt", "a") as f:
                 f.write(
                     f"{client.domain_name}|{user.generalInfo.userName}|{modify_user_permissions}\n"
-                )
\ No newline at end of file
+                )
+
+    if not args.dry_run and len(users_to_modify) > 0:
+        journal = UpdateJournal(Path("private") / "migration_user_prep_journal.jsonl", resume=args.resume)
+        result = run_bulk_updates(
+            users_to_modify,
+            client.throttled_service.updateUser,
+            key=lambda user: user.generalInfo.userName,
+            max_workers=args.max_workers,
+            journal=journal,
+        )
+        for user_name, error in result["failed"].items():
+            logging.error(f"Error updating {user_name}: {error}")
+        if result["failed"]:
+            journal.close()
+            logging.info("Rerun with --resume to skip the users already updated")
+        else:
+            journal.remove()
@@ -5,6 +5,7 @@ import argparse
 import functools
 import logging
 from lxml import etree
+import threading
 import time
 
 from getpass import getpass
@@ -32,10 +33,36 @@ class Five9ClientCreationError(Exception):
     pass
 
 
+class RateLimiter:
+    """
+    Spaces calls at least interval_seconds apart, also when they are made from
+    several threads.
+
+    Arguments:
+        interval_seconds: The minimum time between the start of two calls.
+    """
+
+    def __init__(self, interval_seconds):
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._next_call = 0.0
+
+    def wait(self):
+        """Blocks until the next call may start"""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.interval_seconds
+        if delay > 0:
+            time.sleep(delay)
+
+
 class ThrottledServiceProxy:
     def __init__(self, service, delay_seconds=.3):
         self._service = service
         self._delay = delay_seconds
+        # shared by all methods and threads, so concurrent calls are spaced as well
+        self._rate_limiter = RateLimiter(delay_seconds)
 
     def __getattr__(self, name):
         attr = getattr(self._service, name)
@@ -43,7 +70,7 @@ class ThrottledServiceProxy:
         if callable(attr):
             @functools.wraps(attr)
             def throttled_method(*args, **kwargs):
-                time.sleep(self._delay)
+                self._rate_limiter.wait()
                 return attr(*args, **kwargs)
             
             return throttled_method
@@ -0,0 +1,156 @@
+# unittests for the bulk_executor module
+
+import os
+import tempfile
+import threading
+import types
+import unittest
+
+import requests
+import zeep
+
+from examples.user_management.bulk_user_SSO_pseudo_enforce import pseudo_enforce_SSO
+from five9.five9_session import ThrottledServiceProxy
+from five9.utils.bulk_executor import UpdateJournal, is_transient_error, run_bulk_updates
+
+
+class FakeUserService:
+    # modifyUser failing with a rate limit fault the first time for some users
+    def __init__(self, rate_limited=(), invalid=()):
+        self.rate_limited = set(rate_limited)
+        self.invalid = set(invalid)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def modifyUser(self, user):
+        with self.lock:
+            self.calls.append(user["userName"])
+            if user["userName"] in self.rate_limited:
+                self.rate_limited.remove(user["userName"])
+                raise zeep.exceptions.Fault("Limit of requests per 1 minute(s) exceeded")
+        if user["userName"] in self.invalid:
+            raise zeep.exceptions.Fault("Invalid email address")
+        return {"generalInfo": user}
+
+
+class FakeSsoClient:
+    # a domain of users whose modifyUser is interrupted after the email of crash_user is replaced
+    def __init__(self, emails, crash_user=None):
+        self.emails = dict(emails)
+        self.crash_user = crash_user
+        self.service = self
+        self.throttled_service = self
+
+    def getUsersInfo(self):
+        return [
+            types.SimpleNamespace(
+                generalInfo=types.SimpleNamespace(
+                    userName=user_name, EMail=email, federationId=user_name, userProfileName=None
+                ),
+                roles={"admin": None, "supervisor": None},
+            )
+            for user_name, email in self.emails.items()
+        ]
+
+    def modifyUser(self, general_info):
+        self.emails[general_info.userName] = general_info.EMail
+        if general_info.userName == self.crash_user and getattr(general_info, "password", None):
+            raise KeyboardInterrupt
+        return types.SimpleNamespace(generalInfo=general_info)
+
+
+class TestBulkExecutor(unittest.TestCase):
+    def test_is_transient_error(self):
+        self.assertTrue(is_transient_error(zeep.exceptions.Fault("Limit of requests per 1 minute(s) exceeded")))
+        self.assertTrue(is_transient_error(requests.exceptions.ConnectionError()))
+        self.assertTrue(is_transient_error(zeep.exceptions.TransportError(status_code=503)))
+        self.assertFalse(is_transient_error(zeep.exceptions.TransportError(status_code=400)))
+        self.assertFalse(is_transient_error(zeep.exceptions.Fault("User does not exist")))
+        self.assertFalse(is_transient_error(ValueError("bad value")))
+
+    def test_run_bulk_updates(self):
+        users = [{"userName": f"user{i}"} for i in range(20)]
+        service = FakeUserService(rate_limited=["user3", "user7"], invalid=["user5"])
+        throttled = ThrottledServiceProxy(service, delay_seconds=0.001)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            journal_path = os.path.join(temp_dir, "journal.jsonl")
+            with UpdateJournal(journal_path) as journal:
+                result = run_bulk_updates(
+                    users,
+                    throttled.modifyUser,
+                    key=lambda user: user["userName"],
+                    max_workers=4,
+                    journal=journal,
+                    backoff_seconds=0,
+                )
+
+            # the rate limited users are retried, the invalid user is not
+            self.assertEqual(sorted(result["updated"]), sorted(f"user{i}" for i in range(20) if i != 5))
+            self.assertEqual(list(result["failed"]), ["user5"])
+            self.assertEqual(service.calls.count("user3"), 2)
+            self.assertEqual(service.calls.count("user5"), 1)
+
+            # a rerun skips the users in the journal
+            service.invalid.clear()
+            service.calls.clear()
+            with UpdateJournal(journal_path, resume=True) as journal:
+                self.assertEqual(journal.failed, {"user5": "Invalid email address"})
+                result = run_bulk_updates(
+                    users, service.modifyUser, key=lambda user: user["userName"], journal=journal
+                )
+            self.assertEqual(list(result["updated"]), ["user5"])
+            self.assertEqual(len(result["skipped"]), 19)
+            self.assertEqual(service.calls, ["user5"])
+
+            journal = UpdateJournal(journal_path, resume=True)
+            self.assertEqual(len(journal.completed), 20)
+            self.assertEqual(journal.failed, {})
+            journal.record_data("user21", email="user21@example.com")
+            journal.close()
+
+            # saved values are loaded, they do not mark the item finished
+            journal = UpdateJournal(journal_path, resume=True)
+            self.assertEqual(journal.data, {"user21": {"email": "user21@example.com"}})
+            self.assertNotIn("user21", journal.completed)
+            self.assertEqual(journal.failed, {})
+            journal.remove()
+            self.assertFalse(os.path.exists(journal_path))
+
+    def test_fresh_run_keeps_unfinished_data(self):
+        emails = {"alice": "alice@example.com", "bob": "bob@example.com"}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = FakeSsoClient(emails, crash_user="bob")
+            with self.assertRaises(KeyboardInterrupt):
+                pseudo_enforce_SSO(
+                    client,
+                    list(emails),
+                    [],
+                    [],
+                    safe_mode=False,
+                    temp_email="temp@example.com",
+                    output_subdir=temp_dir,
+                    max_workers=1,
+                )
+            self.assertEqual(client.emails["bob"], "temp@example.com")
+
+            # rerun without resume, bob still gets the original email back
+            client.crash_user = None
+            modified_users, error_users = pseudo_enforce_SSO(
+                client,
+                list(emails),
+                [],
+                [],
+                safe_mode=False,
+                temp_email="temp@example.com",
+                output_subdir=temp_dir,
+                max_workers=1,
+            )
+            self.assertEqual(error_users, [])
+            self.assertEqual(client.emails, emails)
+
+            # the data of the finished users is not kept by a fresh run
+            journal = UpdateJournal(os.path.join(temp_dir, "sso_journal.jsonl"))
+            self.assertEqual(journal.data, {})
+            self.assertEqual(journal.completed, set())
+            journal.close()
@@ -0,0 +1,157 @@
+# unittests for the campaign_profile_comprehension module
+
+import random
+import unittest
+
+from five9.utils.campaign_profile_comprehension import (
+    And,
+    Criterion,
+    Group,
+    GroupingExpressionError,
+    Not,
+    Or,
+    demystify_filter,
+    demystify_filters,
+    expression_to_string,
+    parse_grouping_expression,
+    parse_profile_filter,
+    prettify,
+    remystify_filter,
+)
+
+
+class TestCampaignProfileComprehension(unittest.TestCase):
+    def setUp(self):
+        self.profile_filter = {
+            "crmCriteria": [
+                {"leftValue": "state", "compareOperator": "Equals", "rightValue": "CA"},
+                {"leftValue": "phone", "compareOperator": "Like", "rightValue": "(555)%"},
+                {"leftValue": "balance", "compareOperator": "Greater", "rightValue": None},
+            ],
+            "grouping": {"expression": "1 AND ( 2  OR 3)", "type": "Custom"},
+            "orderByFields": [],
+        }
+
+    def test_prettify(self):
+        self.assertEqual(
+            prettify("a{b [c] <d>}  e"),
+            "a{\n\tb [\n\t\tc\n\t]\n <\n\t\td\n\t>\n}\n e ",
+        )
+
+    def test_demystify_filter(self):
+        self.assertEqual(
+            demystify_filter(self.profile_filter),
+            "[state ::Equals:: CA][1] \nAND (\n\t [phone ::Like:: (555)%][2] \n\tOR [balance ::Greater:: null][3]\n)\n ",
+        )
+
+    def test_parse_grouping_expression_precedence(self):
+        self.assertEqual(
+            parse_grouping_expression("1 AND 2 OR NOT 3 AND (4 OR 5)"),
+            Or(
+                [
+                    And([Criterion(1), Criterion(2)]),
+                    And([Not(Criterion(3)), Group(Or([Criterion(4), Criterion(5)]))]),
+                ]
+            ),
+        )
+
+    def test_parse_profile_filter(self):
+        tree = parse_profile_filter(self.profile_filter)
+        self.assertEqual(tree.operands[0].criterion["leftValue"], "state")
+        self.assertEqual(expression_to_string(tree), "1 AND (2 OR 3)")
+
+        self.profile_filter["grouping"] = {"expression": None, "type": "Any"}
+        self.assertEqual(expression_to_string(parse_profile_filter(self.profile_filter)), "1 OR 2 OR 3")
+
+    def test_invalid_grouping_expressions(self):
+        for expression in ["", "1 AND", "(1 OR 2", "1 2", "1 XOR 2"]:
+            with self.assertRaises(GroupingExpressionError):
+                parse_grouping_expression(expression)
+
+        with self.assertRaises(GroupingExpressionError):
+            parse_grouping_expression("1 AND 4", self.profile_filter["crmCriteria"])
+
+    def test_remystify_filter(self):
+        self.profile_filter["grouping"]["expression"] = "1 AND (2 OR 3)"
+        self.assertEqual(remystify_filter(demystify_filter(self.profile_filter)), self.profile_filter)
+
+        # conditions without a number are added, repeated conditions reuse their number
+        remystified = remystify_filter(
+            "[state ::Equals:: CA][1] AND ([zip ::Like:: 9%] OR NOT [state ::Equals:: CA])"
+        )
+        self.assertEqual(remystified["grouping"]["expression"], "1 AND (2 OR NOT 1)")
+        self.assertEqual(remystified["crmCriteria"][1]["leftValue"], "zip")
+
+        # the criteria are renumbered compactly, unused criteria are dropped
+        remystified = remystify_filter("[zip ::Like:: 9%][3] OR [state ::Equals:: CA][7]")
+        self.assertEqual(remystified["grouping"]["expression"], "1 OR 2")
+        self.assertEqual([criteria["leftValue"] for criteria in remystified["crmCriteria"]], ["zip", "state"])
+
+        # a "]" in a value ends a condition without a number
+        remystified = remystify_filter("[zip ::Like:: 9%] AND [city ::Equals:: a] b][2]")
+        self.assertEqual(remystified["grouping"]["expression"], "2 AND 1")
+        self.assertEqual(remystified["crmCriteria"][0]["rightValue"], "a] b")
+
+        for nice_filter in [
+            "[state ::Equals:: CA][1] AND [zip ::Like:: 9%][1]",
+            "[state ::Equals:: CA",
+            "[state] AND [zip ::Like:: 9%]",
+        ]:
+            with self.assertRaises(GroupingExpressionError):
+                remystify_filter(nice_filter)
+
+    def test_remystify_filter_round_trip(self):
+        operators = ["Equals", "NotEqual", "Like", "Less", "Greater", "IsNull"]
+        values = [None, "CA", "(555) 123-4567", "a AND b", "x)(y", "[a", "OR", "a] b", "a] AND [b", "a  b", " x", "y ", "  (a  OR  b)  "]
+        generator = random.Random(36)
+
+        for trial in range(20):
+            count = generator.randint(1, 400)
+            criteria = [
+                {
+                    "leftValue": f"field_{generator.randint(1, 50)}",
+                    "compareOperator": generator.choice(operators),
+                    "rightValue": generator.choice(values),
+                }
+                for i in range(count)
+            ]
+            terms = [str(i + 1) for i in range(count)]
+            while len(terms) > 1:
+                size = min(len(terms), generator.randint(2, 4))
+                operator = generator.choice([" AND ", " OR "])
+                term = "(" + operator.join(terms[:size]) + ")"
+                if generator.random() < 0.1:
+                    term = "NOT " + term
+                terms = [term] + terms[size:]
+                generator.shuffle(terms)
+            expression = terms[0]
+            if expression.startswith("(") and generator.random() < 0.5:
+                # repeat a criterion
+                expression = f"{expression} OR {generator.randint(1, count)}"
+
+            profile_filter = {
+                "crmCriteria": criteria,
+                "grouping": {"expression": expression, "type": "Custom"},
+                "orderByFields": [],
+            }
+            self.assertEqual(remystify_filter(demystify_filter(profile_filter)), profile_filter)
+
+    def test_demystify_filters(self):
+        clone = {
+            "crmCriteria": [dict(criterion) for criterion in self.profile_filter["crmCriteria"]],
+            "grouping": dict(self.profile_filter["grouping"]),
+            "orderByFields": [],
+        }
+        profile_filters = {
+            "profile": self.profile_filter,
+            "clone": clone,
+            "all": {"crmCriteria": [], "grouping": {"expression": None, "type": "All"}, "orderByFields": []},
+        }
+
+        for max_workers in [1, 2]:
+            report = demystify_filters(profile_filters, max_workers=max_workers, parallel_threshold=1)
+            self.assertEqual((report["filters"], report["distinct"]), (2, 1))
+            self.assertEqual(
+                report["demystified"],
+                {"profile": demystify_filter(self.profile_filter), "clone": demystify_filter(clone)},
+            )
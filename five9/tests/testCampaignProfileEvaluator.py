@@ -0,0 +1,121 @@
+# unittests for the campaign_profile_evaluator module
+
+import csv
+import os
+import random
+import tempfile
+import unittest
+
+from five9.utils.campaign_profile_comprehension import demystify_filter
+from five9.utils.campaign_profile_evaluator import (
+    ContactTable,
+    compile_criterion,
+    evaluate_profile_filter,
+)
+
+
+class TestCampaignProfileEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.temp_dir.name, "contacts.csv")
+
+        generator = random.Random(37)
+        self.rows = [
+            {
+                "number1": f"555{i:07d}",
+                "state": generator.choice(["CA", "ny", "TX", ""]),
+                "balance": generator.choice(["", "50", "999.5", "1,200", "20000"]),
+                "zip": f"{generator.randint(0, 99999):05d}",
+            }
+            for i in range(3000)
+        ]
+        with open(self.csv_path, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=["number1", "state", "balance", "zip"])
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+        self.profile_filter = {
+            "crmCriteria": [
+                {"leftValue": "state", "compareOperator": "Equals", "rightValue": "ca"},
+                {"leftValue": "balance", "compareOperator": "Greater", "rightValue": "1000"},
+                {"leftValue": "zip", "compareOperator": "Like", "rightValue": "9_%"},
+                {"leftValue": "state", "compareOperator": "IsNull", "rightValue": None},
+            ],
+            "grouping": {"expression": "(1 AND 2) OR (NOT 3 AND 4)", "type": "Custom"},
+            "orderByFields": [],
+        }
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_compile_criterion(self):
+        greater = compile_criterion({"leftValue": "balance", "compareOperator": "Greater", "rightValue": "1000"})
+        self.assertEqual([greater(value) for value in ["1,200", "999.5", "abc", None]], [True, False, True, False])
+
+        as_text = compile_criterion(
+            {"leftValue": "balance", "compareOperator": "Greater", "rightValue": "1000"}, field_type="STRING"
+        )
+        # compared as text, "999.5" sorts after "1000"
+        self.assertTrue(as_text("999.5"))
+
+        like = compile_criterion({"leftValue": "name", "compareOperator": "Like", "rightValue": "a_c%"})
+        self.assertEqual([like(value) for value in ["ABCD", "ac", "a.c"]], [True, False, True])
+
+        contains = compile_criterion(
+            {"leftValue": "name", "compareOperator": "DontContains", "rightValue": "x"}, case_sensitive=True
+        )
+        self.assertEqual([contains(value) for value in ["X", "x", None]], [True, False, False])
+
+        # a comparison with a null right value selects nothing, Equals and NotEqual test for null
+        for compare_operator in ["Greater", "Less", "Like", "Contains", "DontContains", "StartsWith"]:
+            with_null = compile_criterion({"leftValue": "name", "compareOperator": compare_operator, "rightValue": None})
+            self.assertEqual([with_null(value) for value in ["a", "", None]], [False, False, False])
+        is_null = compile_criterion({"leftValue": "name", "compareOperator": "Equals", "rightValue": None})
+        self.assertEqual([is_null(value) for value in ["a", None]], [False, True])
+
+    def test_not_selects_null_cells(self):
+        profile_filter = {
+            "crmCriteria": [{"leftValue": "state", "compareOperator": "Equals", "rightValue": "CA"}],
+            "grouping": {"expression": "NOT 1", "type": "Custom"},
+            "orderByFields": [],
+        }
+        report = evaluate_profile_filter(profile_filter, self.csv_path)
+        self.assertEqual(report["selected"], sum(1 for row in self.rows if row["state"] != "CA"))
+        self.assertGreater(sum(1 for row in self.rows if row["state"] == ""), 0)
+
+    def test_evaluate_profile_filter(self):
+        def selected(row):
+            state = row["state"].lower() == "ca"
+            balance = row["balance"] != "" and float(row["balance"].replace(",", "")) > 1000
+            zip_like = len(row["zip"]) >= 2 and row["zip"].startswith("9")
+            return (state and balance) or (not zip_like and row["state"] == "")
+
+        expected = sum(1 for row in self.rows if selected(row))
+
+        report = evaluate_profile_filter(self.profile_filter, self.csv_path)
+        self.assertEqual(report["rows"], 3000)
+        self.assertEqual(report["selected"], expected)
+        self.assertEqual(report["criteria"][0]["selected"], sum(1 for row in self.rows if row["state"] == "CA"))
+
+        # the demystified text selects the same records
+        text_report = evaluate_profile_filter(demystify_filter(self.profile_filter), self.csv_path)
+        self.assertEqual(text_report["mask"], report["mask"])
+
+    def test_contact_table(self):
+        table = ContactTable.from_csv(self.csv_path, columns=["state", "number1"])
+        self.assertEqual(set(table.columns), {"state", "number1"})
+        self.assertIsInstance(table.columns["state"].codes, bytes)
+        self.assertNotIsInstance(table.columns["number1"].codes, bytes)
+
+        report = evaluate_profile_filter(
+            {
+                "crmCriteria": [{"leftValue": "number1", "compareOperator": "EndsWith", "rightValue": "00"}],
+                "grouping": {"expression": None, "type": "All"},
+                "orderByFields": [],
+            },
+            table,
+        )
+        self.assertEqual(table.selected_rows(report["mask"], limit=3), [0, 100, 200])
+
+        with self.assertRaises(ValueError):
+            ContactTable.from_csv(self.csv_path, columns=["missing_field"])
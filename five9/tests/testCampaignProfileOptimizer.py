@@ -0,0 +1,132 @@
+# unittests for the campaign_profile_optimizer module
+
+import csv
+import os
+import random
+import tempfile
+import unittest
+
+from five9.utils.campaign_profile_evaluator import ContactTable, evaluate_profile_filter
+from five9.utils.campaign_profile_optimizer import optimize_profile_filter
+
+
+def criterion(left_value, compare_operator, right_value):
+    return {"leftValue": left_value, "compareOperator": compare_operator, "rightValue": right_value}
+
+
+class TestCampaignProfileOptimizer(unittest.TestCase):
+    def kinds(self, report):
+        return {finding["kind"] for finding in report["findings"]}
+
+    def test_duplicates_and_flattening(self):
+        profile_filter = {
+            "crmCriteria": [
+                criterion("state", "Equals", "CA"),
+                criterion("balance", "Greater", "100"),
+                criterion("state", "Equals", "CA"),
+                criterion("zip", "StartsWith", "9"),
+                criterion("unused", "IsNull", None),
+            ],
+            "grouping": {"expression": "((1 AND (2 AND 3)) OR NOT NOT 4) OR (4 AND 2)", "type": "Custom"},
+            "orderByFields": [{"fieldName": "balance", "descending": True}],
+        }
+        report = optimize_profile_filter(profile_filter)
+
+        self.assertEqual(report["filter"]["grouping"], {"expression": "(1 AND 2) OR 3", "type": "Custom"})
+        self.assertEqual(
+            report["filter"]["crmCriteria"],
+            [criterion("state", "Equals", "CA"), criterion("balance", "Greater", "100"), criterion("zip", "StartsWith", "9")],
+        )
+        self.assertEqual(report["filter"]["orderByFields"], profile_filter["orderByFields"])
+        self.assertEqual(
+            self.kinds(report),
+            {"duplicate_criteria", "unused", "flattened", "duplicate", "double_negation", "absorbed"},
+        )
+        self.assertEqual((report["before"]["criteria"], report["after"]["criteria"]), (5, 3))
+
+    def test_contradictions(self):
+        profile_filter = {
+            "crmCriteria": [
+                criterion("state", "Equals", "CA"),
+                criterion("state", "Equals", "NY"),
+                criterion("balance", "Greater", "100"),
+                criterion("balance", "Less", "50"),
+                criterion("zip", "Equals", "90210"),
+            ],
+            "grouping": {"expression": "(1 AND 2) OR (3 AND 4) OR (5 AND NOT 5) OR 1", "type": "Custom"},
+            "orderByFields": [],
+        }
+        report = optimize_profile_filter(profile_filter, {"balance": "NUMBER"})
+        self.assertEqual(report["filter"]["crmCriteria"], [criterion("state", "Equals", "CA")])
+        self.assertEqual(report["filter"]["grouping"], {"expression": None, "type": "All"})
+        self.assertEqual(sum(1 for finding in report["findings"] if finding["kind"] == "contradiction"), 3)
+
+        # without the field type, balance is not known to be numeric
+        report = optimize_profile_filter(profile_filter)
+        self.assertEqual(report["after"]["criteria"], 3)
+
+        profile_filter["grouping"]["expression"] = "1 AND 2"
+        report = optimize_profile_filter(profile_filter)
+        self.assertIsNone(report["filter"])
+
+    def test_numeric_and_case_values(self):
+        # equal numbers and values differing by case are not contradictions
+        for conditions in [
+            [("n", "Equals", "1"), ("n", "Equals", "1.0")],
+            [("state", "Equals", "CA"), ("state", "NotEqual", "ca")],
+        ]:
+            profile_filter = {
+                "crmCriteria": [criterion(*condition) for condition in conditions],
+                "grouping": {"expression": "1 AND 2", "type": "Custom"},
+                "orderByFields": [],
+            }
+            for field_types in [None, {"n": "NUMBER", "state": "STRING"}]:
+                self.assertIsNotNone(optimize_profile_filter(profile_filter, field_types)["filter"])
+
+        profile_filter["crmCriteria"] = [criterion("n", "Equals", "1"), criterion("n", "NotEqual", "1.0")]
+        self.assertIsNone(optimize_profile_filter(profile_filter, {"n": "NUMBER"})["filter"])
+        self.assertIsNotNone(optimize_profile_filter(profile_filter, {"n": "STRING"})["filter"])
+
+    def test_optimized_filters_select_the_same_records(self):
+        values = {"n": ["1", "1.0", "2", "10", "abc", ""], "state": ["CA", "ca", "NY", "1", ""]}
+        operators = ["Equals", "Equals", "NotEqual", "NotEqual", "Less", "Greater", "GreaterOrEqual", "Like", "IsNull", "IsNotNull"]
+        generator = random.Random(38)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "contacts.csv")
+            with open(csv_path, "w", newline="") as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(list(values))
+                writer.writerows([n, state] for n in values["n"] for state in values["state"])
+            table = ContactTable.from_csv(csv_path)
+
+        for trial in range(500):
+            count = generator.randint(2, 4)
+            criteria = []
+            for i in range(count):
+                field = generator.choice(list(values))
+                right_value = generator.choice(values[field] + [None])
+                criteria.append(criterion(field, generator.choice(operators), right_value or None))
+            terms = [str(i + 1) for i in range(count)]
+            while len(terms) > 1:
+                size = min(len(terms), generator.randint(2, 3))
+                term = "(" + generator.choice([" AND ", " OR "]).join(terms[:size]) + ")"
+                if generator.random() < 0.2:
+                    term = "NOT " + term
+                terms = [term] + terms[size:]
+                generator.shuffle(terms)
+            profile_filter = {
+                "crmCriteria": criteria,
+                "grouping": {"expression": terms[0], "type": "Custom"},
+                "orderByFields": [],
+            }
+
+            for field_types in [None, {"n": "NUMBER", "state": "STRING"}]:
+                optimized = optimize_profile_filter(profile_filter, field_types)["filter"]
+                for case_sensitive in [False, True]:
+                    expected = evaluate_profile_filter(profile_filter, table, field_types, case_sensitive)
+                    if optimized is None:
+                        self.assertEqual(expected["selected"], 0, terms[0])
+                    else:
+                        report = evaluate_profile_filter(optimized, table, field_types, case_sensitive)
+                        self.assertEqual(report["mask"], expected["mask"], terms[0])
@@ -0,0 +1,132 @@
+# unittests for the user row flattener of the capture_user_detail_to_csv example
+
+import csv
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from zeep import xsd
+
+from examples.user_management.capture_user_detail_to_csv import (
+    compile_user_row_flattener,
+    compute_fieldnames,
+    write_user_chunk,
+)
+
+String = xsd.String()
+Boolean = xsd.Boolean()
+MediaType = xsd.ComplexType(xsd.Sequence([xsd.Element("enabled", Boolean), xsd.Element("type", String)]))
+MediaTypeConfig = xsd.ComplexType(xsd.Sequence([xsd.Element("mediaTypes", MediaType, max_occurs="unbounded")]))
+GeneralInfo = xsd.ComplexType(
+    xsd.Sequence(
+        [xsd.Element(name, String) for name in ["userName", "EMail", "firstName", "lastName", "fullName"]]
+        + [xsd.Element("active", Boolean), xsd.Element("mediaTypeConfig", MediaTypeConfig)]
+    )
+)
+Permission = xsd.ComplexType(xsd.Sequence([xsd.Element("type", String), xsd.Element("value", Boolean)]))
+Role = xsd.ComplexType(xsd.Sequence([xsd.Element("permissions", Permission, max_occurs="unbounded")]))
+Roles = xsd.ComplexType(
+    xsd.Sequence([xsd.Element("agent", Role), xsd.Element("admin", Role), xsd.Element("supervisor", Role)])
+)
+UserInfo = xsd.ComplexType(xsd.Sequence([xsd.Element("generalInfo", GeneralInfo), xsd.Element("roles", Roles)]))
+
+PERMISSIONS = [f"Permission{i}" for i in range(12)]
+
+
+def legacy_row(user, fieldnames, target_generalInfo_fields, target_permissions, include_media_types):
+    # the row built for csv.DictWriter before compile_user_row_flattener
+    row = {fieldname: "" for fieldname in fieldnames}
+    for attribute in target_generalInfo_fields:
+        try:
+            row[attribute] = user.generalInfo[attribute]
+        except Exception:
+            row[attribute] = ""
+    if include_media_types:
+        try:
+            for media_type in user.generalInfo.mediaTypeConfig.mediaTypes:
+                row[f"media_enabled_{media_type.type}"] = media_type.enabled
+        except Exception:
+            pass
+    for role_key, perms in target_permissions.items():
+        try:
+            role = user.roles[role_key]
+        except Exception:
+            role = None
+        if role:
+            for perm in role.permissions:
+                if perm.type in perms and f"{role_key}_{perm.type}" in row:
+                    row[f"{role_key}_{perm.type}"] = perm.value
+    return row
+
+
+class TestCaptureUserDetail(unittest.TestCase):
+    def setUp(self):
+        generator = random.Random(46)
+
+        def user(i):
+            media_types = ["VOICE", "CHAT", "EMAIL"] + (["SOCIAL"] if i % 5 == 4 else [])
+            return UserInfo(
+                generalInfo=GeneralInfo(
+                    userName=f"user{i}@example.com",
+                    EMail=f"user{i}@example.com",
+                    firstName=None if i % 4 == 0 else "First",
+                    lastName=None,
+                    fullName="First Last",
+                    active=generator.random() < 0.5,
+                    mediaTypeConfig=MediaTypeConfig(
+                        mediaTypes=[MediaType(enabled=generator.random() < 0.5, type=name) for name in media_types]
+                    )
+                    if i % 6
+                    else None,
+                ),
+                roles=Roles(
+                    agent=Role(
+                        permissions=[Permission(type=name, value=generator.random() < 0.5) for name in PERMISSIONS]
+                    )
+                    if i % 7
+                    else None,
+                    admin=Role(permissions=[Permission(type=name, value=True) for name in PERMISSIONS[:3]])
+                    if i % 3 == 0
+                    else None,
+                ),
+            )
+
+        # missing roles, None values, users without media types and unknown media types
+        self.users = [user(i) for i in range(1, 200)]
+        self.fields = ["userName", "firstName", "lastName", "EMail", "active", "missingField"]
+        self.permissions = {"agent": PERMISSIONS[::3] + ["NotThere"], "admin": PERMISSIONS[:2], "supervisor": ["Any"]}
+        self.fieldnames = compute_fieldnames(self.users[0], self.fields, self.permissions, True)
+
+    def test_same_rows_as_dict_writer(self):
+        self.assertIn("media_enabled_VOICE", self.fieldnames)
+        self.assertNotIn("media_enabled_SOCIAL", self.fieldnames)
+
+        legacy = io.StringIO(newline="")
+        # the legacy writer raised on the media types without a column, the flattener skips them
+        writer = csv.DictWriter(legacy, fieldnames=self.fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        for user in self.users:
+            writer.writerow(legacy_row(user, self.fieldnames, self.fields, self.permissions, True))
+
+        flatten = compile_user_row_flattener(self.fieldnames, self.fields, self.permissions, True)
+        flattened = io.StringIO(newline="")
+        rows = csv.writer(flattened)
+        rows.writerow(self.fieldnames)
+        rows.writerows(map(flatten, self.users))
+        self.assertEqual(flattened.getvalue(), legacy.getvalue())
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "users.csv")
+            write_user_chunk(self.users[:100], self.fieldnames, self.fields, self.permissions, True, path, append=False)
+            write_user_chunk(self.users[100:], self.fieldnames, self.fields, self.permissions, True, path, append=True)
+            with open(path, "r", newline="") as csv_file:
+                self.assertEqual(csv_file.read(), legacy.getvalue())
+
+    def test_dict_users(self):
+        flatten = compile_user_row_flattener(self.fieldnames, self.fields, self.permissions, False)
+        user = {"generalInfo": {"userName": "alice", "active": True}, "roles": {"agent": None}}
+        row = flatten(user)
+        self.assertEqual(row[self.fieldnames.index("userName")], "alice")
+        self.assertEqual(row[self.fieldnames.index("missingField")], "")
@@ -0,0 +1,85 @@
+# unittests for the dependency_graph module
+
+import unittest
+
+from five9.utils.dependency_graph import DependencyGraph
+
+
+IVR_XML = (
+    "<ivrScript><modules>"
+    "<skillTransfer><moduleName>Transfer</moduleName><data><listOfSkillsEx>"
+    "<extrnalObj><id>1</id><name>sales</name></extrnalObj></listOfSkillsEx></data></skillTransfer>"
+    "<play><moduleName>Welcome</moduleName><data><prompt><name>welcome_prompt</name></prompt>"
+    "<variableName>Custom.account</variableName></data></play>"
+    "<query><data><variableName>Contact.balance</variableName>"
+    "<variableName>localVariable</variableName></data></query>"
+    "</modules></ivrScript>"
+)
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = DependencyGraph.from_domain_objects(
+            {
+                "getCampaigns": [
+                    {"name": "outbound", "profileName": "profile_1", "type": "OUTBOUND"},
+                    {"name": "inbound", "profileName": None, "type": "INBOUND"},
+                ],
+                "getCampaigns_campaigns_outbound": {
+                    "outbound": {"name": "outbound", "callWrapup": {"dispostionName": "Sale"}}
+                },
+                "getCampaigns_campaigns_inbound": {
+                    "inbound": {
+                        "name": "inbound",
+                        "defaultIvrSchedule": {"ivrSchedule": {"scriptName": "main_ivr"}},
+                    }
+                },
+                "getCampaignProfiles_campaign_profile_filters": {
+                    "profile_1": {
+                        "crmCriteria": [{"leftValue": "state", "compareOperator": "Equals"}],
+                        "orderByFields": [{"fieldName": "last_call", "descending": True}],
+                    }
+                },
+                "getIVRScripts_ivrs": {"main_ivr": {"name": "main_ivr", "xmlDefinition": IVR_XML}},
+                "getCallVariables": [{"name": "account", "group": "Custom", "dispositions": ["Sale"]}],
+                "getUserProfiles": [{"name": "agents", "skills": ["sales", "support"]}],
+            }
+        )
+
+    def test_direct_references(self):
+        self.assertEqual(
+            self.graph.uses("campaign", "outbound"),
+            {("campaignProfile", "profile_1"), ("disposition", "Sale")},
+        )
+        self.assertEqual(
+            self.graph.uses("ivrScript", "main_ivr"),
+            {
+                ("skill", "sales"),
+                ("prompt", "welcome_prompt"),
+                ("callVariable", "Custom.account"),
+                ("contactField", "balance"),
+            },
+        )
+        self.assertEqual(
+            self.graph.used_by("skill", "sales"),
+            {("ivrScript", "main_ivr"), ("userProfile", "agents")},
+        )
+        self.assertEqual(
+            self.graph.used_by("disposition", "Sale"),
+            {("campaign", "outbound"), ("callVariable", "Custom.account")},
+        )
+        self.assertEqual(self.graph.used_by("skill", "unused"), set())
+
+    def test_transitive_campaign_references(self):
+        self.assertEqual(
+            self.graph.used_by("contactField", "state", dependent_type="campaign", transitive=True),
+            {("campaign", "outbound")},
+        )
+        self.assertEqual(
+            self.graph.used_by("contactField", "balance", dependent_type="campaign", transitive=True),
+            {("campaign", "inbound")},
+        )
+        self.assertEqual(
+            self.graph.used_by("callVariableGroup", "Custom", transitive=True),
+            {("callVariable", "Custom.account"), ("ivrScript", "main_ivr"), ("campaign", "inbound")},
+        )
@@ -0,0 +1,57 @@
+# unittests for the domain_object_store module
+
+import datetime
+import os
+import unittest
+
+from five9.utils.domain_object_store import DomainObjectStore, SpilledSection
+
+
+class TestDomainObjectStore(unittest.TestCase):
+    def setUp(self):
+        self.store = DomainObjectStore(cache_size=4)
+        self.ivrs = {
+            f"ivr_{i}": {"name": f"ivr_{i}", "xmlDefinition": "<ivrScript/>" * i}
+            for i in range(20)
+        }
+        self.store["getSkills"] = [{"name": "sales", "id": 1}]
+        self.store["getIVRScripts_ivrs"] = self.ivrs
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_dict_style_access(self):
+        self.assertEqual(list(self.store.keys()), ["getSkills", "getIVRScripts_ivrs"])
+        self.assertEqual(self.store["getSkills"], [{"name": "sales", "id": 1}])
+        self.assertIsInstance(self.store["getIVRScripts_ivrs"], SpilledSection)
+        self.assertEqual(dict(self.store["getIVRScripts_ivrs"]), self.ivrs)
+        self.assertNotIn("ivr_99", self.store["getIVRScripts_ivrs"])
+
+        campaign = {"name": "outbound", "lastModified": datetime.datetime(2024, 1, 2)}
+        self.store["getCampaigns_campaigns_outbound"] = {}
+        self.store["getCampaigns_campaigns_outbound"]["outbound"] = campaign
+        self.assertEqual(
+            self.store["getCampaigns_campaigns_outbound"]["outbound"], campaign
+        )
+
+        del self.store["getIVRScripts_ivrs"]["ivr_3"]
+        self.assertEqual(len(self.store["getIVRScripts_ivrs"]), 19)
+        del self.store["getSkills"]
+        self.assertNotIn("getSkills", self.store)
+
+    def test_cache_is_bounded(self):
+        ivrs = self.store["getIVRScripts_ivrs"]
+        for name in ivrs:
+            self.assertEqual(ivrs[name], self.ivrs[name])
+            self.assertLessEqual(len(self.store._cache), 4)
+
+        # the most recently read objects are kept in memory
+        self.assertIn(("getIVRScripts_ivrs", "ivr_19"), self.store._cache)
+        self.assertNotIn(("getIVRScripts_ivrs", "ivr_0"), self.store._cache)
+
+    def test_temporary_file_removed_on_close(self):
+        store = DomainObjectStore()
+        store["getSkills"] = []
+        self.assertTrue(os.path.exists(store.path))
+        store.close()
+        self.assertFalse(os.path.exists(store.path))
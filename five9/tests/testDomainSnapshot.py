@@ -0,0 +1,103 @@
+# unittests for loading a Five9DomainConfig from an existing snapshot
+
+import json
+import os
+import tempfile
+import unittest
+
+from five9.utils.domain_capture import Five9DomainConfig, SnapshotFolderSection
+from five9.utils.snapshot_archive import write_snapshot_archive
+
+
+class TestDomainSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.domain_path = os.path.join(self.temp_dir.name, "testdomain")
+
+        self.profiles = [{"name": "profile_1", "description": None}]
+        self.profile_filters = {
+            "profile_1": {
+                "crmCriteria": [
+                    {
+                        "compareOperator": "Equals",
+                        "leftValue": "state",
+                        "rightValue": "CA",
+                    },
+                    {
+                        "compareOperator": "Greater",
+                        "leftValue": "balance",
+                        "rightValue": "100",
+                    },
+                ],
+                "grouping": {"expression": "1 AND 2", "type": "Custom"},
+                "orderByFields": [],
+            },
+            "group/profile_2": {
+                "crmCriteria": [],
+                "grouping": {"expression": None, "type": "All"},
+                "orderByFields": [],
+            },
+        }
+
+        os.makedirs(os.path.join(self.domain_path, "campaign_profile_filters", "group"))
+        with open(os.path.join(self.domain_path, "getCampaignProfiles.json"), "w") as f:
+            json.dump(self.profiles, f)
+        for name, profile_filter in self.profile_filters.items():
+            path = os.path.join(
+                self.domain_path, "campaign_profile_filters", f"{name}.json"
+            )
+            with open(path, "w") as f:
+                json.dump(profile_filter, f)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_from_snapshot_folder(self):
+        domain = Five9DomainConfig.from_snapshot(self.domain_path)
+
+        self.assertIsNone(domain.client)
+        self.assertEqual(domain.domain_objects["getCampaignProfiles"], self.profiles)
+
+        profile_filters = domain.domain_objects[
+            "getCampaignProfiles_campaign_profile_filters"
+        ]
+        self.assertIsInstance(profile_filters, SnapshotFolderSection)
+        self.assertEqual(sorted(profile_filters.keys()), sorted(self.profile_filters))
+        self.assertEqual(profile_filters._loaded, {})
+        self.assertEqual(
+            profile_filters["group/profile_2"], self.profile_filters["group/profile_2"]
+        )
+
+        domain.demystify_campaign_profile_filters()
+        self.assertTrue(
+            os.path.exists(
+                os.path.join(
+                    self.domain_path,
+                    "campaign_profile_filters_demystified",
+                    "profile_1.sql",
+                )
+            )
+        )
+
+        # unchanged demystified files are not written again
+        reloaded = Five9DomainConfig.from_snapshot(self.domain_path)
+        reloaded.demystify_campaign_profile_filters()
+        self.assertEqual(reloaded.changed_paths, set())
+
+    def test_from_snapshot_archive(self):
+        archive_path = write_snapshot_archive(
+            {
+                "getCampaignProfiles": self.profiles,
+                "getCampaignProfiles_campaign_profile_filters": self.profile_filters,
+            },
+            f"{self.domain_path}.f9snap",
+        )
+
+        domain = Five9DomainConfig.from_snapshot(archive_path, use_mmap=True)
+
+        self.assertEqual(domain.domain_path, self.domain_path)
+        self.assertEqual(
+            dict(domain.domain_objects["getCampaignProfiles_campaign_profile_filters"]),
+            self.profile_filters,
+        )
+        domain.archive.close()
@@ -0,0 +1,134 @@
+# unittests for the domain_sync module
+
+import copy
+import threading
+import unittest
+
+from five9.utils.domain_sync import (
+    apply_sync,
+    description_selector,
+    plan_sync,
+)
+
+
+class RecordingService:
+    """Records the service calls made by apply_sync"""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __getattr__(self, method):
+        def call(**arguments):
+            with self._lock:
+                self.calls.append((method, arguments))
+
+        return call
+
+
+class TestDomainSync(unittest.TestCase):
+    def setUp(self):
+        self.target_objects = {
+            "getSkills": [{"name": "sales", "description": None, "id": 1, "routeVoiceMails": False}],
+            "getDispositions": [{"name": "Sale", "description": "Sold", "type": "FinalDisp"}],
+            "getCallVariableGroups": [{"name": "Custom", "description": None, "variables": []}],
+            "getCallVariables": [{"name": "account", "group": "Custom", "type": "STRING"}],
+            "getContactFields": [
+                {"name": "number1", "system": True, "type": "PHONE"},
+                {"name": "balance", "system": False, "type": "NUMBER"},
+            ],
+            "getCampaignProfiles": [{"name": "profile_1", "description": "--sync", "ANI": "5551234"}],
+            "getCampaignProfiles_campaign_profile_filters": {
+                "profile_1": {
+                    "crmCriteria": [{"compareOperator": "Greater", "leftValue": "balance", "rightValue": "100"}],
+                    "grouping": {"expression": None, "type": "All"},
+                    "orderByFields": [],
+                }
+            },
+        }
+        self.source_objects = copy.deepcopy(self.target_objects)
+        # skill ids are domain specific and are not compared
+        self.source_objects["getSkills"][0]["id"] = 99
+
+    def test_unchanged_domains_plan_no_calls(self):
+        self.assertEqual(plan_sync(self.source_objects, self.target_objects), [])
+
+    def test_plan_minimal_calls_in_dependency_order(self):
+        self.source_objects["getCallVariableGroups"].append({"name": "Billing", "description": None, "variables": []})
+        self.source_objects["getCallVariables"].append({"name": "invoice", "group": "Billing", "type": "STRING"})
+        self.source_objects["getDispositions"][0]["description"] = "Sold!"
+        self.source_objects["getContactFields"][0]["type"] = "STRING"
+        self.source_objects["getCampaignProfiles"].append({"name": "profile_2", "description": None, "ANI": None})
+        self.source_objects["getCampaignProfiles_campaign_profile_filters"]["profile_1"]["grouping"] = {
+            "expression": None,
+            "type": "Any",
+        }
+
+        stages = plan_sync(self.source_objects, self.target_objects)
+        planned = [[(op.object_type, op.name, op.action) for op in stage] for stage in stages]
+        self.assertEqual(
+            planned,
+            [
+                [("dispositions", "Sale", "modify"), ("callVariableGroups", "Billing", "create")],
+                [("callVariables", "Billing.invoice", "create"), ("campaignProfiles", "profile_2", "create")],
+                [("campaignProfileFilters", "profile_1", "replace")],
+            ],
+        )
+        # only the grouping of the profile filter changed
+        self.assertEqual(
+            stages[-1][0].calls,
+            [("modifyCampaignProfileCrmCriteria", {"profileName": "profile_1", "grouping": {"expression": None, "type": "Any"}})],
+        )
+
+        service = RecordingService()
+        report = apply_sync(stages, service, max_workers=2)
+        self.assertEqual(report["calls"], 5)
+        self.assertEqual(report["failed"], [])
+        self.assertEqual(service.calls[-1][0], "modifyCampaignProfileCrmCriteria")
+
+    def test_selected_profile_filter_replaced(self):
+        self.source_objects["getCampaignProfiles_campaign_profile_filters"]["profile_1"] = {
+            "crmCriteria": [{"compareOperator": "Equals", "leftValue": "state", "rightValue": "CA"}],
+            "grouping": {"expression": None, "type": "All"},
+            "orderByFields": [{"fieldName": "balance", "descending": True}],
+        }
+        stages = plan_sync(
+            self.source_objects,
+            self.target_objects,
+            object_types=["campaignProfiles"],
+            selector=description_selector("--sync"),
+        )
+        self.assertEqual(len(stages), 1)
+        self.assertEqual(
+            [method for method, arguments in stages[0][0].calls],
+            ["modifyCampaignProfileCrmCriteria", "modifyCampaignProfileCrmCriteria", "modifyCampaignProfileFilterOrder"],
+        )
+
+        self.assertEqual(
+            plan_sync(
+                self.source_objects,
+                self.target_objects,
+                object_types=["campaignProfiles"],
+                selector=description_selector("--not-tagged"),
+            ),
+            [],
+        )
+
+    def test_filter_skipped_when_profile_fails(self):
+        self.source_objects["getCampaignProfiles"].append({"name": "profile_2", "description": "--sync", "ANI": None})
+        self.source_objects["getCampaignProfiles_campaign_profile_filters"]["profile_2"] = {
+            "crmCriteria": [{"compareOperator": "Equals", "leftValue": "state", "rightValue": "CA"}],
+            "grouping": {"expression": None, "type": "All"},
+            "orderByFields": [],
+        }
+        stages = plan_sync(self.source_objects, self.target_objects, object_types=["campaignProfiles"])
+
+        class FailingService(RecordingService):
+            def createCampaignProfile(self, **arguments):
+                raise RuntimeError("Invalid ANI")
+
+        service = FailingService()
+        report = apply_sync(stages, service)
+        self.assertEqual([operation.name for operation, error in report["failed"]], ["profile_2"])
+        self.assertEqual([(op.object_type, op.name) for op in report["skipped"]], [("campaignProfileFilters", "profile_2")])
+        self.assertEqual(service.calls, [])
@@ -0,0 +1,65 @@
+# unittests for the ivr_index module
+
+import os
+import tempfile
+import unittest
+
+from five9.tests.testIvrUtils import ivr_xml
+from five9.utils.ivr_index import IvrReferenceIndex
+
+
+class TestIvrIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "ivr_index.sqlite")
+        self.ivrs = [
+            {"name": "main", "xmlDefinition": ivr_xml("sales", "Contact.balance")},
+            {"name": "billing", "xmlDefinition": ivr_xml("billing", "Contact.balance")},
+            {"name": "support", "xmlDefinition": ivr_xml("sales", "Contact.ticket")},
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_update_and_lookup(self):
+        with IvrReferenceIndex(self.path) as index:
+            result = index.update(self.ivrs)
+            self.assertEqual(result["added"], ["main", "billing", "support"])
+
+            self.assertEqual(index.lookup("skills", "sales"), {"main": ["Transfer"], "support": ["Transfer"]})
+            self.assertEqual(index.lookup("variables", "Contact.balance"), {"billing": ["Welcome"], "main": ["Welcome"]})
+            self.assertEqual(index.lookup("modules", "play")["main"], ["Goodbye", "Welcome"])
+            self.assertEqual(index.lookup("functions", "add"), {"billing": [], "main": [], "support": []})
+            self.assertEqual(index.names("variables", "Contact.*"), {"Contact.balance": 2, "Contact.ticket": 1})
+            with self.assertRaises(ValueError):
+                index.lookup("campaigns", "sales")
+
+        # only the changed script is parsed again, the missing one is removed
+        self.ivrs[0]["xmlDefinition"] = ivr_xml("retention", "Contact.balance")
+        del self.ivrs[2]
+        with IvrReferenceIndex(self.path) as index:
+            result = index.update(self.ivrs)
+            self.assertEqual(
+                (result["added"], result["changed"], result["removed"], result["unchanged"]),
+                ([], ["main"], ["support"], 1),
+            )
+            self.assertEqual(index.lookup("skills", "sales"), {})
+            self.assertEqual(index.lookup("skills", "retention"), {"main": ["Transfer"]})
+            self.assertEqual(list(index.scripts()), ["billing", "main"])
+
+            self.assertEqual(index.update(self.ivrs)["unchanged"], 2)
+
+            # an invalid script is reported and stored without references
+            self.ivrs.append({"name": "broken", "xmlDefinition": "<ivrScript><modules>"})
+            with self.assertLogs(level="WARNING"):
+                result = index.update(self.ivrs)
+            self.assertEqual((result["added"], result["invalid"]), (["broken"], ["broken"]))
+
+        # analyzed one script at a time, the index is the same
+        with IvrReferenceIndex(os.path.join(self.temp_dir.name, "batched.sqlite")) as batched:
+            with self.assertLogs(level="WARNING"):
+                result = batched.update(self.ivrs, batch_bytes=1)
+            self.assertEqual((result["added"], result["invalid"]), (["main", "billing", "broken"], ["broken"]))
+            with IvrReferenceIndex(self.path) as index:
+                for kind, object_name in [("variables", "Contact.balance"), ("skills", "retention"), ("modules", "play")]:
+                    self.assertEqual(batched.lookup(kind, object_name), index.lookup(kind, object_name))
@@ -0,0 +1,183 @@
+# unittests for the ivr_utils module
+
+import base64
+import concurrent.futures
+import re
+import tempfile
+import threading
+import unittest
+import zlib
+from unittest import mock
+
+import jsbeautifier
+
+from five9.five9_session import ThrottledServiceProxy
+from five9.utils.ivr_utils import (
+    FunctionCache,
+    analyze_ivr_xml,
+    analyze_ivrs,
+    build_ivr_indexes,
+    chunk_by_size,
+    extract_jsfunctions_from_ivr,
+    iter_ivr_scripts,
+    ivr_variable_usage,
+)
+
+
+def ivr_xml(skill, variable):
+    function_body = base64.b64encode(zlib.compress(b"return a + 1;")).decode()
+    return (
+        "<ivrScript><modules>"
+        "<incomingCall><moduleName>Start</moduleName><data/></incomingCall>"
+        "<skillTransfer><moduleName>Transfer</moduleName><data>"
+        f"<listOfSkillsEx><extrnalObj><id>1</id><name>{skill}</name></extrnalObj>"
+        "<varSelected>true</varSelected><variableName>Custom.skill</variableName></listOfSkillsEx>"
+        "</data></skillTransfer>"
+        "<play><moduleName>Welcome</moduleName><data><prompt><name>welcome_prompt</name></prompt>"
+        f"<variableName>{variable}</variableName><variableName>localVariable</variableName></data></play>"
+        "<play><moduleName>Goodbye</moduleName><data><variableName>Call.ANI</variableName></data></play>"
+        "</modules>"
+        "<userVariables><entry><key>x</key><value><name>x</name></value></entry></userVariables>"
+        "<functions><entry><key>add</key><value><name>add</name>"
+        "<arguments><arguments><name>a</name></arguments></arguments>"
+        f"<functionBody>{function_body}</functionBody></value></entry></functions>"
+        "</ivrScript>"
+    )
+
+
+class FakeIvrService:
+    # getIVRScripts of a domain, matching the whole name like the domain API
+    def __init__(self, names):
+        self.ivrs = [{"name": name, "xmlDefinition": ivr_xml("sales", "Contact.balance")} for name in names]
+        self.patterns = []
+        self.lock = threading.Lock()
+
+    def getIVRScripts(self, namePattern=None):
+        with self.lock:
+            self.patterns.append(namePattern)
+        return [ivr for ivr in self.ivrs if re.fullmatch(namePattern, ivr["name"])]
+
+
+class TestIvrUtils(unittest.TestCase):
+    def test_analyze_ivr_xml(self):
+        analysis = analyze_ivr_xml(ivr_xml("sales", "Contact.balance"), "main")
+
+        self.assertEqual(analysis["name"], "main")
+        self.assertEqual(analysis["variables"], ["Custom.skill", "Contact.balance", "Call.ANI"])
+        self.assertEqual(
+            analysis["skill_transfers"],
+            [
+                {
+                    "moduleName": "Transfer",
+                    "skills": [
+                        {"name": "sales", "type": "skill"},
+                        {"name": "Custom.skill", "type": "variable"},
+                    ],
+                }
+            ],
+        )
+        self.assertEqual(analysis["prompts"], ["welcome_prompt"])
+        self.assertEqual(analysis["module_counts"], {"incomingCall": 1, "skillTransfer": 1, "play": 2})
+        function_key = analysis["functions"][0]["key"]
+        self.assertTrue(function_key.endswith(":add(a)"))
+        self.assertEqual(
+            analysis["functions"],
+            [{"name": "add", "arguments": ["a"], "js": "function add(a) {\nreturn a + 1;\n}\n", "key": function_key}],
+        )
+        self.assertEqual(extract_jsfunctions_from_ivr(ivr_xml("sales", "Contact.balance")), analysis["functions"])
+
+    def test_indexes(self):
+        ivrs = [
+            {"name": "main", "xmlDefinition": ivr_xml("sales", "Contact.balance")},
+            {"name": "billing", "xmlDefinition": ivr_xml("billing", "Contact.balance")},
+            {"name": "EXAMPLE script", "xmlDefinition": ivr_xml("sales", "Contact.example")},
+        ]
+
+        self.assertEqual(
+            ivr_variable_usage(ivrs),
+            {
+                "Call.ANI": ["main", "billing"],
+                "Contact.balance": ["main", "billing"],
+                "Custom.skill": ["main", "billing"],
+            },
+        )
+
+        indexes = build_ivr_indexes({ivr["name"]: analyze_ivr_xml(ivr["xmlDefinition"], ivr["name"]) for ivr in ivrs})
+        self.assertEqual(list(indexes["skills"]), ["billing", "sales"])
+        self.assertEqual(indexes["skills"]["sales"], ["main", "EXAMPLE script"])
+        self.assertEqual(indexes["functions"], {"add": ["main", "billing", "EXAMPLE script"]})
+        self.assertEqual(indexes["module_counts"]["play"], 6)
+
+    def test_analyze_ivrs_executor(self):
+        self.assertEqual(
+            chunk_by_size([("a", "x" * 5), ("b", "x" * 20), ("c", "x" * 5), ("d", "x" * 5)], 10),
+            [[("a", "x" * 5), ("b", "x" * 20)], [("c", "x" * 5), ("d", "x" * 5)]],
+        )
+
+        ivrs = [
+            {"name": f"ivr_{i}", "xmlDefinition": ivr_xml(f"skill_{i}", f"Contact.field_{i}")}
+            for i in range(12)
+        ]
+        ivrs.insert(5, {"name": "invalid", "xmlDefinition": "<ivrScript><modules>"})
+        with self.assertLogs(level="WARNING"):
+            serial, serial_failed = analyze_ivrs(ivrs, beautify_options={"indent_size": 4})
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+            parallel, parallel_failed = analyze_ivrs(
+                ivrs, beautify_options={"indent_size": 4}, executor=executor, chunk_bytes=2000
+            )
+
+        self.assertEqual(list(parallel), [f"ivr_{i}" for i in range(12)])
+        self.assertEqual(parallel, serial)
+        self.assertEqual(list(parallel_failed), ["invalid"])
+        self.assertEqual(parallel_failed, serial_failed)
+        self.assertEqual(parallel["ivr_0"]["functions"][0]["js"], "function add(a) {\n    return a + 1;\n}")
+
+    def test_function_cache(self):
+        ivrs = {f"ivr_{i}": ivr_xml(f"skill_{i}", f"Contact.field_{i}") for i in range(5)}
+
+        function_cache = FunctionCache()
+        functions = [extract_jsfunctions_from_ivr(xml, function_cache) for xml in ivrs.values()]
+        # the shared function is decompressed once
+        self.assertEqual((function_cache.misses, function_cache.hits), (1, 4))
+        self.assertEqual(functions, [extract_jsfunctions_from_ivr(xml) for xml in ivrs.values()])
+        # copies of the shared function have the same key
+        self.assertEqual(len({function[0]["key"] for function in functions}), 1)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            first_run = FunctionCache(cache_dir)
+            extract_jsfunctions_from_ivr(ivrs["ivr_0"], first_run)
+            self.assertEqual(first_run.misses, 1)
+
+            # a later run reads the cache folder
+            second_run = FunctionCache(cache_dir)
+            self.assertEqual(extract_jsfunctions_from_ivr(ivrs["ivr_1"], second_run), functions[1])
+            self.assertEqual((second_run.misses, second_run.hits), (0, 1))
+
+            # formatted functions are cached by jsbeautifier version
+            xml = ivrs["ivr_0"]
+            formatted = analyze_ivr_xml(xml, beautify_options={"indent_size": 4}, function_cache=FunctionCache(cache_dir))
+            with mock.patch.object(jsbeautifier, "__version__", "0.0.0"):
+                other_version = FunctionCache(cache_dir)
+                analyze_ivr_xml(xml, beautify_options={"indent_size": 4}, function_cache=other_version)
+            self.assertEqual((other_version.misses, other_version.hits), (1, 1))
+            self.assertEqual(formatted["functions"][0]["key"], functions[0][0]["key"])
+
+            ivr_list = [{"name": name, "xmlDefinition": xml} for name, xml in ivrs.items()]
+            self.assertEqual(
+                analyze_ivrs(ivr_list, beautify_options={"indent_size": 4}, cache_dir=cache_dir),
+                analyze_ivrs(ivr_list, beautify_options={"indent_size": 4}),
+            )
+
+    def test_iter_ivr_scripts(self):
+        names = ["main", "Billing (v2)", "1-800 line", "_test", "billing", "main.backup"]
+        service = FakeIvrService(names)
+
+        fetched = [ivr["name"] for ivr in iter_ivr_scripts(service, names=names[1:], batch_size=2, max_workers=2)]
+        self.assertEqual(fetched, names[1:])
+        self.assertEqual(len(service.patterns), 3)
+
+        # without names, one request per first character
+        throttled = ThrottledServiceProxy(service, delay_seconds=0.001)
+        fetched = list(iter_ivr_scripts(throttled, max_workers=4))
+        self.assertEqual(sorted(ivr["name"] for ivr in fetched), sorted(names))
@@ -0,0 +1,61 @@
+# unittests for the multi_domain_capture module
+
+import multiprocessing
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from five9.utils import multi_domain_capture
+from five9.utils.multi_domain_capture import capture_domains, parse_account_spec
+
+
+class StubDomainConfig:
+    # stands in for Five9DomainConfig in the worker processes
+    def __init__(self, account, api_hostname_alias, methods, spill_to_disk, api_sleep_interval):
+        if account == "broken":
+            raise RuntimeError("Invalid credentials")
+        self.account = account
+        self.vccConfig = types.SimpleNamespace(domainName=f"{account} domain")
+        self.failures = []
+        self.timings = {}
+
+    def get_domain_objects(self, full_git_status=False, write_archive=False):
+        print(f"capturing {self.account} in process {os.getpid()}")
+        if self.account == "partial":
+            self.failures.append(("getSkills", "Fault"))
+        self.timings["capture"] = 0.01
+
+    def close(self):
+        pass
+
+
+@unittest.skipUnless(multiprocessing.get_start_method() == "fork", "the stub is inherited by forked workers")
+class TestMultiDomainCapture(unittest.TestCase):
+    def test_parse_account_spec(self):
+        self.assertEqual(parse_account_spec("acme:eu"), ("acme", "eu"))
+        self.assertEqual(parse_account_spec("acme", "ca"), ("acme", "ca"))
+
+    def test_capture_domains(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            with mock.patch.object(multi_domain_capture, "Five9DomainConfig", StubDomainConfig):
+                capture_report = capture_domains(
+                    ["acme", "partial:eu", "broken"], max_workers=3, log_dir=log_dir
+                )
+
+            reports = capture_report["reports"]
+            self.assertEqual([report["account"] for report in reports], ["acme", "partial", "broken"])
+            self.assertEqual([report["status"] for report in reports], ["ok", "partial", "failed"])
+            self.assertEqual(reports[0]["domain"], "acme domain")
+            self.assertEqual(reports[1]["hostalias"], "eu")
+            self.assertEqual(reports[1]["failed_methods"], [{"method": "getSkills", "error": "Fault"}])
+            self.assertEqual(reports[2]["error"], "RuntimeError: Invalid credentials")
+
+            # the output of each capture goes to its own log, from a worker process
+            with open(reports[0]["log"]) as log_file:
+                log = log_file.read()
+            self.assertIn("capturing acme in process", log)
+            self.assertNotIn(f"process {os.getpid()}\n", log)
+            with open(reports[2]["log"]) as log_file:
+                self.assertIn("RuntimeError: Invalid credentials", log_file.read())
@@ -0,0 +1,93 @@
+# unittests for the prefix_partition module
+
+import os
+import random
+import re
+import tempfile
+import unittest
+
+import requests
+import zeep
+
+from five9.utils.prefix_partition import PartitionCheckpoint, is_oversized_response, partition_by_prefix
+
+
+def children(prefix):
+    if prefix.endswith(")"):
+        return []
+    return [prefix + re.escape(character) for character in "abc._"] + [f"{prefix}(?![abc._])"]
+
+
+class TestPrefixPartition(unittest.TestCase):
+    def setUp(self):
+        generator = random.Random(45)
+        # crowded "a" and "ab" prefixes, nothing starts with "c"
+        self.names = sorted(
+            {
+                generator.choice(["a", "ab", "b"]) + "".join(generator.choice("abc._") for _ in range(4))
+                for _ in range(400)
+            }
+            | {"_admin", "a", "a.b"}
+        )
+        self.fetched = []
+
+    def fetch(self, prefix):
+        self.fetched.append(prefix)
+        names = [name for name in self.names if re.fullmatch(f"{prefix}.*", name)]
+        if len(names) > 40:
+            raise TimeoutError("response too large")
+        return names
+
+    def test_partition_by_prefix(self):
+        checkpoint = PartitionCheckpoint()
+        results = dict(partition_by_prefix(self.fetch, children, max_workers=3, checkpoint=checkpoint))
+
+        names = [name for items in results.values() for name in items]
+        self.assertEqual(sorted(names), self.names)
+        self.assertTrue(all(len(items) <= 40 for items in results.values()))
+        self.assertIn("a", checkpoint.split)
+        # the empty prefix is not split
+        self.assertEqual(results["c"], [])
+        self.assertNotIn("ca", self.fetched)
+        self.assertEqual(checkpoint.failed, {})
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "checkpoint.json")
+            processed = {}
+            for count, (prefix, items) in enumerate(
+                partition_by_prefix(self.fetch, children, checkpoint=PartitionCheckpoint(path))
+            ):
+                processed[prefix] = items
+                if count == 4:
+                    # interrupted before the last prefix was marked completed
+                    break
+
+            checkpoint = PartitionCheckpoint(path)
+            self.assertEqual(len(checkpoint.completed), 4)
+            completed = set(checkpoint.completed)
+            self.fetched = []
+            for prefix, items in partition_by_prefix(self.fetch, children, checkpoint=checkpoint):
+                processed[prefix] = items
+            self.assertTrue(completed.isdisjoint(self.fetched))
+            self.assertEqual(sorted(name for items in processed.values() for name in items), self.names)
+
+    def test_split_on_gateway_timeout(self):
+        def fetch(prefix):
+            if prefix in ("a", "b"):
+                raise zeep.exceptions.TransportError("Gateway Timeout", status_code=504)
+            return self.fetch(prefix)
+
+        self.assertTrue(is_oversized_response(requests.exceptions.ReadTimeout()))
+        self.assertFalse(is_oversized_response(zeep.exceptions.TransportError(status_code=503)))
+
+        checkpoint = PartitionCheckpoint()
+        results = dict(partition_by_prefix(fetch, children, checkpoint=checkpoint))
+        self.assertEqual(sorted(name for items in results.values() for name in items), self.names)
+        self.assertIn("b", checkpoint.split)
+
+        # exception types are still accepted, the other errors fail the prefix
+        checkpoint = PartitionCheckpoint()
+        results = dict(partition_by_prefix(fetch, children, checkpoint=checkpoint, split_on=(TimeoutError,)))
+        self.assertEqual(sorted(checkpoint.failed), ["a", "b"])
+        self.assertNotIn("b", checkpoint.split)
@@ -0,0 +1,140 @@
+# unittests for the skill_sync module
+
+import threading
+import unittest
+
+import zeep
+
+from five9.utils.skill_sync import plan_skill_sync, run_skill_sync, user_skill_index
+
+
+def skill_info(name, skill_id, users):
+    return {
+        "skill": {"id": skill_id, "name": name},
+        "users": [{"id": skill_id, "level": level, "skillName": name, "userName": user} for user, level in users],
+    }
+
+
+class FakeSkillService:
+    # records the skill requests, failing the first userSkillModify with a rate limit fault
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.rate_limited = True
+
+    def _record(self, operation, **kwargs):
+        with self.lock:
+            self.calls.append((operation, kwargs))
+
+    def userSkillAdd(self, userSkill):
+        self._record("userSkillAdd", **userSkill)
+
+    def userSkillRemove(self, userSkill):
+        self._record("userSkillRemove", **userSkill)
+
+    def userSkillModify(self, userSkill):
+        with self.lock:
+            if self.rate_limited:
+                self.rate_limited = False
+                raise zeep.exceptions.Fault("Limit of requests per 1 minute(s) exceeded")
+        self._record("userSkillModify", **userSkill)
+
+    def modifyUserProfileSkills(self, **kwargs):
+        self._record("modifyUserProfileSkills", **kwargs)
+
+
+class FailingProfileService(FakeSkillService):
+    # rejects the user profile changes
+    def modifyUserProfileSkills(self, **kwargs):
+        raise zeep.exceptions.Fault("User profile is locked")
+
+
+class TestSkillSync(unittest.TestCase):
+    def setUp(self):
+        self.skills_info = [
+            skill_info("sales", 1, [("alice", 1), ("bob", 2)]),
+            skill_info("legacy", 2, [("alice", 1), ("carol", 1)]),
+        ]
+        self.profiles = [
+            {"name": "agents", "skills": ["legacy"], "users": ["dave", "erin"]},
+            {"name": "mixed", "skills": [], "users": ["carol", "frank"]},
+        ]
+
+    def test_user_skill_index(self):
+        index = user_skill_index(skills_info=self.skills_info)
+        self.assertEqual(index, {"alice": {"sales": 1, "legacy": 1}, "bob": {"sales": 2}, "carol": {"legacy": 1}})
+
+        users_info = [
+            {"generalInfo": {"userName": "bob"}, "skills": [{"skillName": "sales", "level": 2}]},
+            {"generalInfo": {"userName": "zoe"}, "skills": None},
+        ]
+        self.assertEqual(user_skill_index(users_info=users_info), {"bob": {"sales": 2}, "zoe": {}})
+
+    def test_plan_skill_sync(self):
+        plan = plan_skill_sync(
+            user_skill_index(skills_info=self.skills_info),
+            ["alice", "bob", "carol", "dave", "erin"],
+            ["sales"],
+            ["legacy"],
+            profiles=self.profiles,
+        )
+        # the agents profile has all its users updated, mixed does not
+        self.assertEqual(plan["profiles"], {"agents": {"add": ["sales"], "remove": ["legacy"]}})
+        # without explicit levels the level 2 of bob is kept
+        self.assertEqual(
+            plan["users"],
+            {
+                "alice": [("userSkillRemove", "legacy", 1)],
+                "carol": [("userSkillRemove", "legacy", 1), ("userSkillAdd", "sales", 1)],
+            },
+        )
+        self.assertEqual(plan["unchanged"], ["bob", "dave", "erin"])
+        self.assertEqual(
+            plan["fallback"],
+            {"agents": {"dave": [("userSkillAdd", "sales", 1)], "erin": [("userSkillAdd", "sales", 1)]}},
+        )
+
+    def test_plan_explicit_levels(self):
+        plan = plan_skill_sync(user_skill_index(skills_info=self.skills_info), ["alice", "bob"], {"sales": 2})
+        self.assertEqual(plan["users"], {"alice": [("userSkillModify", "sales", 2)]})
+        self.assertEqual(plan["unchanged"], ["bob"])
+
+    def test_run_skill_sync(self):
+        plan = plan_skill_sync(
+            user_skill_index(skills_info=self.skills_info),
+            ["alice", "bob", "carol", "dave", "erin"],
+            {"sales": 3},
+            ["legacy"],
+            profiles=self.profiles,
+        )
+        service = FakeSkillService()
+        results = run_skill_sync(service, plan, {"sales": 1, "legacy": 2}, max_workers=3, backoff_seconds=0)
+
+        self.assertEqual(results["profiles"]["failed"], {})
+        self.assertEqual(results["users"]["failed"], {})
+        self.assertEqual(service.calls[0][0], "modifyUserProfileSkills")
+        # one request per change, the rate limited request is sent again
+        self.assertEqual(len(service.calls), 1 + sum(len(operations) for operations in plan["users"].values()))
+        self.assertIn(
+            ("userSkillModify", {"id": 1, "level": 3, "skillName": "sales", "userName": "dave"}), service.calls
+        )
+
+    def test_failed_profile_falls_back_to_users(self):
+        plan = plan_skill_sync(
+            user_skill_index(skills_info=self.skills_info),
+            ["alice", "bob", "carol", "dave", "erin"],
+            ["sales"],
+            ["legacy"],
+            profiles=self.profiles,
+        )
+        service = FailingProfileService()
+        results = run_skill_sync(service, plan, {"sales": 1, "legacy": 2}, max_workers=3, backoff_seconds=0)
+
+        self.assertEqual(list(results["profiles"]["failed"]), ["profile:agents"])
+        self.assertEqual(results["users"]["failed"], {})
+        # the users of the failed profile still get the skill
+        self.assertEqual(sorted(results["users"]["updated"]), ["alice", "carol", "dave", "erin"])
+        for user_name in ["dave", "erin"]:
+            self.assertIn(
+                ("userSkillAdd", {"id": 1, "level": 1, "skillName": "sales", "userName": user_name}), service.calls
+            )
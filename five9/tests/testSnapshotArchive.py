@@ -0,0 +1,77 @@
+# unittests for the snapshot_archive module
+
+import datetime
+import os
+import tempfile
+import unittest
+
+from five9.utils.snapshot_archive import (
+    ArchiveSection,
+    SnapshotArchive,
+    SnapshotArchiveError,
+    write_snapshot_archive,
+)
+
+
+class TestSnapshotArchive(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.archive_path = os.path.join(self.temp_dir.name, "testdomain.f9snap")
+        self.domain_objects = {
+            "getSkills": [
+                {"name": "sales", "description": None, "id": 1},
+                {"name": "support", "description": "Support", "id": 2},
+            ],
+            "getIVRScripts_ivrs": {
+                f"ivr_{i}": {"name": f"ivr_{i}", "xmlDefinition": "<ivrScript/>" * i}
+                for i in range(50)
+            },
+            "getCampaigns_campaigns_outbound": {
+                "outbound": {
+                    "name": "outbound",
+                    "lastModified": datetime.datetime(2024, 1, 2, 3, 4, 5),
+                }
+            },
+        }
+        write_snapshot_archive(self.domain_objects, self.archive_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_archive_round_trip(self):
+        for use_mmap in [False, True]:
+            with SnapshotArchive(self.archive_path, use_mmap=use_mmap) as archive:
+                self.assertEqual(
+                    sorted(archive.keys()), sorted(self.domain_objects.keys())
+                )
+                self.assertEqual(archive["getSkills"], self.domain_objects["getSkills"])
+                self.assertEqual(
+                    dict(archive["getIVRScripts_ivrs"]),
+                    self.domain_objects["getIVRScripts_ivrs"],
+                )
+                self.assertEqual(
+                    archive["getCampaigns_campaigns_outbound"]["outbound"][
+                        "lastModified"
+                    ],
+                    "2024-01-02T03:04:05",
+                )
+
+    def test_archive_objects_load_lazily(self):
+        with SnapshotArchive(self.archive_path) as archive:
+            ivrs = archive["getIVRScripts_ivrs"]
+            self.assertIsInstance(ivrs, ArchiveSection)
+            self.assertEqual(len(ivrs), 50)
+            self.assertEqual(ivrs._loaded, {})
+
+            self.assertEqual(ivrs["ivr_7"]["xmlDefinition"], "<ivrScript/>" * 7)
+            self.assertEqual(list(ivrs._loaded.keys()), ["ivr_7"])
+
+            self.assertEqual(archive.load("getIVRScripts_ivrs", "ivr_3")["name"], "ivr_3")
+
+    def test_invalid_archive(self):
+        invalid_path = os.path.join(self.temp_dir.name, "invalid.f9snap")
+        with open(invalid_path, "wb") as f:
+            f.write(b"not an archive")
+
+        with self.assertRaises(SnapshotArchiveError):
+            SnapshotArchive(invalid_path)
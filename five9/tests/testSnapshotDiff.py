@@ -0,0 +1,120 @@
+# unittests for the snapshot_diff module
+
+import copy
+import os
+import tempfile
+import unittest
+
+from five9.utils.domain_capture import Five9DomainConfig, SnapshotFolder
+from five9.utils.snapshot_archive import SnapshotArchive, write_snapshot_archive
+from five9.utils.snapshot_diff import diff_domain_objects, diff_fields
+from five9.utils.snapshot_serializer import snapshot_dumps
+
+
+class TestSnapshotDiff(unittest.TestCase):
+    def setUp(self):
+        self.old_objects = {
+            "getSkills": [
+                {"name": "sales", "description": None, "id": 1},
+                {"name": "support", "description": "Support", "id": 2},
+            ],
+            "getIVRScripts_ivrs": {
+                f"ivr_{i}": {"name": f"ivr_{i}", "xmlDefinition": "<ivrScript/>" * i}
+                for i in range(100)
+            },
+            "getCampaigns_campaigns_outbound": {
+                "outbound": {
+                    "name": "outbound",
+                    "callWrapup": {"dispostionName": "No Disposition", "enabled": True},
+                    "lists": [
+                        {"listName": "list_1", "priority": 1},
+                        {"listName": "list_2", "priority": 2},
+                    ],
+                }
+            },
+        }
+        self.new_objects = copy.deepcopy(self.old_objects)
+        self.new_objects["getSkills"].append({"name": "billing", "description": None, "id": 3})
+        del self.new_objects["getIVRScripts_ivrs"]["ivr_5"]
+        outbound = self.new_objects["getCampaigns_campaigns_outbound"]["outbound"]
+        outbound["callWrapup"]["dispostionName"] = "Sale"
+        outbound["lists"].pop()
+
+    def assert_changeset(self, changeset):
+        self.assertEqual(changeset["added"], {"getSkills": ["billing"]})
+        self.assertEqual(changeset["removed"], {"getIVRScripts_ivrs": ["ivr_5"]})
+        self.assertEqual(
+            changeset["modified"],
+            {
+                "getCampaigns_campaigns_outbound": {
+                    "outbound": [
+                        {
+                            "path": "callWrapup.dispostionName",
+                            "change": "modified",
+                            "old": "No Disposition",
+                            "new": "Sale",
+                        },
+                        {
+                            "path": "lists[1]",
+                            "change": "removed",
+                            "old": {"listName": "list_2", "priority": 2},
+                            "new": None,
+                        },
+                    ]
+                }
+            },
+        )
+        self.assertEqual(changeset["unchanged"], 2 + 99)
+
+    def test_diff_domain_objects(self):
+        self.assert_changeset(diff_domain_objects(self.old_objects, self.new_objects))
+
+    def test_diff_snapshot_archives_and_folders(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshots = {}
+            for label, domain_objects in [("old", self.old_objects), ("new", self.new_objects)]:
+                archive_path = os.path.join(temp_dir, f"{label}.f9snap")
+                write_snapshot_archive(domain_objects, archive_path)
+
+                folder_path = os.path.join(temp_dir, label)
+                os.makedirs(os.path.join(folder_path, "ivrs"))
+                os.makedirs(os.path.join(folder_path, "campaigns_outbound"))
+                with open(os.path.join(folder_path, "getSkills.json"), "w") as f:
+                    f.write(snapshot_dumps(domain_objects["getSkills"]))
+                for name, ivr in domain_objects["getIVRScripts_ivrs"].items():
+                    with open(os.path.join(folder_path, "ivrs", f"{name}.json"), "w") as f:
+                        f.write(snapshot_dumps(ivr))
+                with open(os.path.join(folder_path, "campaigns_outbound", "outbound.json"), "w") as f:
+                    f.write(snapshot_dumps(domain_objects["getCampaigns_campaigns_outbound"]["outbound"]))
+                snapshots[label] = (archive_path, folder_path)
+
+            with SnapshotArchive(snapshots["old"][0]) as old_archive:
+                with SnapshotArchive(snapshots["new"][0]) as new_archive:
+                    self.assert_changeset(diff_domain_objects(old_archive, new_archive))
+                    # unchanged objects are skipped without decoding them
+                    self.assertEqual(old_archive["getIVRScripts_ivrs"]._loaded, {})
+
+            self.assert_changeset(
+                diff_domain_objects(SnapshotFolder(snapshots["old"][1]), SnapshotFolder(snapshots["new"][1]))
+            )
+
+            domain = Five9DomainConfig.from_snapshot(snapshots["new"][1])
+            self.assert_changeset(domain.diff_from(snapshots["old"][0]))
+
+    def test_diff_fields_named_lists(self):
+        old = {"skills": [{"name": "sales", "level": 1}, {"name": "support", "level": 2}]}
+        new = {"skills": [{"name": "support", "level": 3}, {"name": "sales", "level": 1}]}
+        self.assertEqual(
+            diff_fields(old, new),
+            [{"path": "skills[support].level", "change": "modified", "old": 2, "new": 3}],
+        )
+
+    def test_duplicate_names(self):
+        old = {"getPrompts": [{"name": "hold", "id": 1}, {"name": "hold", "id": 2}]}
+        new = {"getPrompts": [{"name": "greeting", "id": 3}, {"name": "hold", "id": 1}, {"name": "hold", "id": 2}]}
+        changeset = diff_domain_objects(old, new)
+        # the duplicates keep their index when another item is inserted before them
+        self.assertEqual(changeset["added"], {"getPrompts": ["greeting"]})
+        self.assertEqual(changeset["removed"], {})
+        self.assertEqual(changeset["modified"], {})
+        self.assertEqual(changeset["unchanged"], 2)
@@ -0,0 +1,73 @@
+# unittests for the snapshot_serializer module
+
+import datetime
+import decimal
+import json
+import unittest
+
+from five9.utils.snapshot_serializer import snapshot_dumps
+
+
+def fix_datetimes(obj):
+    """datetime conversion used before the snapshot serializer was introduced"""
+    if isinstance(obj, dict):
+        return {k: fix_datetimes(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [fix_datetimes(i) for i in obj]
+    elif isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    else:
+        return obj
+
+
+class TestSnapshotSerializer(unittest.TestCase):
+    def setUp(self):
+        self.domain_object = {
+            "name": "outbound_campaign",
+            "description": None,
+            "state": "RUNNING",
+            "trainingMode": False,
+            "autoRecord": True,
+            "callsAgentRatio": 1.5,
+            "maxDroppedCallsPercentage": float("inf"),
+            "dialingRatio": 250,
+            "lastModified": datetime.datetime(2024, 1, 2, 3, 4, 5, 600000),
+            "startDate": datetime.date(2024, 1, 2),
+            "unicode": "Café üñîçødé \U0001f600 \"quoted\"\n\t",
+            "emptyList": [],
+            "emptyDict": {},
+            "maxQueueTime": {"days": 0, "hours": 0, "minutes": 1, "seconds": 30},
+            "lists": [
+                {"listName": "list_b", "priority": 2, "ratio": None},
+                {"listName": "list_a", "priority": 1, "ratio": [1, [2, {}], []]},
+            ],
+        }
+
+    def test_matches_json_dumps(self):
+        expected = json.dumps(fix_datetimes(self.domain_object), sort_keys=True, indent=4)
+        self.assertEqual(snapshot_dumps(self.domain_object), expected)
+
+        for value in [[], {}, "text", 0, -1.25, None, True, [self.domain_object]]:
+            self.assertEqual(
+                snapshot_dumps(value),
+                json.dumps(fix_datetimes(value), sort_keys=True, indent=4),
+            )
+
+    def test_unsorted_and_other_indents(self):
+        for sort_keys in [True, False]:
+            for indent in [None, 0, 2, "\t"]:
+                self.assertEqual(
+                    snapshot_dumps(self.domain_object, sort_keys=sort_keys, indent=indent),
+                    json.dumps(
+                        fix_datetimes(self.domain_object),
+                        sort_keys=sort_keys,
+                        indent=indent,
+                    ),
+                )
+
+    def test_decimal_and_unserializable_values(self):
+        self.assertEqual(
+            snapshot_dumps({"rate": decimal.Decimal("1.10")}), '{\n    "rate": 1.10\n}'
+        )
+        with self.assertRaises(TypeError):
+            snapshot_dumps({"audio": b"RIFF"})
@@ -0,0 +1,137 @@
+# unittests for the tabular_output module
+
+import csv
+import datetime
+import os
+import tempfile
+import unittest
+
+from five9.utils import tabular_output
+from five9.utils.tabular_output import TableWriter, infer_column_type
+
+
+class TestTabularOutput(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.rows = [
+            ["alice@example.com", True, 3, "01234"],
+            ["bob@example.com", None, 12, "90210"],
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_infer_column_type(self):
+        self.assertEqual(infer_column_type([True, None, False]), "bool")
+        self.assertEqual(infer_column_type([1, 2.5, ""]), "float")
+        self.assertEqual(infer_column_type([None, ""]), "string")
+        self.assertEqual(infer_column_type(["12", "7"]), "string")
+        self.assertEqual(infer_column_type(["12", "7", ""], parse_strings=True), "int")
+        # leading zeros are kept as text
+        self.assertEqual(infer_column_type(["01234", "90210"], parse_strings=True), "string")
+        # boolean and timestamp text keeps its spelling
+        self.assertEqual(infer_column_type(["TRUE", "false"], parse_strings=True), "string")
+        self.assertEqual(infer_column_type(["2024-01-31 10:00:00"], parse_strings=True), "string")
+        self.assertEqual(infer_column_type([datetime.date(2024, 1, 31)]), "timestamp")
+
+    def test_csv(self):
+        path = os.path.join(self.temp_dir.name, "out", "users.csv")
+        columns = ["userName", "active", "skills", "zip"]
+        with TableWriter(path, columns, batch_rows=1) as writer:
+            writer.write_row(self.rows[0])
+            writer.write_row(dict(zip(columns, self.rows[1])))
+        with TableWriter(path, columns, append=True) as writer:
+            writer.write_rows([self.rows[0]])
+
+        with open(path, newline="") as csv_file:
+            written = list(csv.reader(csv_file))
+        self.assertEqual(written[0], columns)
+        self.assertEqual(written[1:], [
+            ["alice@example.com", "True", "3", "01234"],
+            ["bob@example.com", "", "12", "90210"],
+            ["alice@example.com", "True", "3", "01234"],
+        ])
+
+        with self.assertRaises(ValueError):
+            TableWriter(path, columns, output_format="xlsx")
+
+    @unittest.skipIf(tabular_output.pyarrow is not None, "pyarrow is installed")
+    def test_columnar_without_pyarrow(self):
+        with self.assertRaises(ImportError):
+            TableWriter(os.path.join(self.temp_dir.name, "users.parquet"), ["userName"])
+
+    @unittest.skipUnless(tabular_output.pyarrow is not None, "pyarrow is not installed")
+    def test_columnar(self):
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        columns = ["userName", "active", "skills", "zip"]
+        for output_format in ["parquet", "arrow"]:
+            path = os.path.join(self.temp_dir.name, f"users.{output_format}")
+            with TableWriter(path, columns, types={"zip": "string"}, batch_rows=1) as writer:
+                writer.write_rows(self.rows)
+
+            if output_format == "parquet":
+                table = pyarrow.parquet.read_table(path)
+                self.assertEqual(pyarrow.parquet.ParquetFile(path).num_row_groups, 2)
+            else:
+                with pyarrow.OSFile(path) as source:
+                    table = pyarrow.ipc.open_file(source).read_all()
+            self.assertEqual(str(table.schema.field("active").type), "bool")
+            self.assertEqual(str(table.schema.field("skills").type), "int64")
+            self.assertEqual(table.column("zip").to_pylist(), ["01234", "90210"])
+            self.assertEqual(table.column("active").to_pylist(), [True, None])
+
+    @unittest.skipUnless(tabular_output.pyarrow is not None, "pyarrow is not installed")
+    def test_widened_columns(self):
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        # report results are text, the types of the first batch do not fit the later rows
+        rows = [["1", "12", "a"], ["2", "5.5", "b"], ["n/a", "7", "c"]]
+        for output_format in ["parquet", "arrow"]:
+            path = os.path.join(self.temp_dir.name, f"report.{output_format}")
+            with self.assertLogs(level="WARNING"):
+                with TableWriter(path, ["calls", "minutes", "agent"], batch_rows=1, parse_strings=True) as writer:
+                    writer.write_rows(rows)
+
+            if output_format == "parquet":
+                table = pyarrow.parquet.read_table(path)
+            else:
+                with pyarrow.OSFile(path) as source:
+                    table = pyarrow.ipc.open_file(source).read_all()
+            self.assertEqual(str(table.schema.field("calls").type), "string")
+            self.assertEqual(table.column("calls").to_pylist(), ["1", "2", "n/a"])
+            self.assertEqual(str(table.schema.field("minutes").type), "double")
+            self.assertEqual(table.column("minutes").to_pylist(), [12.0, 5.5, 7.0])
+            self.assertFalse(os.path.exists(f"{path}.widen.tmp"))
+
+            # a given type is not widened
+            with self.assertRaises(ValueError):
+                with TableWriter(path, ["calls", "minutes", "agent"], types={"calls": "int"}, batch_rows=1, parse_strings=True) as writer:
+                    writer.write_rows(rows)
+
+    @unittest.skipUnless(tabular_output.pyarrow is not None, "pyarrow is not installed")
+    def test_widened_bool_and_timestamp_columns(self):
+        import pyarrow.parquet
+
+        opened = datetime.datetime(2024, 1, 31, 10, 0)
+        rows = [
+            [True, opened, "TRUE"],
+            [False, None, "2024-01-31T10:00"],
+            ["n/a", "unknown", "maybe"],
+            [True, opened, "FALSE"],
+        ]
+        path = os.path.join(self.temp_dir.name, "users.parquet")
+        with self.assertLogs(level="WARNING"):
+            with TableWriter(path, ["active", "opened", "text"], batch_rows=2, parse_strings=True) as writer:
+                writer.write_rows(rows)
+
+        # the rewritten and the new values are written the same way, text keeps its spelling
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.column("active").to_pylist(), ["True", "False", "n/a", "True"])
+        self.assertEqual(
+            table.column("opened").to_pylist(),
+            ["2024-01-31 10:00:00", None, "unknown", "2024-01-31 10:00:00"],
+        )
+        self.assertEqual(table.column("text").to_pylist(), ["TRUE", "2024-01-31T10:00", "maybe", "FALSE"])
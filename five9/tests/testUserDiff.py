@@ -0,0 +1,68 @@
+# unittests for the user_diff module
+
+import datetime
+import unittest
+
+from five9.utils.general import compile_datatype_converter, datatype_conversion
+from five9.utils.user_diff import apply_user_changes, diff_users, user_field_types
+
+
+def vcc_user(user_name, **values):
+    user = {
+        "userName": user_name,
+        "firstName": "First",
+        "lastName": None,
+        "extension": 1001,
+        "active": True,
+        "startDate": datetime.date(2024, 1, 31),
+        "mediaTypeConfig": {"mediaTypes": []},
+    }
+    user.update(values)
+    return user
+
+
+class TestUserDiff(unittest.TestCase):
+    def test_converters(self):
+        convert_bool = compile_datatype_converter(bool)
+        self.assertEqual([convert_bool(value) for value in ["Yes", "f", "1"]], [True, False, True])
+        self.assertRaises(ValueError, convert_bool, "maybe")
+        self.assertEqual(compile_datatype_converter(datetime.date)("2024-02-01"), datetime.date(2024, 2, 1))
+        self.assertRaises(ValueError, compile_datatype_converter, list)
+        self.assertEqual(datatype_conversion(int, "42"), 42)
+        self.assertRaises(Exception, datatype_conversion, bool, "maybe")
+
+    def test_diff_users(self):
+        vcc_users = [vcc_user("alice"), vcc_user("bob", active=False, extension=None), vcc_user("carol")]
+        self.assertEqual(user_field_types(vcc_users, ["extension", "lastName"]), {"extension": int, "lastName": str})
+
+        csv_rows = [
+            {"userName": "bob", "firstName": "First", "lastName": "", "extension": "1002", "active": "true", "startDate": ""},
+            {"userName": "alice", "firstName": "First", "lastName": "", "extension": "1001", "active": "TRUE", "startDate": "2024-01-31"},
+            {"userName": "carol", "firstName": "Caroline", "lastName": "", "extension": "x", "active": "no", "startDate": ""},
+            {"userName": "dave", "firstName": "Dave", "lastName": "", "extension": "", "active": "", "startDate": ""},
+        ]
+        diff = diff_users(vcc_users, csv_rows)
+
+        # only the differing fields, blank cells and equal values are not changes
+        self.assertEqual(
+            diff["changes"],
+            {
+                "bob": {"extension": (None, 1002), "active": (False, True)},
+                "carol": {"firstName": ("First", "Caroline"), "active": (True, False)},
+            },
+        )
+        self.assertEqual(list(diff["errors"]), ["carol"])
+        self.assertEqual(list(diff["errors"]["carol"]), ["extension"])
+        self.assertEqual(diff["unmatched"], ["dave"])
+
+        user = apply_user_changes(vcc_users[1], diff["changes"]["bob"])
+        self.assertEqual((user["extension"], user["active"]), (1002, True))
+
+    def test_invalid_headers(self):
+        vcc_users = [vcc_user("alice")]
+        with self.assertRaises(ValueError):
+            diff_users(vcc_users, [{"userName": "alice", "nickname": "Al"}])
+        with self.assertRaises(ValueError):
+            diff_users(vcc_users, [{"userName": "alice", "mediaTypeConfig": "VOICE"}])
+        with self.assertRaises(ValueError):
+            diff_users(vcc_users, [{"EMail": "alice@example.com"}])
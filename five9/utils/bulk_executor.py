@@ -0,0 +1,230 @@
+import concurrent.futures
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import requests
+import tqdm
+import zeep
+
+# HTTP status codes of a busy or briefly unavailable API
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Five9 faults that succeed when the request is sent again later
+TRANSIENT_FAULT_PATTERN = re.compile(
+    r"limit.*exceeded|too many requests|temporarily unavailable|timed? ?out|try again", re.IGNORECASE
+)
+
+
+def is_transient_error(error):
+    """
+    Whether an error of a request is temporary, such as a timeout or an exceeded API rate limit.
+
+    Args:
+        error (Exception): The error raised by the request.
+
+    Returns:
+        bool: True if the request may succeed when sent again.
+    """
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, TimeoutError)):
+        return True
+    if isinstance(error, zeep.exceptions.TransportError):
+        return error.status_code in TRANSIENT_STATUS_CODES
+    if isinstance(error, zeep.exceptions.Fault):
+        return TRANSIENT_FAULT_PATTERN.search(str(error.message or "")) is not None
+    return False
+
+
+class UpdateJournal:
+    """
+    Durable log of a bulk update, one JSON line per finished item, so a crashed or
+    interrupted run can be resumed without updating the same users again.
+
+    Each line is flushed to disk before the next item is reported finished.
+
+    Arguments:
+        path: The JSONL file.  Defaults to None, not saved.
+        resume: Load the items finished by a previous run from path.  Otherwise
+            the file is started over, keeping only the data of the items a previous
+            run did not finish, such as the original email of a user left with a
+            temporary one.  Defaults to False.
+
+    Attributes:
+        completed: The keys of the items updated, by this or a previous run.
+        failed: The error of each item that could not be updated.
+        data: The values saved with record_data for each item, by this or a previous run.
+    """
+
+    def __init__(self, path=None, resume=False):
+        self.path = path
+        self.completed = set()
+        self.failed = {}
+        self.data = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if path is None:
+            return
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # a line cut short by a crash
+                        continue
+                    if entry["status"] == "done":
+                        self.completed.add(entry["key"])
+                        self.failed.pop(entry["key"], None)
+                    elif entry["status"] == "data":
+                        self.data.setdefault(entry["key"], {}).update(entry["data"])
+                    else:
+                        self.failed[entry["key"]] = entry.get("error", "")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resume:
+            self._file = open(path, "a", encoding="utf-8")
+            return
+
+        # a fresh run updates every item again, but the data of an unfinished item
+        # may be the only copy of a value the update replaced
+        self.data = {key: values for key, values in self.data.items() if key not in self.completed}
+        self.completed = set()
+        self.failed = {}
+        self._file = open(path, "w", encoding="utf-8")
+        for key, values in self.data.items():
+            self._write({"key": key, "status": "data", "data": values, "time": time.time()})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def record(self, key, error=None):
+        """Logs an item as done, or as failed with its error"""
+        with self._lock:
+            if error is None:
+                self.completed.add(key)
+                self.failed.pop(key, None)
+                entry = {"key": key, "status": "done", "time": time.time()}
+            else:
+                self.failed[key] = str(error)
+                entry = {"key": key, "status": "failed", "error": str(error), "time": time.time()}
+            self._write(entry)
+
+    def record_data(self, key, **values):
+        """
+        Saves values of an item, such as its original email before the update changes
+        it, on disk before returning, so a resumed run can read them from data.
+        """
+        with self._lock:
+            self.data.setdefault(key, {}).update(values)
+            self._write({"key": key, "status": "data", "data": values, "time": time.time()})
+
+    def _write(self, entry):
+        if self._file is not None:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """Closes the journal file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Closes and deletes the journal file, once the update is complete"""
+        self.close()
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def run_bulk_updates(
+    items,
+    update,
+    key,
+    max_workers=4,
+    journal=None,
+    retries=3,
+    backoff_seconds=2,
+    is_transient=is_transient_error,
+    desc="Updating users",
+):
+    """
+    Runs an update, such as modifyUser, for many items concurrently.
+
+    Up to max_workers updates run at the same time; make the requests through a rate
+    limited service, such as client.throttled_service, to keep all threads within the
+    API rate limits.  An update that fails with a transient error, see
+    is_transient_error, is retried up to retries times, waiting backoff_seconds
+    doubled after each attempt.  Every finished item is recorded in the journal, and
+    the items already completed in the journal are skipped.
+
+    Args:
+        items (iterable): The items to update, such as user objects.
+        update (function): update(item) making the requests of one item, its return value is collected.
+        key (function): key(item) returning the unique name of an item in the journal, such as its userName.
+        max_workers (int, optional): The number of concurrent updates. Defaults to 4.
+        journal (UpdateJournal, optional): Progress to resume and update. Defaults to None, not saved.
+        retries (int, optional): The number of retries of a transient error. Defaults to 3.
+        backoff_seconds (float, optional): The wait before the first retry. Defaults to 2.
+        is_transient (function, optional): is_transient(error) returning True for the errors to retry.
+        desc (str, optional): The description of the progress bar. Defaults to "Updating users".
+
+    Returns:
+        dict:
+            "updated": {key: return value of update} of the items updated by this run.
+            "failed": {key: error} of the items that could not be updated.
+            "skipped": The keys of the items completed by a previous run.
+    """
+    if journal is None:
+        journal = UpdateJournal()
+
+    result = {"updated": {}, "failed": {}, "skipped": []}
+    pending = []
+    for item in items:
+        item_key = key(item)
+        if item_key in journal.completed:
+            result["skipped"].append(item_key)
+        else:
+            pending.append((item_key, item))
+    if result["skipped"]:
+        logging.info(f"Skipping {len(result['skipped'])} items completed by a previous run")
+
+    def attempt(item_key, item):
+        for attempt_number in range(retries + 1):
+            try:
+                return update(item)
+            except Exception as e:
+                if attempt_number == retries or not is_transient(e):
+                    raise
+                wait_seconds = backoff_seconds * 2**attempt_number
+                logging.warning(f"Retrying {item_key} in {wait_seconds:.1f} seconds: {e}")
+                time.sleep(wait_seconds)
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        with tqdm.tqdm(total=len(pending), desc=desc, mininterval=1) as progress:
+            futures = {executor.submit(attempt, item_key, item): item_key for item_key, item in pending}
+            for future in concurrent.futures.as_completed(futures):
+                item_key = futures[future]
+                try:
+                    result["updated"][item_key] = future.result()
+                    journal.record(item_key)
+                except Exception as e:
+                    logging.debug(f"Could not update {item_key}: {e}")
+                    result["failed"][item_key] = e
+                    journal.record(item_key, e)
+                progress.update(1)
+                progress.set_postfix({"Updated": len(result["updated"]), "Errors": len(result["failed"])})
+    finally:
+        # on an interrupt the queued updates are dropped, they are not in the journal
+        # and run again when the update is resumed
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return result
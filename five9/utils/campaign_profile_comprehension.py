@@ -1,4 +1,45 @@
+import concurrent.futures
+import hashlib
+import json
+import os
 import re
+import time
+
+
+# Five9 compare operators and the symbols they are commonly written with
+EXPRESSION_OPERATORS = {
+    "Equals": "=",
+    "NotEqual": "!=",
+    "Like": "LIKE",
+    "Less": "<",
+    "LessOrEqual": "<=",
+    "Greater": ">",
+    "GreaterOrEqual": ">=",
+}
+
+# Placeholder string for the text of a condition, so prettify does not indent the
+# parentheses or collapse the spaces of its values
+CONDITION_PLACEHOLDER = "|||||{}+_+_+_+_"
+_condition_placeholder = re.compile(r"\|\|\|\|\|(\d+)\+_\+_\+_\+_")
+
+_multiple_spaces = re.compile(" {2,}")
+_open_parens_space = re.compile(r"\( (?=\()")
+_close_parens_space = re.compile(r"\) (?=\))")
+_prettify_patterns = {}
+
+
+def _prettify_pattern(open_set, close_set):
+    # delimiters in order of precedence, " AND " and " OR " match their first letter
+    key = (open_set, close_set)
+    if key not in _prettify_patterns:
+        alternatives = []
+        if open_set:
+            alternatives.append(f"(?P<open>[{re.escape(open_set)}])")
+        if close_set:
+            alternatives.append(f"(?P<close>[{re.escape(close_set)}])")
+        alternatives.append(r"(?P<operator>(?<= )A(?=ND )|(?<= )O(?=R ))")
+        _prettify_patterns[key] = re.compile("|".join(alternatives))
+    return _prettify_patterns[key]
 
 
 def prettify(ugly="", open_set="{[(<", close_set="}])>"):
@@ -16,45 +57,51 @@ def prettify(ugly="", open_set="{[(<", close_set="}])>"):
     # Add a space to the end of the string to ensure the last character is processed
     ugly += " "
 
+    # Remove any double spaces in the string, and spaces between repeated parentheses
+    ugly = _multiple_spaces.sub(" ", ugly)
+    ugly = _open_parens_space.sub("(", ugly)
+    ugly = _close_parens_space.sub(")", ugly)
+
     # Initialize a variable to keep track of the current indentation level
     level = 0
 
-    # Remove any double spaces in the string
-    while ugly.find("  ") > -1:
-        ugly = ugly.replace("  ", " ")
-    while ugly.find("( (") > -1:
-        ugly = ugly.replace("( (", "((")
-    while ugly.find(") )") > -1:
-        ugly = ugly.replace(") )", "))")
+    # Collect the formatted output in chunks, only the delimiters are visited one by one
+    output = []
+    append = output.append
+    position = 0
 
-    # Initialize a variable to store the formatted output
-    output = ""
+    for match in _prettify_pattern(open_set, close_set).finditer(ugly):
+        idx = match.start()
+        char = ugly[idx]
+        if idx > position:
+            append(ugly[position:idx])
+        position = idx + 1
 
-    # Iterate through each character in the string
-    for idx, char in enumerate(ugly):
+        kind = match.lastgroup
         # If the character is an opening delimiter, increase the indentation level and add a newline
-        if char in open_set:
+        if kind == "open":
             level += 1
-            output += char + "\n" + "\t" * (level)
+            append(char + "\n" + "\t" * level)
         # If the character is a closing delimiter, decrease the indentation level and add a newline
-        elif char in close_set:
+        elif kind == "close":
             level -= 1
-            output += "\n" + "\t" * level + char
+            append("\n" + "\t" * level + char)
             # If the next character is not a closing delimiter, add an extra newline
             if ugly[idx + 1] not in close_set:
-                output += "\n"
-        # If the character is "AND" preceded by a space, add a newline and indent
-        elif ugly[idx - 1 : idx + 4] == " AND ":
-            output += "\n" + "\t" * level + " " * (-4) + char
-        # If the character is "OR" preceded by a space, add a newline and indent
-        elif ugly[idx - 1 : idx + 3] == " OR ":
-            output += "\n" + "\t" * level + " " * (-3) + char
-        # For all other characters, simply add them to the output string
+                append("\n")
+        # If the character starts " AND " or " OR ", add a newline and indent
         else:
-            output += char
+            append("\n" + "\t" * level + char)
+
+    append(ugly[position:])
 
     # Return the formatted string
-    return output
+    return "".join(output)
+
+
+def condition_text(criterion):
+    """Demystified text of a single crmCriteria condition, such as "state ::Equals:: CA" """
+    return f'{criterion["leftValue"]} ::{criterion["compareOperator"]}:: {criterion["rightValue"] or "null"}'
 
 
 def demystify_filter(profile_filter, verbose=False):
@@ -71,54 +118,27 @@ def demystify_filter(profile_filter, verbose=False):
     # Compile a regular expression to match numbers
     numbers = re.compile(r"(\d+)")
 
-    # Set up placeholder strings for parentheses
-    parens_open = "|||||"
-    parens_close = "+_+_+_+_"
-
-    # Create a dictionary to map expression operator strings to their corresponding symbols
-    expression_operators = {
-        "Equals": "=",
-        "NotEqual": "!=",
-        "Like": "LIKE",
-        "Less": "<",
-        "LessOrEqual": "<=",
-        "Greater": ">",
-        "GreaterOrEqual": ">=",
+    # Condition text for each criteria index, kept out of prettify with a placeholder
+    conditions = {
+        str(idx + 1): condition_text(criteria)
+        for idx, criteria in enumerate(profile_filter["crmCriteria"])
     }
 
-    # Get the grouping expression from the profile filter object
-    grouping_expression = profile_filter["grouping"]["expression"]
+    def bracket_condition(match):
+        number = match.group(1)
+        if number in conditions:
+            return f"[{CONDITION_PLACEHOLDER.format(number)}][{number}]"
+        return f"[{number}]"
 
-    # Replace numbers in the expression with brackets
-    grouping_expression = numbers.sub(r"[\1]", grouping_expression)
-
-    # Iterate through each criteria in the filter
-    for idx, criteria in enumerate(profile_filter["crmCriteria"]):
-        # Get the index of the current criteria
-        i = idx + 1
-
-        # Replace parentheses in the right value with placeholder strings
-        rightValue = (
-            (criteria["rightValue"] or "null")
-            .replace("(", parens_open)
-            .replace(")", parens_close)
-        )
-
-        # Construct the condition string using the left value, compare operator, and right value
-        condition = (
-            f'{criteria["leftValue"]} ::{criteria["compareOperator"]}:: {rightValue}'
-        )
-
-        # Replace the bracketed number in the grouping expression with the condition string
-        grouping_expression = grouping_expression.replace(
-            f"[{i}]", f"[{condition}][{i}]"
-        )
+    # Replace each number in the grouping expression with its bracketed condition and number
+    grouping_expression = numbers.sub(
+        bracket_condition, profile_filter["grouping"]["expression"]
+    )
 
     # Use the prettify function to format the grouping expression
-    demystified = (
-        prettify(grouping_expression, "(", ")")
-        .replace(parens_open, "(")
-        .replace(parens_close, ")")
+    demystified = _condition_placeholder.sub(
+        lambda match: conditions[match.group(1)],
+        prettify(grouping_expression, "(", ")"),
     )
 
     # If verbose is True, print the demystified expression to the console
@@ -129,6 +149,301 @@ def demystify_filter(profile_filter, verbose=False):
     return demystified
 
 
+def filter_key(profile_filter):
+    """Digest of the criteria and grouping expression of a filter, cloned filters have the same key"""
+    return hashlib.blake2b(
+        json.dumps(
+            [profile_filter["crmCriteria"], profile_filter["grouping"]["expression"]],
+            sort_keys=True,
+            separators=(",", ":"),
+        ).encode("utf-8"),
+        digest_size=16,
+    ).digest()
+
+
+def demystify_filters(profile_filters, max_workers=None, parallel_threshold=256):
+    """
+    Demystifies the Custom grouped filters of many campaign profiles.
+
+    Campaign profiles are often cloned, so each distinct filter is demystified once
+    and its text is shared by the profiles with the same criteria and expression.
+    When there are many distinct filters they are demystified in a process pool.
+
+    Args:
+        profile_filters (Mapping): Filter by campaign profile name.
+        max_workers (int, optional): Worker processes, 1 demystifies in this process.
+            Defaults to the number of CPUs.
+        parallel_threshold (int, optional): Minimum number of distinct filters for the
+            process pool. Defaults to 256.
+
+    Returns:
+        dict: The "demystified" text by profile name, the number of "filters" and
+            "distinct" filters, and the "seconds" taken.
+    """
+    start = time.perf_counter()
+
+    names_by_key = {}
+    distinct_filters = {}
+    for name, profile_filter in profile_filters.items():
+        if profile_filter["grouping"]["type"] != "Custom" or not profile_filter["crmCriteria"]:
+            continue
+        key = filter_key(profile_filter)
+        names_by_key.setdefault(key, []).append(name)
+        if key not in distinct_filters:
+            # only the fields used by demystify_filter are sent to the workers
+            distinct_filters[key] = {
+                "crmCriteria": profile_filter["crmCriteria"],
+                "grouping": {"expression": profile_filter["grouping"]["expression"]},
+            }
+
+    keys = list(distinct_filters)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers > 1 and len(keys) >= parallel_threshold:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            texts = list(
+                executor.map(
+                    demystify_filter,
+                    [distinct_filters[key] for key in keys],
+                    chunksize=max(1, len(keys) // (max_workers * 4)),
+                )
+            )
+    else:
+        texts = [demystify_filter(distinct_filters[key]) for key in keys]
+
+    demystified = {}
+    for key, text in zip(keys, texts):
+        for name in names_by_key[key]:
+            demystified[name] = text
+
+    return {
+        "demystified": demystified,
+        "filters": len(demystified),
+        "distinct": len(keys),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+class GroupingExpressionError(Exception):
+    pass
+
+
+class ExpressionNode:
+    """Base class of the grouping expression AST nodes"""
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def __repr__(self):
+        fields = ", ".join(f"{key}={value!r}" for key, value in self.__dict__.items())
+        return f"{type(self).__name__}({fields})"
+
+
+class Criterion(ExpressionNode):
+    """Reference to the crmCriteria entry at a 1-based index"""
+
+    def __init__(self, index, criterion=None):
+        self.index = index
+        self.criterion = criterion
+
+
+class Not(ExpressionNode):
+    def __init__(self, operand):
+        self.operand = operand
+
+
+class And(ExpressionNode):
+    def __init__(self, operands):
+        self.operands = operands
+
+
+class Or(ExpressionNode):
+    def __init__(self, operands):
+        self.operands = operands
+
+
+class Group(ExpressionNode):
+    """A parenthesized expression, kept so the expression is written back as it was"""
+
+    def __init__(self, expression):
+        self.expression = expression
+
+
+_grouping_token = re.compile(
+    r"\s*(?:(?P<number>\d+)|(?P<operator>AND|OR|NOT)(?![A-Za-z0-9_])|(?P<open>\()|(?P<close>\)))",
+    re.IGNORECASE,
+)
+
+
+def tokenize_grouping_expression(expression):
+    """
+    Splits a grouping expression such as "1 AND (2 OR NOT 3)" into tokens.
+
+    Returns:
+        list: (kind, value, position) tuples, kind is "number", "operator", "open" or "close".
+
+    Raises:
+        GroupingExpressionError: If the expression contains anything else.
+    """
+    tokens = []
+    position = 0
+    end = len(expression.rstrip())
+    while position < end:
+        match = _grouping_token.match(expression, position)
+        if match is None:
+            rest = expression[position:]
+            position += len(rest) - len(rest.lstrip())
+            raise GroupingExpressionError(
+                f"Unexpected {rest.strip()[:20]!r} at position {position} of {expression!r}"
+            )
+        kind = match.lastgroup
+        value = match.group(kind)
+        tokens.append((kind, value.upper() if kind == "operator" else value, match.start(kind)))
+        position = match.end()
+    return tokens
+
+
+class _GroupingParser:
+    # recursive descent parser, NOT binds tighter than AND, and AND tighter than OR
+
+    def __init__(self, expression, criteria):
+        self.expression = expression
+        self.tokens = tokenize_grouping_expression(expression)
+        self.position = 0
+        self.criteria = criteria
+
+    def error(self, message):
+        if self.position < len(self.tokens):
+            at = f"at position {self.tokens[self.position][2]}"
+        else:
+            at = "at the end"
+        return GroupingExpressionError(f"{message} {at} of {self.expression!r}")
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None, None)
+
+    def accept_operator(self, operator):
+        kind, value, _ = self.peek()
+        if kind == "operator" and value == operator:
+            self.position += 1
+            return True
+        return False
+
+    def parse(self):
+        if len(self.tokens) == 0:
+            raise self.error("Empty grouping expression")
+        node = self.parse_or()
+        if self.position < len(self.tokens):
+            raise self.error("Unexpected token")
+        return node
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.accept_operator("OR"):
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else Or(operands)
+
+    def parse_and(self):
+        operands = [self.parse_not()]
+        while self.accept_operator("AND"):
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else And(operands)
+
+    def parse_not(self):
+        if self.accept_operator("NOT"):
+            return Not(self.parse_not())
+        return self.parse_primary()
+
+    def parse_primary(self):
+        kind, value, _ = self.peek()
+        if kind == "number":
+            index = int(value)
+            criterion = None
+            if self.criteria is not None:
+                if not 1 <= index <= len(self.criteria):
+                    raise self.error(f"Criteria {index} does not exist")
+                criterion = self.criteria[index - 1]
+            self.position += 1
+            return Criterion(index, criterion)
+        if kind == "open":
+            self.position += 1
+            node = self.parse_or()
+            if self.peek()[0] != "close":
+                raise self.error("Missing closing parenthesis")
+            self.position += 1
+            return Group(node)
+        raise self.error("Expected a criteria number or opening parenthesis")
+
+
+def parse_grouping_expression(expression, criteria=None):
+    """
+    Parses a campaign profile grouping expression into an AST.
+
+    Args:
+        expression (str): The grouping expression, such as "1 AND (2 OR 3)".
+        criteria (list, optional): The crmCriteria of the filter.  When provided, each
+            Criterion node holds its criteria and the numbers are validated.
+
+    Returns:
+        ExpressionNode: The root Criterion, Not, And, Or or Group node.
+
+    Raises:
+        GroupingExpressionError: If the expression is not valid.
+    """
+    return _GroupingParser(expression, criteria).parse()
+
+
+def parse_profile_filter(profile_filter):
+    """
+    Parses a campaign profile filter (getCampaignProfileFilter output) into an AST.
+
+    Filters grouped with "All" or "Any" are returned as an And or Or of all their criteria.
+
+    Returns:
+        ExpressionNode: The root node, or None for a filter without criteria.
+    """
+    criteria = profile_filter["crmCriteria"] or []
+    grouping = profile_filter["grouping"] or {}
+    grouping_type = grouping.get("type", None) or "All"
+
+    if grouping_type == "Custom":
+        return parse_grouping_expression(grouping["expression"], criteria)
+
+    if len(criteria) == 0:
+        return None
+    nodes = [Criterion(idx + 1, criterion) for idx, criterion in enumerate(criteria)]
+    if len(nodes) == 1:
+        return nodes[0]
+    return And(nodes) if grouping_type == "All" else Or(nodes)
+
+
+def _write_expression(node, append):
+    if isinstance(node, Criterion):
+        append(str(node.index))
+    elif isinstance(node, Group):
+        append("(")
+        _write_expression(node.expression, append)
+        append(")")
+    elif isinstance(node, Not):
+        append("NOT ")
+        _write_expression(node.operand, append)
+    else:
+        separator = " AND " if isinstance(node, And) else " OR "
+        for idx, operand in enumerate(node.operands):
+            if idx > 0:
+                append(separator)
+            _write_expression(operand, append)
+
+
+def expression_to_string(node):
+    """Writes an expression AST back to a grouping expression string, such as "1 AND (2 OR 3)" """
+    output = []
+    _write_expression(node, output.append)
+    return "".join(output)
+
+
 def remystify_filter_in_place(nice_filter):
     """
     Converts a "nice filter" string into a format that can be used by the Five9 Configuration Webservices API.
@@ -138,96 +453,150 @@ def remystify_filter_in_place(nice_filter):
     return nice_filter
 
 
-def remystify_filter(nice_filter):
+# end of a demystified condition: "]", optionally followed by its "[index]", then a delimiter
+_condition_end = re.compile(r"\](?:\[(\d+)\])?(?=[\s)]|$)")
+_indexed_condition_end = re.compile(r"\]\[(\d+)\](?=[\s)]|$)")
+# a "]" followed by operators and the start of another condition, "] AND ([state ::Equals:: "
+_end_before_condition = re.compile(
+    r"\](?=[\s()]*(?:(?:AND|OR|NOT)(?![A-Za-z0-9_])[\s()]*)*\[[^\]]*? ::[A-Za-z]+:: )",
+    re.IGNORECASE,
+)
+_condition_parts = re.compile(r"(.*?) ::([A-Za-z]+):: (.*)", re.DOTALL)
+_prettify_line_break = re.compile(r"\n\t*")
+_demystified_token = re.compile(
+    r"\s*(?:(?P<open>\()|(?P<close>\))|(?P<operator>AND|OR|NOT)(?![A-Za-z0-9_])|(?P<condition>\[))",
+    re.IGNORECASE,
+)
+
+
+def _find_condition_end(nice_filter, position):
     """
-    Converts a "nice filter" string into a format that can be used by the Five9 Configuration Webservices API.
+    Finds the end of the condition starting at position, a "]" in its right value
+    such as "a] b" does not end it when the condition is numbered.
+    """
+    condition_end = _condition_end.search(nice_filter, position)
+    indexed_end = _indexed_condition_end.search(nice_filter, position)
+    if condition_end is None or indexed_end is None or condition_end.start() == indexed_end.start():
+        return condition_end
+    # a condition without a number ends before the next condition
+    next_condition = _end_before_condition.search(nice_filter, position, indexed_end.start())
+    if next_condition is not None:
+        return _condition_end.match(nice_filter, next_condition.start())
+    return indexed_end
+
+
+def parse_condition(condition):
+    """
+    Parses the text of a demystified condition back into a crmCriteria entry.
 
     Args:
-        nice_filter (str): A "nice filter" string that contains filter conditions in a human-readable format.
+        condition (str): The condition text, such as "state ::Equals:: CA".
 
     Returns:
-        dict: A dictionary that contains the converted filter criteria, grouping expression, and order by fields.
-    """
-    # Remove all bracketed numbers from the nice filter string
-    nice_filter = re.sub(r"(\[([0-9]*)\])", "", nice_filter)
-
-    # Compile a regular expression to match strings enclosed in brackets
-    condition_pattern = re.compile(r"\[(.*?)\]")
+        dict: The crmCriteria entry with compareOperator, leftValue and rightValue.
 
-    # Find all occurrences of the condition pattern in the nice filter string
-    conditions = condition_pattern.finditer(nice_filter)
+    Raises:
+        GroupingExpressionError: If the text is not a demystified condition.
+    """
+    match = _condition_parts.fullmatch(condition)
+    if match is None:
+        raise GroupingExpressionError(f"{condition!r} is not a demystified condition")
+    leftValue, compareOperator, rightValue = match.groups()
+    return {
+        "compareOperator": compareOperator,
+        "leftValue": leftValue,
+        "rightValue": None if rightValue == "null" else rightValue,
+    }
 
-    # Initialize a list to store unique conditions and an empty list for the crmCriteria
-    unique_conditions = []
-    crmCriteria = []
 
-    # Set the new grouping expression to the nice filter string
-    new_grouping_expression = nice_filter
-
-    # Iterate through the found conditions
-    for c in conditions:
-        # Get the start and end indices of the condition string
-        b = c.span()[0]
-        e = c.span()[1]
-
-        # Get the condition string
-        cond = nice_filter[b:e]
-
-        # Get the unique condition by taking the portion of the string before the closing bracket
-        unique_condition = cond.split("]")[0][1:]
-
-        # If the unique condition has not yet been added to the list, add it
-        if unique_condition not in unique_conditions:
-            unique_conditions.append(unique_condition)
-
-    # Iterate through the unique conditions
-    for unique_condition in unique_conditions:
-        # Split the condition string on the "::" separator
-        criteria = unique_condition.split("::")
-
-        # Get the compare operator, left value, and right value from the criteria
-        compareOperator = criteria[1]
-        leftValue = criteria[0][:-1]
-        rightValue = criteria[2][1:]
-
-        # If the right value is "null", set it to None
-        if rightValue == "null":
-            rightValue = None
-
-        # Add a new crmCriteria object to the list
-        crmCriteria.append(
-            {
-                "compareOperator": compareOperator,
-                "leftValue": leftValue,
-                "rightValue": rightValue,
-            }
-        )
+def remystify_filter(nice_filter, verbose=False):
+    """
+    Converts a "nice filter" string into a format that can be used by the Five9 Configuration Webservices API.
 
-    # Replace all occurrences of the unique conditions in the new grouping expression with the index of the condition
-    for idx, condition in enumerate(unique_conditions):
-        new_grouping_expression = re.sub(condition, f"{idx+1}", new_grouping_expression)
-
-    # Remove brackets and newlines from the new grouping expression, and trim leading/trailing whitespace
-    new_grouping_expression = (
-        new_grouping_expression.replace("[", "")
-        .replace("]", "")
-        .replace("\n", " ")
-        .replace("\t", " ")
-        .strip()
-    )
+    The criteria are renumbered 1 to n in the order of the numbers written after the
+    conditions by demystify_filter, and the criteria the expression does not use are
+    dropped, so remystify_filter(demystify_filter(profile_filter)) returns the same
+    filter when its expression uses every criteria.  Conditions written without a
+    number reuse the number of an identical condition, or are added after the
+    numbered conditions.
 
-    # Remove any double spaces from the new grouping expression
-    while new_grouping_expression.find("  ") > -1:
-        new_grouping_expression = new_grouping_expression.replace("  ", " ")
+    Args:
+        nice_filter (str): A "nice filter" string that contains filter conditions in a human-readable format.
+        verbose (bool, optional): Whether to print the conditions and grouping expression. Defaults to False.
 
-    # Print the index and value of each unique condition
-    for idx, condition in enumerate(unique_conditions):
-        print(f"{idx+1:02} {condition}")
+    Returns:
+        dict: A dictionary that contains the converted filter criteria, grouping expression, and order by fields.
 
-    # for idx, condition in enumerate(crmCriteria):
-    #     print(f'{idx+1:02} {condition}')
+    Raises:
+        GroupingExpressionError: If the nice filter can not be parsed.
+    """
+    # the expression with a placeholder (condition text, index) for each condition
+    expression_tokens = []
+    conditions_by_index = {}
+    position = 0
+    end = len(nice_filter.rstrip())
+
+    while position < end:
+        match = _demystified_token.match(nice_filter, position)
+        if match is None:
+            raise GroupingExpressionError(
+                f"Unexpected {nice_filter[position:].strip()[:20]!r} in the nice filter"
+            )
+        kind = match.lastgroup
+        if kind != "condition":
+            expression_tokens.append(match.group(kind).upper())
+            position = match.end()
+            continue
+
+        condition_end = _find_condition_end(nice_filter, match.end())
+        if condition_end is None:
+            raise GroupingExpressionError(
+                f"Unclosed condition {nice_filter[match.start(kind):][:40]!r} in the nice filter"
+            )
+        # filters demystified by earlier versions have line breaks before " AND " and
+        # " OR " inside values too
+        condition = _prettify_line_break.sub(
+            "", nice_filter[match.end() : condition_end.start()]
+        )
+        index = condition_end.group(1)
+        if index is not None:
+            index = int(index)
+            if conditions_by_index.setdefault(index, condition) != condition:
+                raise GroupingExpressionError(
+                    f"Criteria {index} is used for different conditions in the nice filter"
+                )
+        expression_tokens.append((condition, index))
+        position = condition_end.end()
+
+    # numbered conditions are renumbered in their order, then identical conditions share a number
+    criteria_numbers = {}
+    crmCriteria = []
+    for index in sorted(conditions_by_index):
+        condition = conditions_by_index[index]
+        criteria_numbers[(condition, index)] = len(crmCriteria) + 1
+        criteria_numbers.setdefault((condition, None), len(crmCriteria) + 1)
+        crmCriteria.append(parse_condition(condition))
+
+    expression = []
+    for token in expression_tokens:
+        if isinstance(token, str):
+            expression.append(token)
+            continue
+        number = criteria_numbers.get(token, None)
+        if number is None:
+            crmCriteria.append(parse_condition(token[0]))
+            number = criteria_numbers[token] = len(crmCriteria)
+        expression.append(str(number))
+
+    # parse the expression to validate it and write it in the standard form
+    new_grouping_expression = expression_to_string(
+        parse_grouping_expression(" ".join(expression), crmCriteria)
+    )
 
-    print(new_grouping_expression)
+    if verbose == True:
+        for idx, criteria in enumerate(crmCriteria):
+            print(f"{idx+1:02} {condition_text(criteria)}")
+        print(new_grouping_expression)
 
     return {
         "crmCriteria": crmCriteria,
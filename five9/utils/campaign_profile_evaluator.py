@@ -0,0 +1,384 @@
+import array
+import csv
+import operator
+import re
+import time
+
+from .campaign_profile_comprehension import (
+    EXPRESSION_OPERATORS,
+    And,
+    Criterion,
+    Group,
+    Not,
+    Or,
+    parse_profile_filter,
+    remystify_filter,
+)
+
+
+# contact field types compared as numbers by the ordering operators
+NUMERIC_FIELD_TYPES = {"NUMBER", "CURRENCY", "PERCENT"}
+
+# compare operators of the campaign profile filters besides EXPRESSION_OPERATORS
+STRING_OPERATORS = ["Contains", "DontContains", "StartsWith", "EndsWith"]
+NULL_OPERATORS = ["IsNull", "IsNotNull"]
+COMPARE_OPERATORS = list(EXPRESSION_OPERATORS) + STRING_OPERATORS + NULL_OPERATORS
+
+
+class ContactColumn:
+    """
+    A dictionary encoded column of contact records.
+
+    values holds the distinct values of the column (None for empty cells) and codes
+    the position in values of each row.  Columns with up to 256 distinct values keep
+    their codes in a bytes object, others in an array.
+    """
+
+    def __init__(self, values, codes):
+        self.values = values
+        if len(values) <= 256:
+            codes = bytes(codes.tolist() if isinstance(codes, array.array) else codes)
+        self.codes = codes
+
+    def row_bytes(self, hits):
+        """One byte per row, 1 for the rows whose value is a hit, given one byte per distinct value"""
+        if isinstance(self.codes, bytes):
+            return self.codes.translate(hits.ljust(256, b"\0"))
+        return bytes(map(hits.__getitem__, self.codes))
+
+
+class ContactTable:
+    """
+    Contact records loaded by column, such as a CRM export.
+
+    Arguments:
+        columns: ContactColumn by field name.
+        row_count: The number of records.
+    """
+
+    def __init__(self, columns, row_count):
+        self.columns = columns
+        self.row_count = row_count
+        # masks hold one byte per row, bit 0 of the byte is set for selected rows
+        self.all_rows = int.from_bytes(b"\x01" * row_count, "little")
+
+    @classmethod
+    def from_csv(cls, path, columns=None, delimiter=",", encoding="utf-8", null_values=("",)):
+        """
+        Loads the columns of a contact CSV file with a header row.
+
+        Args:
+            path (str): The CSV file.
+            columns (list, optional): Only load these columns, such as the fields of a filter.
+                Defaults to all columns.
+            delimiter (str, optional): The CSV delimiter. Defaults to ",".
+            encoding (str, optional): The file encoding. Defaults to "utf-8".
+            null_values (tuple, optional): Cell values loaded as null. Defaults to empty cells.
+
+        Returns:
+            ContactTable: The loaded records.
+        """
+        with open(path, newline="", encoding=encoding) as csv_file:
+            reader = csv.reader(csv_file, delimiter=delimiter)
+            header = next(reader, [])
+            if columns is None:
+                columns = header
+            missing = [column for column in columns if column not in header]
+            if missing:
+                raise ValueError(f"Columns {', '.join(missing)} are not in {path}")
+
+            positions = [header.index(column) for column in columns]
+            # null is always the first distinct value of a column
+            distinct_values = [[None] for column in columns]
+            indexes = [dict.fromkeys(null_values, 0) for column in columns]
+            codes = [array.array("I") for column in columns]
+
+            row_count = 0
+            if len(positions) == 0:
+                row_count = sum(1 for row in reader)
+            else:
+                select = operator.itemgetter(*positions)
+                single = len(positions) == 1
+                columns_state = list(zip(distinct_values, indexes, [c.append for c in codes]))
+                for row in reader:
+                    row_count += 1
+                    try:
+                        values = select(row)
+                    except IndexError:
+                        # missing trailing cells are empty
+                        values = select(row + [""] * len(header))
+                    if single:
+                        values = (values,)
+                    for value, (column_values, index, append) in zip(values, columns_state):
+                        code = index.get(value)
+                        if code is None:
+                            code = index[value] = len(column_values)
+                            column_values.append(value)
+                        append(code)
+
+        return cls(
+            {
+                column: ContactColumn(column_values, column_codes)
+                for column, column_values, column_codes in zip(columns, distinct_values, codes)
+            },
+            row_count,
+        )
+
+    def selected_rows(self, mask, limit=None):
+        """The 0-based row numbers selected by a mask, in order"""
+        row_bytes = mask.to_bytes(self.row_count, "little")
+        rows = []
+        position = row_bytes.find(1)
+        while position > -1 and (limit is None or len(rows) < limit):
+            rows.append(position)
+            position = row_bytes.find(1, position + 1)
+        return rows
+
+
+def _to_number(value):
+    try:
+        return float(value.strip().replace(",", "").replace("$", "").replace("%", ""))
+    except (AttributeError, ValueError):
+        return None
+
+
+def _like_matcher(pattern, flags):
+    # % matches any characters, _ a single character
+    regex = "".join(
+        ".*" if char == "%" else "." if char == "_" else re.escape(char) for char in pattern
+    )
+    return re.compile(regex, re.DOTALL | flags).fullmatch
+
+
+def compile_criterion(criterion, field_type=None, case_sensitive=False):
+    """
+    Compiles a crmCriteria entry into a predicate on a single cell value.
+
+    Null cells are only selected by IsNull, and a comparison with a null right value
+    other than Equals and NotEqual selects nothing.  When the field type is not
+    given, the ordering operators compare numbers if both values are numbers.
+
+    Args:
+        criterion (dict): The criteria with compareOperator, leftValue and rightValue.
+        field_type (str, optional): The contact field type, such as "NUMBER".
+        case_sensitive (bool, optional): Compare strings case sensitively. Defaults to False.
+
+    Returns:
+        function: predicate(value) returning True for the selected values.
+    """
+    compare_operator = criterion["compareOperator"]
+    right_value = criterion["rightValue"]
+
+    if compare_operator == "Equals" and right_value is None:
+        compare_operator = "IsNull"
+    elif compare_operator == "NotEqual" and right_value is None:
+        compare_operator = "IsNotNull"
+
+    if compare_operator == "IsNull":
+        return lambda value: value is None
+    if compare_operator == "IsNotNull":
+        return lambda value: value is not None
+    if compare_operator not in COMPARE_OPERATORS:
+        raise ValueError(f"Unknown compare operator {compare_operator!r}")
+    if right_value is None:
+        # a comparison with null is never true
+        return lambda value: False
+
+    fold = (lambda text: text) if case_sensitive else str.casefold
+    right_text = fold(right_value)
+
+    if compare_operator == "Like":
+        matches = _like_matcher(right_value, 0 if case_sensitive else re.IGNORECASE)
+        return lambda value: value is not None and matches(value) is not None
+    if compare_operator in STRING_OPERATORS:
+        test = {
+            "Contains": lambda text: right_text in text,
+            "DontContains": lambda text: right_text not in text,
+            "StartsWith": lambda text: text.startswith(right_text),
+            "EndsWith": lambda text: text.endswith(right_text),
+        }[compare_operator]
+        return lambda value: value is not None and test(fold(value))
+
+    compare = {
+        "Equals": operator.eq,
+        "NotEqual": operator.ne,
+        "Less": operator.lt,
+        "LessOrEqual": operator.le,
+        "Greater": operator.gt,
+        "GreaterOrEqual": operator.ge,
+    }[compare_operator]
+    right_number = _to_number(right_value)
+    numeric = field_type in NUMERIC_FIELD_TYPES if field_type is not None else None
+
+    def predicate(value):
+        if value is None:
+            return False
+        if numeric != False and right_number is not None:
+            number = _to_number(value)
+            if number is not None:
+                return compare(number, right_number)
+            if numeric == True:
+                return False
+        return compare(fold(value), right_text)
+
+    return predicate
+
+
+class CompiledProfileFilter:
+    """
+    A campaign profile filter compiled for evaluation over a ContactTable.
+
+    Each criteria is evaluated once per distinct value of its column, and expanded to
+    a mask with one byte per row.  The grouping expression then combines the masks
+    with big integer AND, OR and XOR operations instead of a loop over the rows.
+
+    NOT selects every row its operand does not select, null cells included, so
+    NOT [state ::Equals:: CA] selects the records without a state.  This is not the
+    SQL null semantics, where the comparison of a null cell is unknown under NOT too.
+    """
+
+    def __init__(self, profile_filter, field_types=None, case_sensitive=False):
+        self.profile_filter = profile_filter
+        self.criteria = profile_filter["crmCriteria"] or []
+        self.tree = parse_profile_filter(profile_filter)
+        field_types = field_types or {}
+        self.predicates = [
+            compile_criterion(
+                criterion, field_types.get(criterion["leftValue"], None), case_sensitive
+            )
+            for criterion in self.criteria
+        ]
+
+    @property
+    def fields(self):
+        """The contact fields used by the filter, in order"""
+        return list(dict.fromkeys(criterion["leftValue"] for criterion in self.criteria))
+
+    def criteria_masks(self, table):
+        """The row mask of each criteria, identical criteria are evaluated once"""
+        masks = []
+        evaluated = {}
+        for criterion, predicate in zip(self.criteria, self.predicates):
+            key = (criterion["leftValue"], criterion["compareOperator"], criterion["rightValue"])
+            if key not in evaluated:
+                column = table.columns.get(criterion["leftValue"], None)
+                if column is None:
+                    raise ValueError(f"Field {criterion['leftValue']} is not loaded in the contact table")
+                hits = bytes(1 if predicate(value) else 0 for value in column.values)
+                evaluated[key] = int.from_bytes(column.row_bytes(hits), "little")
+            masks.append(evaluated[key])
+        return masks
+
+    def evaluate(self, table, masks=None):
+        """
+        The rows of a ContactTable selected by the filter.
+
+        Returns:
+            int: A mask with one byte per row, see ContactTable.selected_rows.
+        """
+        if self.tree is None:
+            return table.all_rows
+        if masks is None:
+            masks = self.criteria_masks(table)
+        return _evaluate_node(self.tree, masks, table.all_rows)
+
+
+def _evaluate_node(node, masks, all_rows):
+    if isinstance(node, Criterion):
+        return masks[node.index - 1]
+    if isinstance(node, Group):
+        return _evaluate_node(node.expression, masks, all_rows)
+    if isinstance(node, Not):
+        return all_rows ^ _evaluate_node(node.operand, masks, all_rows)
+    result = _evaluate_node(node.operands[0], masks, all_rows)
+    for operand in node.operands[1:]:
+        if isinstance(node, And):
+            result &= _evaluate_node(operand, masks, all_rows)
+        else:
+            result |= _evaluate_node(operand, masks, all_rows)
+    return result
+
+
+def compile_profile_filter(profile_filter, field_types=None, case_sensitive=False):
+    """
+    Compiles a campaign profile filter for offline evaluation.
+
+    Args:
+        profile_filter (dict or str): getCampaignProfileFilter output, or demystify_filter text.
+            A CompiledProfileFilter is returned as is.
+        field_types (dict, optional): Contact field type by field name, see contact_field_types.
+        case_sensitive (bool, optional): Compare strings case sensitively. Defaults to False.
+
+    Returns:
+        CompiledProfileFilter: The compiled filter.
+    """
+    if isinstance(profile_filter, CompiledProfileFilter):
+        return profile_filter
+    if isinstance(profile_filter, str):
+        profile_filter = remystify_filter(profile_filter)
+    return CompiledProfileFilter(profile_filter, field_types, case_sensitive)
+
+
+def contact_field_types(contact_fields):
+    """Contact field type by field name, from the getContactFields objects"""
+    return {field["name"]: field["type"] for field in contact_fields or []}
+
+
+def evaluate_profile_filter(profile_filter, contacts, field_types=None, case_sensitive=False, delimiter=","):
+    """
+    Counts the contact records a campaign profile filter selects, without API calls.
+
+    Args:
+        profile_filter (dict or str): getCampaignProfileFilter output, or demystify_filter text.
+        contacts (str or ContactTable): A contact CSV file with a header row, or loaded contacts.
+        field_types (dict, optional): Contact field type by field name, see contact_field_types.
+        case_sensitive (bool, optional): Compare strings case sensitively. Defaults to False.
+        delimiter (str, optional): The CSV delimiter. Defaults to ",".
+
+    Returns:
+        dict: The "rows", "selected" rows and "selectivity" of the filter, the "selected"
+            rows of each criteria in "criteria", the selection "mask", and the "load_seconds"
+            and "evaluate_seconds" taken.
+    """
+    compiled = compile_profile_filter(profile_filter, field_types, case_sensitive)
+
+    start = time.perf_counter()
+    if isinstance(contacts, ContactTable):
+        table = contacts
+    else:
+        table = ContactTable.from_csv(contacts, columns=compiled.fields, delimiter=delimiter)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    masks = compiled.criteria_masks(table)
+    mask = compiled.evaluate(table, masks)
+    selected = mask.bit_count()
+    evaluate_seconds = time.perf_counter() - start
+
+    return {
+        "rows": table.row_count,
+        "selected": selected,
+        "selectivity": selected / table.row_count if table.row_count > 0 else 0,
+        "criteria": [
+            {"index": idx + 1, "criterion": criterion, "selected": criterion_mask.bit_count()}
+            for idx, (criterion, criterion_mask) in enumerate(zip(compiled.criteria, masks))
+        ],
+        "mask": mask,
+        "load_seconds": load_seconds,
+        "evaluate_seconds": evaluate_seconds,
+    }
+
+
+def print_selectivity_report(report, name="filter"):
+    """Prints the selectivity of a filter and of each of its criteria"""
+    print(
+        f"\n{name}: {report['selected']} of {report['rows']} records "
+        f"({report['selectivity']:.2%})  "
+        f"load {report['load_seconds']:.2f}s  evaluate {report['evaluate_seconds']:.2f}s"
+    )
+    for item in report["criteria"]:
+        criterion = item["criterion"]
+        print(
+            f"\t[{item['index']}] {criterion['leftValue']} ::{criterion['compareOperator']}:: "
+            f"{criterion['rightValue'] or 'null'}  {item['selected']}"
+        )
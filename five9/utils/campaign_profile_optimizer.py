@@ -0,0 +1,394 @@
+import collections
+
+from .campaign_profile_comprehension import (
+    And,
+    Criterion,
+    Group,
+    Not,
+    Or,
+    condition_text,
+    demystify_filter,
+    expression_to_string,
+    parse_profile_filter,
+    remystify_filter,
+)
+from .campaign_profile_evaluator import NUMERIC_FIELD_TYPES, _to_number
+
+
+# normalized expression nodes are hashable tuples, so identical clauses compare equal:
+# ("criterion", (leftValue, compareOperator, rightValue)), ("not", node),
+# ("and", operands), ("or", operands), TRUE and FALSE
+TRUE = ("true",)
+FALSE = ("false",)
+
+# operators that only select records with a value in the field
+_VALUE_OPERATORS = {
+    "Equals",
+    "NotEqual",
+    "Like",
+    "Less",
+    "LessOrEqual",
+    "Greater",
+    "GreaterOrEqual",
+    "Contains",
+    "DontContains",
+    "StartsWith",
+    "EndsWith",
+    "IsNotNull",
+}
+
+
+def criterion_key(criterion):
+    """Identity of a crmCriteria entry, identical criteria have the same key"""
+    return (criterion["leftValue"], criterion["compareOperator"], criterion["rightValue"])
+
+
+def _key_criterion(key):
+    return {"compareOperator": key[1], "leftValue": key[0], "rightValue": key[2]}
+
+
+def _normalize(node):
+    # AST to normalized nodes, groups are dropped as the tree keeps the structure
+    if isinstance(node, Criterion):
+        return ("criterion", criterion_key(node.criterion))
+    if isinstance(node, Group):
+        return _normalize(node.expression)
+    if isinstance(node, Not):
+        return ("not", _normalize(node.operand))
+    kind = "and" if isinstance(node, And) else "or"
+    return (kind, tuple(_normalize(operand) for operand in node.operands))
+
+
+def node_text(node):
+    """Readable text of a normalized node, with demystified conditions"""
+    if node == TRUE or node == FALSE:
+        return node[0].upper()
+    if node[0] == "criterion":
+        return f"[{condition_text(_key_criterion(node[1]))}]"
+    if node[0] == "not":
+        return f"NOT {node_text(node[1])}"
+    separator = " AND " if node[0] == "and" else " OR "
+    return "(" + separator.join(node_text(operand) for operand in node[1]) + ")"
+
+
+def _complement(node):
+    return node[1] if node[0] == "not" else ("not", node)
+
+
+def _same_value(right_value, other_value, numeric):
+    # True if the evaluator compares the two values as equal, False if as different,
+    # for case sensitive and case insensitive comparisons alike, else None
+    if numeric != False:
+        number, other_number = _to_number(right_value), _to_number(other_value)
+        if number is not None and other_number is not None:
+            return number == other_number
+    if right_value == other_value:
+        return True
+    if right_value.casefold() != other_value.casefold():
+        return False
+    return None
+
+
+def _field_contradiction(conditions, numeric):
+    """
+    Why criteria on the same field can never be true together, or None.
+
+    Values are compared as compile_criterion compares them: as numbers when both
+    parse and the field is not known to be a string, otherwise as text, and only
+    the conditions that contradict each other both case sensitively and case
+    insensitively are reported.
+
+    Args:
+        conditions (list): (compareOperator, rightValue) of the criteria ANDed on one field.
+        numeric (bool): The field is compared as a number, None when its type is unknown.
+    """
+    # Equals null and NotEqual null are null checks
+    conditions = [
+        (
+            {"Equals": "IsNull", "NotEqual": "IsNotNull"}.get(compare_operator, compare_operator)
+            if right_value is None
+            else compare_operator,
+            right_value,
+        )
+        for compare_operator, right_value in conditions
+    ]
+    operators = {compare_operator for compare_operator, right_value in conditions}
+    if "IsNull" in operators and operators & _VALUE_OPERATORS:
+        return "IsNull can not be combined with a condition on the value"
+
+    equals = [right_value for compare_operator, right_value in conditions if compare_operator == "Equals"]
+    not_equals = [right_value for compare_operator, right_value in conditions if compare_operator == "NotEqual"]
+    for idx, right_value in enumerate(equals):
+        if any(_same_value(right_value, other_value, numeric) == False for other_value in equals[idx + 1 :]):
+            return "the field can not equal different values"
+        if any(_same_value(right_value, other_value, numeric) == True for other_value in not_equals):
+            return "the field can not equal and not equal the same value"
+
+    if numeric == True:
+        low, low_inclusive, high, high_inclusive = None, True, None, True
+        for compare_operator, right_value in conditions:
+            number = _to_number(right_value)
+            if number is None:
+                continue
+            if compare_operator in ("Greater", "GreaterOrEqual", "Equals"):
+                inclusive = compare_operator != "Greater"
+                if low is None or number > low or (number == low and not inclusive):
+                    low, low_inclusive = number, inclusive
+            if compare_operator in ("Less", "LessOrEqual", "Equals"):
+                inclusive = compare_operator != "Less"
+                if high is None or number < high or (number == high and not inclusive):
+                    high, high_inclusive = number, inclusive
+        if low is not None and high is not None:
+            if low > high or (low == high and not (low_inclusive and high_inclusive)):
+                return "the value ranges do not overlap"
+    return None
+
+
+class _Simplifier:
+    def __init__(self, field_types):
+        self.field_types = field_types or {}
+        self.findings = []
+
+    def finding(self, kind, detail):
+        self.findings.append({"kind": kind, "detail": detail})
+
+    def simplify(self, node):
+        if node[0] in ("criterion", "true", "false"):
+            return node
+        if node[0] == "not":
+            operand = self.simplify(node[1])
+            if operand[0] == "not":
+                self.finding("double_negation", f"NOT {node_text(operand)}")
+                return operand[1]
+            if operand == TRUE:
+                return FALSE
+            if operand == FALSE:
+                return TRUE
+            return ("not", operand)
+        return self.simplify_operands(node[0], [self.simplify(operand) for operand in node[1]])
+
+    def simplify_operands(self, kind, operands):
+        identity, absorbing = (TRUE, FALSE) if kind == "and" else (FALSE, TRUE)
+        dual = "or" if kind == "and" else "and"
+
+        # flatten nested operands of the same kind
+        flat = []
+        for operand in operands:
+            if operand[0] == kind:
+                self.finding("flattened", node_text(operand))
+                flat.extend(operand[1])
+            else:
+                flat.append(operand)
+
+        unique = []
+        seen = set()
+        for operand in flat:
+            if operand == identity:
+                continue
+            if operand in seen:
+                self.finding("duplicate", node_text(operand))
+                continue
+            seen.add(operand)
+            unique.append(operand)
+        if absorbing in seen:
+            self.finding("unreachable" if kind == "and" else "tautology", node_text((kind, tuple(flat))))
+            return absorbing
+
+        for operand in unique:
+            if _complement(operand) in seen:
+                if kind == "and":
+                    self.finding("contradiction", f"{node_text(operand)} AND {node_text(_complement(operand))}")
+                else:
+                    self.finding("tautology", f"{node_text(operand)} OR {node_text(_complement(operand))}")
+                return absorbing
+
+        if kind == "and":
+            by_field = {}
+            for operand in unique:
+                if operand[0] == "criterion":
+                    left_value, compare_operator, right_value = operand[1]
+                    by_field.setdefault(left_value, []).append((compare_operator, right_value))
+            for field, conditions in by_field.items():
+                if len(conditions) < 2:
+                    continue
+                field_type = self.field_types.get(field, None)
+                reason = _field_contradiction(
+                    conditions, field_type in NUMERIC_FIELD_TYPES if field_type is not None else None
+                )
+                if reason is not None:
+                    self.finding("contradiction", f"{field}: {reason}")
+                    return FALSE
+
+        # absorption, x AND (x OR y) is x and x OR (x AND y) is x
+        kept = []
+        for operand in unique:
+            if operand[0] == dual and any(
+                inner in seen and inner is not operand for inner in operand[1]
+            ):
+                self.finding("absorbed", node_text(operand))
+                seen.discard(operand)
+                continue
+            kept.append(operand)
+
+        if len(kept) == 0:
+            return identity
+        if len(kept) == 1:
+            return kept[0]
+        return (kind, tuple(kept))
+
+
+class _FilterWriter:
+    # normalized nodes back to an AST, criteria are numbered by first use
+
+    def __init__(self):
+        self.numbers = {}
+        self.criteria = []
+
+    def write(self, node, nested=False):
+        if node[0] == "criterion":
+            if node[1] not in self.numbers:
+                self.criteria.append(_key_criterion(node[1]))
+                self.numbers[node[1]] = len(self.criteria)
+            return Criterion(self.numbers[node[1]], self.criteria[self.numbers[node[1]] - 1])
+        if node[0] == "not":
+            return Not(self.write(node[1], nested=True))
+        operands = [self.write(operand, nested=True) for operand in node[1]]
+        written = And(operands) if node[0] == "and" else Or(operands)
+        # nested groups are always parenthesized, so the expression does not
+        # depend on operator precedence
+        return Group(written) if nested else written
+
+
+def _criteria_keys(node):
+    keys = set()
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if node[0] == "criterion":
+            keys.add(node[1])
+        elif node[0] == "not":
+            pending.append(node[1])
+        elif node[0] in ("and", "or"):
+            pending.extend(node[1])
+    return keys
+
+
+def _as_custom(profile_filter):
+    tree = parse_profile_filter(profile_filter)
+    if tree is None:
+        return None
+    return {
+        "crmCriteria": profile_filter["crmCriteria"],
+        "grouping": {"expression": expression_to_string(tree), "type": "Custom"},
+        "orderByFields": profile_filter.get("orderByFields", None) or [],
+    }
+
+
+def filter_size(profile_filter):
+    """The number of criteria, grouping expression length and demystified text length of a filter"""
+    custom = _as_custom(profile_filter)
+    if custom is None:
+        return {"criteria": 0, "expression_length": 0, "demystified_length": 0}
+    return {
+        "criteria": len(custom["crmCriteria"]),
+        "expression_length": len(custom["grouping"]["expression"]),
+        "demystified_length": len(demystify_filter(custom)),
+    }
+
+
+def optimize_profile_filter(profile_filter, field_types=None):
+    """
+    Minimizes a campaign profile filter without changing the records it selects.
+
+    Identical criteria are merged, nested groups of the same operator are flattened,
+    double negations, duplicate and absorbed clauses are removed, and clauses that
+    can never be true, such as "x AND NOT x" or two different Equals values of the
+    same field, are reported and removed.  Criteria that are not used by the grouping
+    expression are dropped, and the remaining criteria are numbered in order of use.
+
+    Args:
+        profile_filter (dict or str): getCampaignProfileFilter output, or demystify_filter text.
+        field_types (dict, optional): Contact field type by field name, used to find
+            numeric ranges that do not overlap.  See campaign_profile_evaluator.contact_field_types.
+
+    Returns:
+        dict: The minimized "filter" (None when the filter can never select a record),
+            the "findings" as kind and detail dicts, and the "before" and "after" sizes,
+            see filter_size.
+    """
+    if isinstance(profile_filter, str):
+        profile_filter = remystify_filter(profile_filter)
+
+    tree = parse_profile_filter(profile_filter)
+    simplifier = _Simplifier(field_types)
+    normalized = TRUE if tree is None else _normalize(tree)
+
+    criteria_counts = collections.Counter(
+        criterion_key(criterion) for criterion in profile_filter["crmCriteria"] or []
+    )
+    used = _criteria_keys(normalized)
+    for key, count in criteria_counts.items():
+        if count > 1:
+            simplifier.finding("duplicate_criteria", f"[{condition_text(_key_criterion(key))}]")
+        if key not in used:
+            simplifier.finding("unused", f"[{condition_text(_key_criterion(key))}]")
+
+    previous = None
+    while normalized != previous:
+        previous = normalized
+        normalized = simplifier.simplify(normalized)
+
+    order_by_fields = profile_filter.get("orderByFields", None) or []
+    if normalized == FALSE:
+        optimized = None
+    elif normalized == TRUE:
+        optimized = {
+            "crmCriteria": [],
+            "grouping": {"expression": None, "type": "All"},
+            "orderByFields": order_by_fields,
+        }
+    else:
+        writer = _FilterWriter()
+        root = writer.write(normalized)
+        atoms = [operand for operand in getattr(root, "operands", [root]) if isinstance(operand, Criterion)]
+        grouping_type = "Custom"
+        if len(atoms) == len(writer.criteria) == len(getattr(root, "operands", [root])):
+            # a plain list of criteria does not need an expression
+            grouping_type = "Any" if isinstance(root, Or) else "All"
+        optimized = {
+            "crmCriteria": writer.criteria,
+            "grouping": {
+                "expression": expression_to_string(root) if grouping_type == "Custom" else None,
+                "type": grouping_type,
+            },
+            "orderByFields": order_by_fields,
+        }
+
+    return {
+        "filter": optimized,
+        "findings": simplifier.findings,
+        "before": filter_size(profile_filter),
+        "after": filter_size(optimized) if optimized is not None else None,
+    }
+
+
+def print_optimization_report(report, name="filter", verbose=False):
+    """Prints the size reduction and the findings of optimize_profile_filter"""
+    before = report["before"]
+    after = report["after"]
+    if after is None:
+        print(f"\n{name}: the filter can never select a record")
+    else:
+        print(
+            f"\n{name}: {before['criteria']} -> {after['criteria']} criteria, "
+            f"expression {before['expression_length']} -> {after['expression_length']} characters, "
+            f"demystified {before['demystified_length']} -> {after['demystified_length']} characters"
+        )
+    counts = {}
+    for finding in report["findings"]:
+        counts[finding["kind"]] = counts.get(finding["kind"], 0) + 1
+    if counts:
+        print("\t" + ", ".join(f"{count} {kind}" for kind, count in sorted(counts.items())))
+    if verbose == True:
+        for finding in report["findings"]:
+            print(f"\t\t{finding['kind']}: {finding['detail']}")
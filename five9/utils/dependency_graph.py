@@ -0,0 +1,211 @@
+import collections
+import collections.abc
+import logging
+
+from lxml import etree
+
+from .ivr_utils import analyze_ivr_xml
+
+
+# node types of the dependency graph
+CAMPAIGN = "campaign"
+CAMPAIGN_PROFILE = "campaignProfile"
+CONTACT_FIELD = "contactField"
+IVR_SCRIPT = "ivrScript"
+SKILL = "skill"
+PROMPT = "prompt"
+DISPOSITION = "disposition"
+CALL_VARIABLE = "callVariable"
+CALL_VARIABLE_GROUP = "callVariableGroup"
+USER_PROFILE = "userProfile"
+
+# IVR variables of this group are contact fields
+CONTACT_VARIABLE_GROUP = "Contact"
+
+
+def _find_values(value, key):
+    """All non-empty values of a key anywhere in a nested domain object"""
+    if isinstance(value, collections.abc.Mapping):
+        for item_key, item in value.items():
+            if item_key == key:
+                if isinstance(item, str) and item:
+                    yield item
+            else:
+                yield from _find_values(item, key)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _find_values(item, key)
+
+
+def ivr_script_references(xml_definition):
+    """
+    The skills, prompts and variables used by an IVR script.
+
+    Args:
+        xml_definition (str): The xmlDefinition of the IVR script.
+
+    Returns:
+        dict: Sets of "skills", "prompts" and "variables" (group.name) names.
+    """
+    analysis = analyze_ivr_xml(xml_definition, decompress_functions=False)
+    return {
+        "skills": {
+            skill["name"]
+            for skill_transfer in analysis["skill_transfers"]
+            for skill in skill_transfer["skills"]
+            if skill["type"] == "skill" and skill["name"]
+        },
+        "prompts": set(analysis["prompts"]),
+        "variables": set(analysis["variables"]),
+    }
+
+
+class DependencyGraph:
+    """
+    Cross-reference index of the objects of a domain.
+
+    Nodes are (type, name) tuples, such as ("skill", "sales").  An edge from a node
+    to one of its dependencies means the node uses that object, for example a
+    campaign uses its campaign profile.  Both directions are stored as adjacency
+    sets, so direct dependencies and dependents are found with a single lookup.
+    """
+
+    def __init__(self):
+        self.dependencies = collections.defaultdict(set)
+        self.dependents = collections.defaultdict(set)
+
+    def add_edge(self, node, dependency):
+        self.dependencies[node].add(dependency)
+        self.dependents[dependency].add(node)
+
+    @property
+    def nodes(self):
+        return set(self.dependencies) | set(self.dependents)
+
+    def uses(self, node_type, name, dependency_type=None):
+        """The objects directly used by an object, optionally only those of one type"""
+        return {
+            node
+            for node in self.dependencies.get((node_type, name), ())
+            if dependency_type is None or node[0] == dependency_type
+        }
+
+    def used_by(self, node_type, name, dependent_type=None, transitive=False):
+        """
+        The objects that use an object.
+
+        Args:
+            node_type (str): The type of the object, such as "contactField".
+            name (str): The name of the object.
+            dependent_type (str, optional): Only return dependents of this type, such as "campaign".
+            transitive (bool, optional): Also return the objects that use the dependents,
+                for example the campaigns using the campaign profiles that filter on a
+                contact field. Defaults to False.
+
+        Returns:
+            set: (type, name) tuples of the dependent objects.
+        """
+        node = (node_type, name)
+        if transitive:
+            found = set()
+            pending = collections.deque(self.dependents.get(node, ()))
+            while pending:
+                dependent = pending.popleft()
+                if dependent in found or dependent == node:
+                    continue
+                found.add(dependent)
+                pending.extend(self.dependents.get(dependent, ()))
+        else:
+            found = self.dependents.get(node, set())
+
+        return {
+            dependent
+            for dependent in found
+            if dependent_type is None or dependent[0] == dependent_type
+        }
+
+    def add_campaigns(self, campaigns):
+        """Campaigns use their campaign profile, dispositions and IVR scripts"""
+        for campaign in campaigns:
+            node = (CAMPAIGN, campaign["name"])
+            if campaign.get("profileName"):
+                self.add_edge(node, (CAMPAIGN_PROFILE, campaign["profileName"]))
+            for disposition in _find_values(campaign, "dispostionName"):
+                self.add_edge(node, (DISPOSITION, disposition))
+            for script_name in _find_values(campaign, "scriptName"):
+                self.add_edge(node, (IVR_SCRIPT, script_name))
+
+    def add_campaign_profile_filters(self, profile_filters):
+        """Campaign profiles use the contact fields of their filter criteria and order"""
+        for profile_name, profile_filter in profile_filters.items():
+            node = (CAMPAIGN_PROFILE, profile_name)
+            for criterion in profile_filter.get("crmCriteria", None) or []:
+                if criterion.get("leftValue"):
+                    self.add_edge(node, (CONTACT_FIELD, criterion["leftValue"]))
+            for order_by_field in profile_filter.get("orderByFields", None) or []:
+                if order_by_field.get("fieldName"):
+                    self.add_edge(node, (CONTACT_FIELD, order_by_field["fieldName"]))
+
+    def add_ivr_scripts(self, ivr_scripts):
+        """IVR scripts use skills, prompts, call variables and contact fields"""
+        for name, ivr_script in ivr_scripts.items():
+            if not ivr_script.get("xmlDefinition"):
+                continue
+            try:
+                references = ivr_script_references(ivr_script["xmlDefinition"])
+            except etree.XMLSyntaxError as e:
+                logging.info(f"Could not parse IVR script {name}: {e}")
+                continue
+            node = (IVR_SCRIPT, name)
+            for skill in references["skills"]:
+                self.add_edge(node, (SKILL, skill))
+            for prompt in references["prompts"]:
+                self.add_edge(node, (PROMPT, prompt))
+            for variable in references["variables"]:
+                group, _, field = variable.partition(".")
+                if group == CONTACT_VARIABLE_GROUP:
+                    self.add_edge(node, (CONTACT_FIELD, field))
+                else:
+                    self.add_edge(node, (CALL_VARIABLE, variable))
+
+    def add_call_variables(self, call_variables):
+        """Call variables belong to their group and can be limited to dispositions"""
+        for variable in call_variables:
+            node = (CALL_VARIABLE, f'{variable["group"]}.{variable["name"]}')
+            self.add_edge(node, (CALL_VARIABLE_GROUP, variable["group"]))
+            for disposition in variable.get("dispositions", None) or []:
+                self.add_edge(node, (DISPOSITION, disposition))
+
+    def add_user_profiles(self, user_profiles):
+        """User profiles use their skills"""
+        for user_profile in user_profiles:
+            node = (USER_PROFILE, user_profile["name"])
+            for skill in user_profile.get("skills", None) or []:
+                self.add_edge(node, (SKILL, skill))
+
+    @classmethod
+    def from_domain_objects(cls, domain_objects):
+        """
+        Builds the dependency graph of the objects captured by a Five9DomainConfig.
+
+        Args:
+            domain_objects (Mapping): Five9DomainConfig.domain_objects, from a capture or snapshot.
+
+        Returns:
+            DependencyGraph: The dependency graph.
+        """
+        graph = cls()
+
+        graph.add_campaigns(domain_objects.get("getCampaigns", None) or [])
+        # the campaign details include the dispositions and IVR schedules
+        for section in ["getCampaigns_campaigns_outbound", "getCampaigns_campaigns_inbound"]:
+            graph.add_campaigns((domain_objects.get(section, None) or {}).values())
+
+        graph.add_campaign_profile_filters(
+            domain_objects.get("getCampaignProfiles_campaign_profile_filters", None) or {}
+        )
+        graph.add_ivr_scripts(domain_objects.get("getIVRScripts_ivrs", None) or {})
+        graph.add_call_variables(domain_objects.get("getCallVariables", None) or [])
+        graph.add_user_profiles(domain_objects.get("getUserProfiles", None) or [])
+
+        return graph
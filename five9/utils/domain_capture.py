@@ -1,14 +1,26 @@
-import datetime
+import collections
+import collections.abc
 import json
 import os
-import shutil
 import time
 
 from git import Repo
 import zeep
 
 from five9 import five9_session
-from .campaign_profile_comprehension import demystify_filter
+from .campaign_profile_comprehension import demystify_filters
+from .campaign_profile_evaluator import contact_field_types, evaluate_profile_filter
+from .campaign_profile_optimizer import optimize_profile_filter
+from .dependency_graph import DependencyGraph
+from .domain_object_store import DomainObjectStore
+from .domain_sync import apply_sync, description_selector, plan_sync, print_sync_plan
+from .snapshot_diff import diff_domain_objects
+from .snapshot_serializer import snapshot_dumps
+from .snapshot_archive import (
+    ARCHIVE_EXTENSION,
+    SnapshotArchive,
+    write_snapshot_archive,
+)
 
 API_SLEEP_INTERVAL = 0.3
 
@@ -41,6 +53,105 @@ METHOD_DEPENDENCIES = {
     "getCampaignProfiles": ["getCampaigns"],
 }
 
+# Snapshot subfolders holding one file per object, and the method they are captured under
+DETAIL_SUBFOLDERS = {
+    "ivrs": "getIVRScripts",
+    "campaigns_outbound": "getCampaigns",
+    "campaigns_inbound": "getCampaigns",
+    "campaign_profile_filters": "getCampaignProfiles",
+    "skills_info": "getSkills",
+}
+
+
+class SnapshotFolderSection(collections.abc.Mapping):
+    """Read-only mapping of object name to object for a snapshot subfolder, each file is loaded on first access"""
+
+    def __init__(self, folder_path):
+        self.folder_path = folder_path
+        self._paths = None
+        self._loaded = {}
+
+    @property
+    def paths(self):
+        # object names can contain "/", those objects are stored in nested folders
+        if self._paths is None:
+            self._paths = {}
+            for dirpath, dirnames, filenames in os.walk(self.folder_path):
+                for filename in filenames:
+                    if filename.endswith(".json"):
+                        file_path = os.path.join(dirpath, filename)
+                        name = os.path.relpath(file_path, self.folder_path)[: -len(".json")]
+                        self._paths[name.replace(os.sep, "/")] = file_path
+        return self._paths
+
+    def __getitem__(self, name):
+        try:
+            return self._loaded[name]
+        except KeyError:
+            pass
+        with open(self.paths[name], "r") as snapshotFile:
+            value = json.load(snapshotFile)
+        self._loaded[name] = value
+        return value
+
+    def read_raw(self, name):
+        """The file contents of an object, without decoding it"""
+        with open(self.paths[name], "rb") as snapshotFile:
+            return snapshotFile.read()
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, name):
+        return name in self.paths
+
+
+class SnapshotFolder(collections.abc.Mapping):
+    """
+    Read-only, lazily loaded view of the JSON files of a domain snapshot folder.
+
+    Keys match the Five9DomainConfig.domain_objects keys of the capture that wrote
+    the folder.  Method files are loaded on first access and subfolders are
+    returned as SnapshotFolderSection mappings.
+    """
+
+    def __init__(self, domain_path):
+        self.domain_path = domain_path
+        self._sections = {}
+        self._paths = {}
+
+        for entry in os.scandir(domain_path):
+            if entry.is_file() and entry.name.endswith(".json"):
+                self._paths[entry.name[: -len(".json")]] = entry.path
+            elif entry.is_dir() and entry.name in DETAIL_SUBFOLDERS:
+                self._paths[f"{DETAIL_SUBFOLDERS[entry.name]}_{entry.name}"] = entry.path
+
+    def __getitem__(self, key):
+        try:
+            return self._sections[key]
+        except KeyError:
+            pass
+        path = self._paths[key]
+        if os.path.isdir(path):
+            value = SnapshotFolderSection(path)
+        else:
+            with open(path, "r") as snapshotFile:
+                value = json.load(snapshotFile)
+        self._sections[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, key):
+        return key in self._paths
+
 
 class Five9DomainConfig:
     def __init__(
@@ -52,17 +163,41 @@ class Five9DomainConfig:
         api_hostname_alias=None,
         sync_target_domain=None,
         methods=METHODS,
+        snapshot_path=None,
+        use_mmap=False,
+        spill_to_disk=False,
+        object_cache_size=256,
+        api_sleep_interval=0.2,
     ):
         self.client = client
         self.sync_target_domain = sync_target_domain
         self.methods = methods
+        # pause between the per-object detail requests of a capture
+        self.api_sleep_interval = api_sleep_interval
 
-        self.domain_objects = {}
+        # spill captured object bodies to a temporary SQLite file for large domains
+        if spill_to_disk == True:
+            self.domain_objects = DomainObjectStore(cache_size=object_cache_size)
+        else:
+            self.domain_objects = {}
 
         self.domain_path = None
 
         self.vccConfig = None
         self.repo = None
+        self.archive = None
+
+        # paths written during the current capture, used to build the snapshot commit
+        self.existing_paths = set()
+        self.written_paths = set()
+        self.changed_paths = set()
+        self.timings = {}
+        # (method, error) of the methods that failed during the last capture
+        self.failures = []
+
+        if snapshot_path is not None:
+            self.load_snapshot(snapshot_path, use_mmap=use_mmap)
+            return
 
         print("api_hostname_alias", api_hostname_alias)
 
@@ -86,16 +221,70 @@ class Five9DomainConfig:
 
             self.getVCCConfiguration()
 
+    @classmethod
+    def from_snapshot(cls, path, use_mmap=False, sync_target_domain=None):
+        """Creates a domain configuration from an existing snapshot without connecting to the API.
+
+        Args:
+            path (str): A domain snapshot folder (domain_snapshots/<domainName>) or a
+                snapshot archive file (domain_snapshots/<domainName>.f9snap).
+            use_mmap (bool, optional): Memory-map snapshot archive files. Defaults to False.
+            sync_target_domain (Five9DomainConfig, optional): Target domain for the sync methods.
+
+        Returns:
+            Five9DomainConfig: A domain configuration with no client whose domain_objects
+            are loaded lazily from the snapshot.
+        """
+        return cls(
+            sync_target_domain=sync_target_domain,
+            snapshot_path=path,
+            use_mmap=use_mmap,
+        )
+
+    def load_snapshot(self, path, use_mmap=False):
+        """Loads the domain objects lazily from a snapshot folder or snapshot archive file"""
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            self.domain_path = path
+            self.domain_objects = collections.ChainMap({}, SnapshotFolder(path))
+        else:
+            self.domain_path = os.path.splitext(path)[0]
+            self.load_snapshot_archive(path, use_mmap=use_mmap)
+
+        self.scan_snapshot_paths()
+        print(f"\nDomain snapshot loaded from:\n{path}\n")
+
+    def scan_snapshot_paths(self):
+        """Records the files of the existing snapshot.  Files that are not written
+        again by the current capture are removed when the snapshot is committed"""
+        self.existing_paths = set()
+        self.written_paths = set()
+        self.changed_paths = set()
+        if not os.path.exists(self.domain_path):
+            return
+
+        for dirpath, dirnames, filenames in os.walk(self.domain_path):
+            if dirpath == self.domain_path:
+                # skip the .git folder and the .gitignore file in the root directory
+                if ".git" in dirnames:
+                    dirnames.remove(".git")
+                filenames = [name for name in filenames if name != ".gitignore"]
+            for name in filenames:
+                self.existing_paths.add(os.path.normpath(os.path.join(dirpath, name)))
+
     def sync_to_target_domain(self, sync_objects=[]):
-        """Method to run the domain object sync methods that are implemented.  If no sync_objects are provided, will run all sync methods"""
+        """Method to run the domain object sync methods that are implemented.  If no sync_objects are provided, only the
+        tagged campaign profiles are synced; contact fields are only synced when "contactFields" is passed explicitly,
+        since that creates or modifies every non-system contact field of the target domain"""
 
         self.sync_methods = {
+            "contactFields": self.sync_contactFields,
             "campaignProfiles": self.sync_campaignProfiles,
         }
 
         if self.sync_target_domain is not None:
             if len(sync_objects) == 0:
-                sync_objects = self.sync_methods.keys()
+                sync_objects = ["campaignProfiles"]
             for sync_object in sync_objects:
                 sync_method = self.sync_methods[sync_object]
                 print(f"SYNC - {sync_object}")
@@ -115,25 +304,16 @@ class Five9DomainConfig:
             f"{self.vccConfig.domainName}",
         )
 
-        # delete the contents of the domain snapshot folder if it exists, except for the .git folder
         if os.path.exists(self.domain_path):
             print(
-                f"\nDeleting existing snapshot data for {self.vccConfig.domainName}:\n{self.domain_path}\n"
+                f"\nRefreshing existing snapshot data for {self.vccConfig.domainName}:\n{self.domain_path}\n"
             )
 
-            # for each file in the root directory, delete it unless the parent directory is .git
-            for name in os.listdir(self.domain_path):
-                if name != ".gitignore" and name != ".git":
-                    # if the file is a directory, delete the directory
-                    if os.path.isdir(os.path.join(self.domain_path, name)):
-                        shutil.rmtree(os.path.join(self.domain_path, name))
-                    else:
-                        # remove the file
-                        os.remove(os.path.join(self.domain_path, name))
-
         else:
             os.makedirs(self.domain_path, exist_ok=True)
 
+        self.scan_snapshot_paths()
+
         try:
             self.repo = Repo(self.domain_path)
             print(f"Found existing repo at {self.domain_path}")
@@ -163,26 +343,11 @@ class Five9DomainConfig:
     ):
         output_string = ""
 
-        def fix_datetimes(obj):
-            if isinstance(obj, dict):
-                return {k: fix_datetimes(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [fix_datetimes(i) for i in obj]
-            elif isinstance(obj, datetime.datetime):
-                return obj.isoformat()
-            elif isinstance(obj, datetime.date):
-                return obj.isoformat()
-            else:
-                return obj
-
         if toJson == True:
             filetype = "json"
             try:
-                clean_object = fix_datetimes(domain_object)  # <= Only modifies datetime fields
-                output_string = json.dumps(
-                    clean_object,
-                    sort_keys=sort_keys,
-                    indent=indent
+                output_string = snapshot_dumps(
+                    domain_object, sort_keys=sort_keys, indent=indent
                 )
             except TypeError as e:
                 print(f"Error: {e}")
@@ -190,8 +355,18 @@ class Five9DomainConfig:
         else:
             output_string = domain_object
 
-        with open(f"{target_path}.{filetype}", "w") as outputFile:
+        file_path = os.path.normpath(f"{target_path}.{filetype}")
+        self.written_paths.add(file_path)
+
+        # leave unchanged files alone so only real changes are staged for the commit
+        if file_path in self.existing_paths and file_path not in self.changed_paths:
+            with open(file_path, "r") as existingFile:
+                if existingFile.read() == output_string:
+                    return True
+
+        with open(file_path, "w") as outputFile:
             outputFile.write(output_string)
+        self.changed_paths.add(file_path)
 
         return True
 
@@ -203,6 +378,7 @@ class Five9DomainConfig:
         os.makedirs(os.path.dirname(subfolder_path), exist_ok=True)
         print(f"\n\t{parent_method_name} - {subfolder_name}")
         self.domain_objects[f"{parent_method_name}_{subfolder_name}"] = {}
+        section_objects = self.domain_objects[f"{parent_method_name}_{subfolder_name}"]
 
         for domain_object in method_response:
             object_name = domain_object.name
@@ -210,25 +386,194 @@ class Five9DomainConfig:
             if vcc_method is not None:
                 sub_method = getattr(self.client.service, vcc_method)
                 domain_object = sub_method(object_name)
-                time.sleep(0.2)
+                time.sleep(self.api_sleep_interval)
                 # print(domain_object)
-            self.domain_objects[f"{parent_method_name}_{subfolder_name}"][
-                object_name
-            ] = zeep.helpers.serialize_object(domain_object, dict)
+            serialized_object = zeep.helpers.serialize_object(domain_object, dict)
+            section_objects[object_name] = serialized_object
             target_path = os.path.join(subfolder_path, object_name)
             os.makedirs(os.path.dirname(target_path), exist_ok=True)
-            self.write_object_to_target_path(
-                target_path,
-                self.domain_objects[f"{parent_method_name}_{subfolder_name}"][
-                    object_name
-                ],
-            )
+            self.write_object_to_target_path(target_path, serialized_object)
+
+    def commit_domain_snapshot(self, full_status=False):
+        """Commits the files written by the current capture to the domain snapshot repo.
+
+        Files of the previous snapshot that were not written again are removed.  By
+        default only the changed and removed paths are staged and the commit tree is
+        built from the index, which avoids scanning the whole snapshot folder.  Set
+        full_status to True to print the full git status and stage with "git add -A",
+        for example after an interrupted capture left uncommitted files behind.
+
+        Returns:
+            dict: the number of changed and removed files and the commit time in seconds
+        """
+        commit_start = time.perf_counter()
+
+        stale_paths = sorted(self.existing_paths - self.written_paths)
+        for stale_path in stale_paths:
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+
+        changed = [
+            os.path.relpath(path, self.domain_path).replace(os.sep, "/")
+            for path in sorted(self.changed_paths)
+        ]
+        removed = [
+            os.path.relpath(path, self.domain_path).replace(os.sep, "/")
+            for path in stale_paths
+        ]
+        commit_message = f"Domain Object Sync {time.strftime('%Y-%m-%d %H:%M:%S')}"
+
+        if full_status == True:
+            print(f"Git Status: {self.repo.git.status()}")
+            self.repo.git.add(A=True)
+            self.repo.index.commit(commit_message)
+        elif len(changed) > 0 or len(removed) > 0:
+            if len(removed) > 0:
+                self.repo.index.remove(removed, ignore_unmatch=True)
+            if len(changed) > 0:
+                self.repo.index.add(changed)
+            self.repo.index.commit(commit_message)
+
+        commit_seconds = time.perf_counter() - commit_start
+        self.timings["commit"] = commit_seconds
+        print(
+            f"Snapshot commit: {len(changed)} changed, {len(removed)} removed in {commit_seconds:.2f} seconds"
+        )
+
+        return {
+            "changed": len(changed),
+            "removed": len(removed),
+            "seconds": commit_seconds,
+        }
+
+    def write_snapshot_archive(self, path=None):
+        """Writes the domain objects to a single compressed snapshot archive file.
+
+        By default the archive is written next to the domain snapshot repo as
+        domain_snapshots/<domainName>.f9snap
+        """
+        if path is None:
+            path = f"{self.domain_path}.{ARCHIVE_EXTENSION}"
+
+        archive_start = time.perf_counter()
+        write_snapshot_archive(self.domain_objects, path)
+        self.timings["archive"] = time.perf_counter() - archive_start
+        print(f"Snapshot archive written in {self.timings['archive']:.2f} seconds:\n{path}")
+
+        return path
 
-    def get_domain_objects(self, methods=None):
+    def load_snapshot_archive(self, path=None, use_mmap=False):
+        """Loads the domain objects lazily from a snapshot archive file.
+
+        Objects are only read from the archive when they are accessed.  Values
+        assigned to domain_objects afterwards are kept in memory in front of the
+        archive contents.
+        """
+        if path is None:
+            path = f"{self.domain_path}.{ARCHIVE_EXTENSION}"
+
+        self.archive = SnapshotArchive(path, use_mmap=use_mmap)
+        self.domain_objects = collections.ChainMap({}, self.archive)
+
+        return self.archive
+
+    def diff_from(self, previous, sections=None):
+        """Computes the changes between a previous snapshot and the domain objects of this domain.
+
+        Args:
+            previous (Five9DomainConfig or str): The previous domain configuration, or the
+                path of a snapshot folder or snapshot archive file.
+            sections (list, optional): Only compare these domain_objects keys.
+
+        Returns:
+            dict: The changeset of added, removed and modified objects, see
+            snapshot_diff.diff_domain_objects.
+        """
+        if isinstance(previous, str):
+            previous = Five9DomainConfig.from_snapshot(previous)
+            try:
+                return diff_domain_objects(
+                    previous.domain_objects, self.domain_objects, sections=sections
+                )
+            finally:
+                previous.close()
+        return diff_domain_objects(
+            previous.domain_objects, self.domain_objects, sections=sections
+        )
+
+    def build_dependency_graph(self):
+        """Builds the cross-reference index of the campaigns, campaign profiles, contact fields,
+        IVR scripts, skills, prompts, dispositions and call variables of the domain objects
+
+        Returns:
+            DependencyGraph: The dependency graph, see dependency_graph.DependencyGraph.used_by.
+        """
+        return DependencyGraph.from_domain_objects(self.domain_objects)
+
+    def evaluate_campaign_profile_filter(self, profile_name, contacts, profile_filter=None, case_sensitive=False):
+        """Counts the records of a contact CSV file selected by a campaign profile filter,
+        without API calls.  The contact field types of the domain decide which fields are
+        compared as numbers.
+
+        Args:
+            profile_name (str): The campaign profile whose captured filter is evaluated.
+            contacts (str or ContactTable): A contact CSV file with a header row of field names.
+            profile_filter (dict or str, optional): Evaluate this filter or demystified filter
+                text instead, such as an edited filter before it is applied.
+            case_sensitive (bool, optional): Compare strings case sensitively. Defaults to False.
+
+        Returns:
+            dict: The selectivity report, see campaign_profile_evaluator.evaluate_profile_filter.
+        """
+        if profile_filter is None:
+            profile_filter = self.domain_objects["getCampaignProfiles_campaign_profile_filters"][profile_name]
+        return evaluate_profile_filter(
+            profile_filter,
+            contacts,
+            field_types=contact_field_types(self.domain_objects.get("getContactFields", None)),
+            case_sensitive=case_sensitive,
+        )
+
+    def optimize_campaign_profile_filters(self, profile_names=None):
+        """Minimizes the captured campaign profile filters, see
+        campaign_profile_optimizer.optimize_profile_filter.  Nothing is changed in the domain,
+        domain_sync.plan_profile_filter returns the calls that apply a minimized filter.
+
+        Args:
+            profile_names (list, optional): The campaign profiles to optimize. Defaults to all
+                profiles with criteria.
+
+        Returns:
+            dict: The optimization report by campaign profile name.
+        """
+        profile_filters = self.domain_objects["getCampaignProfiles_campaign_profile_filters"]
+        field_types = contact_field_types(self.domain_objects.get("getContactFields", None))
+        if profile_names is None:
+            profile_names = [
+                name
+                for name in profile_filters.keys()
+                if len(profile_filters[name]["crmCriteria"] or []) > 0
+            ]
+        return {
+            name: optimize_profile_filter(profile_filters[name], field_types)
+            for name in profile_names
+        }
+
+    def close(self):
+        """Closes the snapshot archive and removes the temporary spill file of the domain objects"""
+        if isinstance(self.domain_objects, DomainObjectStore):
+            self.domain_objects.close()
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+    def get_domain_objects(self, methods=None, full_git_status=False, write_archive=False):
         if methods is None:
             methods = self.methods
         if self.client is not None:
             try:
+                capture_start = time.perf_counter()
+                self.failures = []
                 self.getVCCConfiguration()
 
                 print("Processing Domain Object Methods")
@@ -318,94 +663,85 @@ class Five9DomainConfig:
                         except zeep.exceptions.Fault as e:
                             print("Error: ")
                             print(e)
+                            self.failures.append((method, str(e)))
+
+                self.timings["capture"] = time.perf_counter() - capture_start
+                print(f"\nCapture completed in {self.timings['capture']:.2f} seconds")
 
                 # add changes to the git repo and commit
-                # print the repo status and path
-                print(f"Git Status: {self.repo.git.status()}")
-                self.repo.git.add(A=True)
-                self.repo.index.commit(
-                    f"Domain Object Sync {time.strftime('%Y-%m-%d %H:%M:%S')}"
-                )
+                self.commit_domain_snapshot(full_status=full_git_status)
+
+                if write_archive == True:
+                    self.write_snapshot_archive()
 
             except zeep.exceptions.Fault as e:
                 print(e)
         else:
             print("No active client object available to connect with Five9 VCC")
 
+    def sync_objects(self, object_types=None, selector=None, dry_run=False, max_workers=4):
+        """Makes the objects of the sync target domain match the objects of this domain.
+
+        The domain objects of both domains are compared first, and only the objects
+        that are missing or different in the target domain are created or modified.
+        Calls are ordered by dependency and independent calls run concurrently.
+
+        Args:
+            object_types (list, optional): Keys of domain_sync.SYNC_OBJECT_TYPES to sync,
+                such as ["skills", "dispositions"]. Defaults to all.
+            selector (function, optional): selector(object_type, domain_object) returning True
+                for the objects to sync, see domain_sync.description_selector. Defaults to all objects.
+            dry_run (bool, optional): Only print the planned calls. Defaults to False.
+            max_workers (int, optional): Maximum number of concurrent calls. Defaults to 4.
+
+        Returns:
+            dict: The planned "stages" and, unless dry_run, the apply report of domain_sync.apply_sync.
+        """
+        stages = plan_sync(
+            self.domain_objects,
+            self.sync_target_domain.domain_objects,
+            object_types=object_types,
+            selector=selector,
+        )
+        print_sync_plan(stages)
+        if dry_run == True:
+            return {"stages": stages}
+
+        report = apply_sync(
+            stages, self.sync_target_domain.client.service, max_workers=max_workers
+        )
+        print(
+            f"{report['calls']} calls applied in {report['seconds']:.2f} seconds, "
+            f"{len(report['failed'])} failed"
+        )
+        report["stages"] = stages
+        return report
+
     def sync_contactFields(self):
-        pass
+        return self.sync_objects(object_types=["contactFields"])
 
     def sync_campaignProfiles(self):
-        for profile in self.domain_objects["getCampaignProfiles"]:
-            description = profile["description"] or ""
-            if description.find("--sync") > -1:
-                try:
-                    self.sync_target_domain.client.service.createCampaignProfile(
-                        profile
-                    )
-                    print(f'\t\t\tSYNC (create): {profile["name"]}')
-                except:
-                    self.sync_target_domain.client.service.modifyCampaignProfile(
-                        profile
-                    )
-                    print(f'\t\t\tSYNC (update): {profile["name"]}')
-
-                    # Remove filters/grouping from the target domain before adding in conditions and grouping from this domain
-                    self.sync_target_domain.client.service.modifyCampaignProfileCrmCriteria(
-                        profileName=profile["name"],
-                        grouping={"expression": None, "type": "All"},
-                        removeCriteria=self.sync_target_domain.domain_objects[
-                            "getCampaignProfiles_campaign_profile_filters"
-                        ][profile["name"]]["crmCriteria"],
-                    )
-                    if (
-                        len(
-                            self.sync_target_domain.domain_objects[
-                                "getCampaignProfiles_campaign_profile_filters"
-                            ][profile["name"]]["orderByFields"]
-                        )
-                        > 0
-                    ):
-                        remove_fields = self.sync_target_domain.domain_objects[
-                            "getCampaignProfiles_campaign_profile_filters"
-                        ][profile["name"]]["orderByFields"]
-
-                        self.sync_target_domain.client.service.modifyCampaignProfileFilterOrder(
-                            campaignProfile=profile["name"],
-                            removeOrderByField=[
-                                field["fieldName"] for field in remove_fields
-                            ],
-                        )
-
-                self.sync_target_domain.client.service.modifyCampaignProfileCrmCriteria(
-                    profileName=profile["name"],
-                    grouping=self.domain_objects[
-                        "getCampaignProfiles_campaign_profile_filters"
-                    ][profile["name"]]["grouping"],
-                    addCriteria=self.domain_objects[
-                        "getCampaignProfiles_campaign_profile_filters"
-                    ][profile["name"]]["crmCriteria"],
-                )
-                if (
-                    len(
-                        self.domain_objects[
-                            "getCampaignProfiles_campaign_profile_filters"
-                        ][profile["name"]]["orderByFields"]
-                    )
-                    > 0
-                ):
-                    self.sync_target_domain.client.service.modifyCampaignProfileFilterOrder(
-                        campaignProfile=profile["name"],
-                        addOrderByField=self.domain_objects[
-                            "getCampaignProfiles_campaign_profile_filters"
-                        ][profile["name"]]["orderByFields"],
-                    )
+        # only profiles tagged with --sync in their description are synced
+        return self.sync_objects(
+            object_types=["campaignProfiles"], selector=description_selector("--sync")
+        )
 
     def sync_ivrScripts(self):
         pass
         # for profile in self.domain_objects['getCampaignProfiles']:
 
-    def demystify_campaign_profile_filters(self, reload_domain=False, verbose=False):
+    def demystify_campaign_profile_filters(self, reload_domain=False, verbose=False, max_workers=None):
+        """Writes the demystified Custom campaign profile filters to the
+        campaign_profile_filters_demystified folder.  Each distinct filter is demystified
+        once, see campaign_profile_comprehension.demystify_filters, and files whose text
+        did not change are not rewritten.
+
+        Args:
+            reload_domain (bool, optional): Get the campaign profiles from the API first.
+            verbose (bool, optional): Print every demystified filter. Defaults to False.
+            max_workers (int, optional): Worker processes for domains with many distinct
+                filters. Defaults to the number of CPUs.
+        """
         if reload_domain == True:
             self.get_domain_objects(methods=["getCampaignProfiles"])
         profile_filters = self.domain_objects[
@@ -420,15 +756,17 @@ class Five9DomainConfig:
         print(
             f"\n\n********** Demystifying campaign profile filters to\n{subfolder_path}"
         )
-        for pf in profile_filters.keys():
-            profile_filter = profile_filters[pf]
+        report = demystify_filters(profile_filters, max_workers=max_workers)
+        changed_count = len(self.changed_paths)
+        for pf, demystified in report["demystified"].items():
             if verbose == True:
                 print(f"\n\n********** Demystifying {pf}")
-            if (profile_filter["grouping"]["type"] == "Custom") and len(
-                profile_filter["crmCriteria"]
-            ) > 0:
-                target_filename = os.path.join(subfolder_path, pf)
-                demystified = demystify_filter(profile_filter, verbose=verbose)
-                self.write_object_to_target_path(
-                    target_path=target_filename, domain_object=demystified, toJson=False, filetype="sql"
-                )
+                print(demystified)
+            target_filename = os.path.join(subfolder_path, pf)
+            self.write_object_to_target_path(
+                target_path=target_filename, domain_object=demystified, toJson=False, filetype="sql"
+            )
+        print(
+            f"{report['filters']} filters, {report['distinct']} distinct, demystified in "
+            f"{report['seconds']:.2f} seconds, {len(self.changed_paths) - changed_count} files changed"
+        )
@@ -0,0 +1,182 @@
+import collections
+import collections.abc
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+
+
+class DomainObjectStore(collections.abc.MutableMapping):
+    """
+    Dict-style replacement for Five9DomainConfig.domain_objects that spills object
+    bodies to a SQLite file to bound the memory used by large captures.
+
+    Only the names of the stored objects are kept in memory, together with a least
+    recently used cache of decoded objects.  Dict values, such as the
+    "getIVRScripts_ivrs" objects by name, are stored as SpilledSection mappings so
+    each object is written and read on its own.  Other values, such as the
+    "getSkills" list, are stored as a single object.
+
+    Objects are pickled when they are stored.  Changes made to an object after it
+    was stored are not written back, assign the object again to update it.
+
+    Arguments:
+        path: The SQLite file.  If not provided, a temporary file is used and removed when the store is closed.
+        cache_size: The number of decoded objects kept in memory.  Default is 256.
+    """
+
+    def __init__(self, path=None, cache_size=256):
+        self.cache_size = cache_size
+        self.temporary = path is None
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix="five9_domain_objects_", suffix=".sqlite")
+            os.close(handle)
+        self.path = path
+
+        self._lock = threading.RLock()
+        self._cache = collections.OrderedDict()
+        self._sections = {}
+        self._values = {}
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # the store only lives for the duration of a capture, durability is not needed
+        self._connection.execute("PRAGMA journal_mode=OFF")
+        self._connection.execute("PRAGMA synchronous=OFF")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS domain_objects "
+            "(section TEXT NOT NULL, name TEXT NOT NULL, body BLOB NOT NULL, "
+            "PRIMARY KEY (section, name))"
+        )
+        self._connection.execute("DELETE FROM domain_objects")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _cache_put(self, cache_key, value):
+        self._cache[cache_key] = value
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _write(self, section, name, value):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO domain_objects (section, name, body) VALUES (?, ?, ?)",
+                (section, name, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)),
+            )
+            self._cache_put((section, name), value)
+
+    def _read(self, section, name):
+        with self._lock:
+            cache_key = (section, name)
+            try:
+                value = self._cache[cache_key]
+                self._cache.move_to_end(cache_key)
+                return value
+            except KeyError:
+                pass
+            row = self._connection.execute(
+                "SELECT body FROM domain_objects WHERE section = ? AND name = ?",
+                (section, name),
+            ).fetchone()
+            if row is None:
+                raise KeyError(name)
+            value = pickle.loads(row[0])
+            self._cache_put(cache_key, value)
+            return value
+
+    def _delete(self, section, name=None):
+        with self._lock:
+            if name is None:
+                self._connection.execute(
+                    "DELETE FROM domain_objects WHERE section = ?", (section,)
+                )
+                for cache_key in [key for key in self._cache if key[0] == section]:
+                    del self._cache[cache_key]
+            else:
+                self._connection.execute(
+                    "DELETE FROM domain_objects WHERE section = ? AND name = ?",
+                    (section, name),
+                )
+                self._cache.pop((section, name), None)
+
+    def __setitem__(self, key, value):
+        if key in self:
+            del self[key]
+        if isinstance(value, collections.abc.Mapping):
+            section = SpilledSection(self, key)
+            self._sections[key] = section
+            for name, domain_object in value.items():
+                section[name] = domain_object
+        else:
+            # whole values are stored under an empty object name
+            self._values[key] = None
+            self._write(key, "", value)
+
+    def __getitem__(self, key):
+        if key in self._sections:
+            return self._sections[key]
+        if key in self._values:
+            return self._read(key, "")
+        raise KeyError(key)
+
+    def __delitem__(self, key):
+        if key in self._sections:
+            del self._sections[key]
+        elif key in self._values:
+            del self._values[key]
+        else:
+            raise KeyError(key)
+        self._delete(key)
+
+    def __iter__(self):
+        return iter(list(self._values) + list(self._sections))
+
+    def __len__(self):
+        return len(self._values) + len(self._sections)
+
+    def __contains__(self, key):
+        return key in self._sections or key in self._values
+
+    def close(self):
+        """Closes the SQLite connection and removes the file of a temporary store"""
+        with self._lock:
+            self._cache.clear()
+            self._connection.close()
+            if self.temporary and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class SpilledSection(collections.abc.MutableMapping):
+    """Mapping of object name to object for one domain_objects key of a DomainObjectStore"""
+
+    def __init__(self, store, section):
+        self._store = store
+        self.section = section
+        self._names = {}
+
+    def __setitem__(self, name, value):
+        self._store._write(self.section, name, value)
+        self._names[name] = None
+
+    def __getitem__(self, name):
+        if name not in self._names:
+            raise KeyError(name)
+        return self._store._read(self.section, name)
+
+    def __delitem__(self, name):
+        del self._names[name]
+        self._store._delete(self.section, name)
+
+    def __iter__(self):
+        return iter(list(self._names))
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
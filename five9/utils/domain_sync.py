@@ -0,0 +1,376 @@
+import concurrent.futures
+import time
+
+
+PROFILE_FILTERS_KEY = "getCampaignProfiles_campaign_profile_filters"
+
+EMPTY_PROFILE_FILTER = {
+    "crmCriteria": [],
+    "grouping": {"expression": None, "type": "All"},
+    "orderByFields": [],
+}
+
+
+def _without(domain_object, ignored_fields):
+    return {
+        key: value for key, value in domain_object.items() if key not in ignored_fields
+    }
+
+
+def _name(domain_object):
+    return domain_object["name"]
+
+
+def _call_variable_name(variable):
+    return f'{variable["group"]}.{variable["name"]}'
+
+
+class SyncObjectType:
+    """
+    Describes how one type of domain object is compared and synced.
+
+    Arguments:
+        name: Name of the object type, such as "skills".
+        method: The domain_objects key holding the list of objects, such as "getSkills".
+        create: Function returning the (service method, arguments) call that creates an object.
+        modify: Function returning the (service method, arguments) call that modifies an object.
+        identity: Function returning the name of an object.  Default is the "name" field.
+        ignored_fields: Fields that are not compared, such as domain specific ids.
+        include: Function returning False for objects that can not be synced, such as system fields.
+        depends_on: Object types that must be synced first.
+    """
+
+    def __init__(
+        self,
+        name,
+        method,
+        create,
+        modify,
+        identity=_name,
+        ignored_fields=(),
+        include=None,
+        depends_on=(),
+    ):
+        self.name = name
+        self.method = method
+        self.create = create
+        self.modify = modify
+        self.identity = identity
+        self.ignored_fields = set(ignored_fields)
+        self.include = include
+        self.depends_on = depends_on
+
+    def index(self, domain_objects):
+        """Objects of this type by name"""
+        return {
+            self.identity(domain_object): domain_object
+            for domain_object in domain_objects.get(self.method, None) or []
+            if self.include is None or self.include(domain_object)
+        }
+
+    def differs(self, source_object, target_object):
+        return _without(source_object, self.ignored_fields) != _without(
+            target_object, self.ignored_fields
+        )
+
+
+SYNC_OBJECT_TYPES = {
+    "skills": SyncObjectType(
+        "skills",
+        "getSkills",
+        create=lambda skill: ("createSkill", {"skillInfo": {"skill": _without(skill, {"id"})}}),
+        modify=lambda skill: ("modifySkill", {"skill": _without(skill, {"id"})}),
+        ignored_fields={"id"},
+    ),
+    "dispositions": SyncObjectType(
+        "dispositions",
+        "getDispositions",
+        create=lambda disposition: ("createDisposition", {"disposition": disposition}),
+        modify=lambda disposition: ("modifyDisposition", {"disposition": disposition}),
+    ),
+    "callVariableGroups": SyncObjectType(
+        "callVariableGroups",
+        "getCallVariableGroups",
+        create=lambda group: (
+            "createCallVariablesGroup",
+            {"name": group["name"], "description": group["description"]},
+        ),
+        modify=lambda group: (
+            "modifyCallVariablesGroup",
+            {"name": group["name"], "description": group["description"]},
+        ),
+        # the variables of a group are synced as callVariables
+        ignored_fields={"variables"},
+    ),
+    "callVariables": SyncObjectType(
+        "callVariables",
+        "getCallVariables",
+        create=lambda variable: ("createCallVariable", {"variable": variable}),
+        modify=lambda variable: ("modifyCallVariable", {"variable": variable}),
+        identity=_call_variable_name,
+        depends_on=("callVariableGroups", "dispositions"),
+    ),
+    "contactFields": SyncObjectType(
+        "contactFields",
+        "getContactFields",
+        create=lambda field: ("createContactField", {"field": field}),
+        modify=lambda field: ("modifyContactField", {"field": field}),
+        include=lambda field: not field.get("system", False),
+    ),
+    "campaignProfiles": SyncObjectType(
+        "campaignProfiles",
+        "getCampaignProfiles",
+        create=lambda profile: ("createCampaignProfile", {"campaignProfile": profile}),
+        modify=lambda profile: ("modifyCampaignProfile", {"campaignProfile": profile}),
+        depends_on=("contactFields",),
+    ),
+}
+
+def description_selector(tag):
+    """Object selector for objects whose description contains a tag, such as "--sync" """
+
+    def selector(object_type, domain_object):
+        return (domain_object.get("description", None) or "").find(tag) > -1
+
+    return selector
+
+
+class SyncOperation:
+    """
+    A create or modify of a single object, made of the service calls that run in order.
+
+    requires is the (object type, name) of an operation of an earlier stage that
+    must not have failed, such as the create of the campaign profile of a filter.
+    """
+
+    def __init__(self, object_type, name, action, calls, requires=None):
+        self.object_type = object_type
+        self.name = name
+        self.action = action
+        self.calls = calls
+        self.requires = requires
+
+    def execute(self, service):
+        for method, arguments in self.calls:
+            getattr(service, method)(**arguments)
+
+    def __repr__(self):
+        return f"SyncOperation({self.object_type}, {self.name}, {self.action}, {len(self.calls)} calls)"
+
+
+def plan_profile_filter(name, source_filter, target_filter):
+    """
+    The service calls that replace the target filter of a campaign profile with the
+    source filter.  Only the parts of the filter that changed are replaced.
+    """
+    target_filter = target_filter or EMPTY_PROFILE_FILTER
+    source_criteria = source_filter["crmCriteria"] or []
+    target_criteria = target_filter["crmCriteria"] or []
+    calls = []
+
+    if source_criteria != target_criteria:
+        # the grouping expression refers to the criteria by position, so the
+        # criteria are replaced as a whole
+        if len(target_criteria) > 0:
+            calls.append(
+                (
+                    "modifyCampaignProfileCrmCriteria",
+                    {
+                        "profileName": name,
+                        "grouping": {"expression": None, "type": "All"},
+                        "removeCriteria": target_criteria,
+                    },
+                )
+            )
+        calls.append(
+            (
+                "modifyCampaignProfileCrmCriteria",
+                {
+                    "profileName": name,
+                    "grouping": source_filter["grouping"],
+                    "addCriteria": source_criteria,
+                },
+            )
+        )
+    elif source_filter["grouping"] != target_filter["grouping"]:
+        calls.append(
+            (
+                "modifyCampaignProfileCrmCriteria",
+                {"profileName": name, "grouping": source_filter["grouping"]},
+            )
+        )
+
+    source_order = source_filter["orderByFields"] or []
+    target_order = target_filter["orderByFields"] or []
+    if source_order != target_order:
+        if len(target_order) > 0:
+            calls.append(
+                (
+                    "modifyCampaignProfileFilterOrder",
+                    {
+                        "campaignProfile": name,
+                        "removeOrderByField": [field["fieldName"] for field in target_order],
+                    },
+                )
+            )
+        if len(source_order) > 0:
+            calls.append(
+                (
+                    "modifyCampaignProfileFilterOrder",
+                    {"campaignProfile": name, "addOrderByField": source_order},
+                )
+            )
+
+    return calls
+
+
+def _stage_order(object_types):
+    """Groups object types in stages, each stage only depends on the stages before it"""
+    remaining = list(object_types)
+    stages = []
+    done = set()
+    while remaining:
+        stage = [
+            object_type
+            for object_type in remaining
+            if all(
+                dependency in done or dependency not in remaining
+                for dependency in SYNC_OBJECT_TYPES[object_type].depends_on
+            )
+        ]
+        stages.append(stage)
+        done.update(stage)
+        remaining = [object_type for object_type in remaining if object_type not in done]
+    return stages
+
+
+def plan_sync(source_objects, target_objects, object_types=None, selector=None, profile_filters=True):
+    """
+    Compares the domain objects of a source and target domain and plans the calls
+    that make the target match the source.
+
+    Objects that exist in both domains and are equal are skipped, objects that are
+    missing in the target are created and objects that differ are modified.  Objects
+    are never deleted from the target.
+
+    Args:
+        source_objects (Mapping): domain_objects of the source domain.
+        target_objects (Mapping): domain_objects of the target domain.
+        object_types (list, optional): Keys of SYNC_OBJECT_TYPES to sync. Defaults to all.
+        selector (function, optional): selector(object_type, domain_object) returning
+            True for the source objects to sync. Defaults to all objects.
+        profile_filters (bool, optional): Also sync the filters of the synced campaign
+            profiles. Defaults to True.
+
+    Returns:
+        list: Stages of SyncOperation lists.  The operations of a stage are
+            independent of each other, stages must be applied in order.
+    """
+    if object_types is None:
+        object_types = list(SYNC_OBJECT_TYPES)
+
+    stages = []
+    for stage_types in _stage_order(object_types):
+        stage = []
+        for object_type_name in stage_types:
+            object_type = SYNC_OBJECT_TYPES[object_type_name]
+            target_index = object_type.index(target_objects)
+            for name, source_object in object_type.index(source_objects).items():
+                if selector is not None and not selector(object_type_name, source_object):
+                    continue
+                target_object = target_index.get(name, None)
+                if target_object is None:
+                    stage.append(
+                        SyncOperation(object_type_name, name, "create", [object_type.create(source_object)])
+                    )
+                elif object_type.differs(source_object, target_object):
+                    stage.append(
+                        SyncOperation(object_type_name, name, "modify", [object_type.modify(source_object)])
+                    )
+        stages.append(stage)
+
+    if profile_filters and "campaignProfiles" in object_types:
+        source_filters = source_objects.get(PROFILE_FILTERS_KEY, None) or {}
+        target_filters = target_objects.get(PROFILE_FILTERS_KEY, None) or {}
+        stage = []
+        for name, source_profile in SYNC_OBJECT_TYPES["campaignProfiles"].index(source_objects).items():
+            if selector is not None and not selector("campaignProfiles", source_profile):
+                continue
+            if name not in source_filters:
+                continue
+            calls = plan_profile_filter(
+                name,
+                source_filters[name],
+                target_filters[name] if name in target_filters else None,
+            )
+            if calls:
+                stage.append(
+                    SyncOperation(
+                        "campaignProfileFilters", name, "replace", calls, requires=("campaignProfiles", name)
+                    )
+                )
+        stages.append(stage)
+
+    return [stage for stage in stages if stage]
+
+
+def print_sync_plan(stages):
+    """Prints the operations of a sync plan by stage"""
+    for i, stage in enumerate(stages):
+        print(f"\nStage {i + 1}")
+        for operation in stage:
+            print(
+                f"\t{operation.action:<8} {operation.object_type:<24} {operation.name}"
+                f"  ({', '.join(method for method, arguments in operation.calls)})"
+            )
+    print(
+        f"\n{sum(len(stage) for stage in stages)} operations, "
+        f"{sum(len(operation.calls) for stage in stages for operation in stage)} calls"
+    )
+
+
+def apply_sync(stages, service, max_workers=4):
+    """
+    Applies a sync plan.  The operations of each stage run concurrently, the next
+    stage starts when all operations of the previous stage completed.
+
+    Args:
+        stages (list): The plan returned by plan_sync.
+        service: The zeep service of the target domain client, such as client.service.
+        max_workers (int, optional): Maximum number of concurrent operations. Defaults to 4.
+
+    Returns:
+        dict: The number of "operations" and "calls" applied, the "failed"
+            (operation, error) list, the "skipped" operations whose required
+            operation failed and the "seconds" taken.
+    """
+    start = time.perf_counter()
+    report = {"operations": 0, "calls": 0, "failed": [], "skipped": [], "seconds": 0}
+    failed = set()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for stage in stages:
+            futures = {}
+            for operation in stage:
+                if operation.requires is not None and operation.requires in failed:
+                    report["skipped"].append(operation)
+                    print(
+                        f"\t\t\tSYNC SKIPPED ({operation.action}): {operation.object_type} {operation.name}: "
+                        f"{' '.join(operation.requires)} failed"
+                    )
+                    continue
+                futures[executor.submit(operation.execute, service)] = operation
+            for future in concurrent.futures.as_completed(futures):
+                operation = futures[future]
+                try:
+                    future.result()
+                    report["operations"] += 1
+                    report["calls"] += len(operation.calls)
+                    print(f"\t\t\tSYNC ({operation.action}): {operation.object_type} {operation.name}")
+                except Exception as e:
+                    report["failed"].append((operation, str(e)))
+                    failed.add((operation.object_type, operation.name))
+                    print(f"\t\t\tSYNC FAILED ({operation.action}): {operation.object_type} {operation.name}: {e}")
+
+    report["seconds"] = time.perf_counter() - start
+    return report
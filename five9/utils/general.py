@@ -94,6 +94,87 @@ def get_random_password(
     # Return the final password
     return password
 
+
+def zeep_values(zeep_object):
+    """
+    Returns the field values of a zeep object or dict as a dict, for constant time lookups.
+
+    Args:
+    zeep_object: A zeep object, such as a user from getUsersInfo, a dict, or None.
+
+    Returns:
+    dict: The values by field name, the object itself for a dict and {} for None.
+    """
+    if type(zeep_object) is dict:
+        return zeep_object
+    try:
+        # zeep objects route every attribute access through a slow __getattribute__
+        return object.__getattribute__(zeep_object, "__values__")
+    except AttributeError:
+        pass
+    if isinstance(zeep_object, dict):
+        return zeep_object
+    return getattr(zeep_object, "__dict__", {})
+
+
+# the text of the boolean values, in lower case
+TRUE_TOKENS = frozenset(["true", "t", "yes", "y", "1"])
+FALSE_TOKENS = frozenset(["false", "f", "no", "n", "0"])
+
+
+def _convert_bool(value):
+    token = value.lower()
+    if token in TRUE_TOKENS:
+        return True
+    if token in FALSE_TOKENS:
+        return False
+    raise ValueError(f"Unable to convert {value} to {bool}")
+
+
+def _convert_datetime(value):
+    return datetime.datetime.fromisoformat(value.strip())
+
+
+def _convert_date(value):
+    return datetime.date.fromisoformat(value.strip()[:10])
+
+
+def _unchanged(value):
+    return value
+
+
+_CONVERTERS = {
+    str: _unchanged,
+    type(None): _unchanged,
+    bool: _convert_bool,
+    int: int,
+    float: float,
+    datetime.datetime: _convert_datetime,
+    datetime.date: _convert_date,
+}
+
+
+def compile_datatype_converter(datatype):
+    """
+    Returns the function that converts a string value to a datatype, see datatype_conversion.
+
+    Look the converter up once per column instead of calling datatype_conversion for every value.
+
+    Args:
+    datatype (type): The target datatype. Supported types are int, float, bool, datetime.datetime, datetime.date, str, and NoneType.
+
+    Returns:
+    function: converter(value) returning the converted value, raising ValueError if the value cannot be converted.
+
+    Raises:
+    ValueError: If the datatype is not supported.
+    """
+    try:
+        return _CONVERTERS[datatype]
+    except (KeyError, TypeError):
+        raise ValueError(f"Unsupported datatype: {datatype}")
+
+
 def datatype_conversion(datatype, value):
     """
     Converts a given value to a specified datatype.
@@ -103,7 +184,7 @@ def datatype_conversion(datatype, value):
     If the conversion fails or the datatype is not supported, it raises an exception.
 
     Args:
-    datatype (type): The target datatype to which the value needs to be converted. Supported types are int, float, bool, datetime, str, and NoneType.
+    datatype (type): The target datatype to which the value needs to be converted. Supported types are int, float, bool, datetime.datetime, datetime.date, str, and NoneType.
     value (str): The string value that needs to be converted.
 
     Returns:
@@ -114,31 +195,9 @@ def datatype_conversion(datatype, value):
     
     Note:
     - For boolean conversion, the function recognizes "true", "t", "yes", "y", "1" as True, and "false", "f", "no", "n", "0" as False (case-insensitive).
-    - For datetime conversion, the function uses the 'dateutil.parser.parse' method, so the input string should be in a recognizable datetime format.
+    - For datetime conversion, the input string should be in ISO format, such as 2024-01-31 or 2024-01-31T10:00:00.
     """
     try:
-        if datatype in [str, type(None)]:
-            return value
-
-        if datatype == bool:
-            if value.lower() in ["true", "t", "yes", "y", "1"]:
-                return True
-            elif value.lower() in ["false", "f", "no", "n", "0"]:
-                return False
-            else:
-                raise Exception(f"Unable to convert {value} to {datatype}")
-
-        # if int, return the int value of the string
-        if datatype == int:
-            return int(value)
-
-        # if float, return the float value of the string
-        if datatype == float:
-            return float(value)
-
-        # if datetime, return the datetime value of the string
-        if datatype == datetime:
-            return datetime.parser.parse(value)
-
+        return compile_datatype_converter(datatype)(value)
     except Exception as e:
         raise Exception(f"Unable to convert {value} to {datatype}")
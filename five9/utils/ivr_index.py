@@ -0,0 +1,243 @@
+import hashlib
+import logging
+import sqlite3
+import time
+
+from .ivr_utils import analyze_ivrs
+
+# the object kinds of the index
+INDEX_KINDS = ("variables", "skills", "prompts", "functions", "modules")
+
+# stored in PRAGMA user_version, an index file of another version is rebuilt
+SCHEMA_VERSION = 1
+
+# XML size of the changed IVR scripts analyzed together by IvrReferenceIndex.update
+BATCH_BYTES = 64 * 1024 * 1024
+
+
+def xml_hash(xml_definition):
+    """The blake2b digest of an IVR script xmlDefinition, to detect changed scripts"""
+    if isinstance(xml_definition, str):
+        xml_definition = xml_definition.encode("utf-8")
+    return hashlib.blake2b(xml_definition or b"", digest_size=20).hexdigest()
+
+
+def ivr_references(name, analysis):
+    """
+    Lists the (kind, object name, script name, module name) references of an IVR script.
+
+    Args:
+        name (str): The name of the IVR script.
+        analysis (dict): The analysis of the script, from analyze_ivr_xml with module_names.
+
+    Returns:
+        list: The references, the module name is "" for the JavaScript functions and
+            for variables used outside the modules.
+    """
+    module_names = analysis.get("module_names", {})
+    references = []
+    for kind in ("variables", "prompts"):
+        kind_modules = module_names.get(kind, {})
+        for object_name in analysis[kind]:
+            for module_name in kind_modules.get(object_name) or [""]:
+                references.append((kind, object_name, name, module_name or ""))
+    for skill_transfer in analysis["skill_transfers"]:
+        for skill in skill_transfer["skills"]:
+            if skill["type"] == "skill" and skill["name"]:
+                references.append(("skills", skill["name"], name, skill_transfer["moduleName"] or ""))
+    for function in analysis["functions"]:
+        references.append(("functions", function["name"], name, ""))
+    for module_type, type_module_names in module_names.get("modules", {}).items():
+        for module_name in type_module_names:
+            references.append(("modules", module_type, name, module_name or ""))
+    return references
+
+
+class IvrReferenceIndex:
+    """
+    Inverted index of the variables, skills, prompts, JavaScript functions and module
+    types used by the IVR scripts of a domain, persisted in a SQLite file.
+
+    Each reference is stored with the name of the IVR script and of the module that
+    uses the object, so questions like "which scripts use Agent.skill?" are answered
+    by an indexed query instead of fetching and parsing all IVR scripts again.  The
+    index keeps the hash of each xmlDefinition, and update only parses the scripts
+    that were added or changed since the last update.
+
+    Arguments:
+        path: The SQLite file of the index, created if it does not exist.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self._connection.execute("DROP TABLE IF EXISTS ivr_scripts")
+            self._connection.execute("DROP TABLE IF EXISTS ivr_references")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS ivr_scripts "
+            "(name TEXT NOT NULL PRIMARY KEY, xml_hash TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS ivr_references "
+            "(kind TEXT NOT NULL, object_name TEXT NOT NULL, script TEXT NOT NULL, module_name TEXT NOT NULL, "
+            "PRIMARY KEY (kind, object_name, script, module_name)) WITHOUT ROWID"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS ivr_references_script ON ivr_references (script)"
+        )
+        self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def update(self, ivrs, exclude=None, executor=None, remove_missing=True, batch_bytes=BATCH_BYTES):
+        """
+        Brings the index up to date with the IVR scripts of a domain.
+
+        Only the scripts whose xmlDefinition hash differs from the indexed hash are
+        parsed, and their references replaced in a single transaction.  The changed
+        scripts are analyzed in batches of about batch_bytes of XML as ivrs is
+        consumed, so with a generator such as iter_ivr_scripts at most one batch of
+        xmlDefinitions is held, plus the references of the changed scripts.
+
+        Args:
+            ivrs (iterable): IVR script objects with name and xmlDefinition, from getIVRScripts
+                or the values of the getIVRScripts_ivrs snapshot section.
+            exclude (function, optional): exclude(name) returning True for scripts to leave out of the index.
+            executor (concurrent.futures.Executor, optional): Executor that parses the changed scripts, see analyze_ivrs.
+            remove_missing (bool, optional): Remove the indexed scripts that are not in ivrs. Defaults to True.
+            batch_bytes (int, optional): XML size of the changed scripts analyzed together. Defaults to BATCH_BYTES.
+
+        Returns:
+            dict: The "added", "changed" and "removed" script names, the "invalid" script
+                names that are not valid XML, the number of "unchanged" scripts, the number
+                of "references" written and the "seconds" taken.
+        """
+        start_time = time.time()
+        indexed = dict(self._connection.execute("SELECT name, xml_hash FROM ivr_scripts"))
+
+        seen = set()
+        updated = []
+        hashes = {}
+        references = []
+        failed = {}
+        batch = []
+        batch_size = 0
+
+        def analyze_batch():
+            analyses, batch_failed = analyze_ivrs(
+                batch, decompress_functions=False, executor=executor, module_names=True
+            )
+            for name, analysis in analyses.items():
+                references.extend(ivr_references(name, analysis))
+            failed.update(batch_failed)
+
+        for ivr in ivrs:
+            name = ivr["name"]
+            if exclude is not None and exclude(name):
+                continue
+            seen.add(name)
+            hashes[name] = xml_hash(ivr["xmlDefinition"])
+            if indexed.get(name, None) != hashes[name]:
+                updated.append(name)
+                batch.append(ivr)
+                batch_size += len(ivr["xmlDefinition"] or "")
+                if batch_size >= batch_bytes:
+                    analyze_batch()
+                    batch = []
+                    batch_size = 0
+        if batch:
+            analyze_batch()
+
+        removed = [name for name in indexed if name not in seen] if remove_missing else []
+
+        now = time.time()
+        with self._connection:
+            for name in removed + updated:
+                self._connection.execute("DELETE FROM ivr_references WHERE script = ?", (name,))
+                self._connection.execute("DELETE FROM ivr_scripts WHERE name = ?", (name,))
+            # scripts that are not valid XML are stored without references, so they
+            # are parsed again only when they change
+            self._connection.executemany(
+                "INSERT INTO ivr_scripts (name, xml_hash, updated) VALUES (?, ?, ?)",
+                [(name, hashes[name], now) for name in updated],
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO ivr_references (kind, object_name, script, module_name) VALUES (?, ?, ?, ?)",
+                references,
+            )
+
+        result = {
+            "added": [name for name in updated if name not in indexed],
+            "changed": [name for name in updated if name in indexed],
+            "removed": removed,
+            "invalid": list(failed),
+            "unchanged": len(seen) - len(updated),
+            "references": len(references),
+            "seconds": time.time() - start_time,
+        }
+        logging.info(
+            f"IVR reference index: {len(result['added'])} added, {len(result['changed'])} changed, "
+            f"{len(removed)} removed, {result['unchanged']} unchanged scripts"
+        )
+        return result
+
+    def lookup(self, kind, object_name):
+        """
+        The IVR scripts that use an object.
+
+        Args:
+            kind (str): One of INDEX_KINDS.
+            object_name (str): The variable (group.name), skill, prompt, function or module type name.
+
+        Returns:
+            dict: The module names by IVR script name, sorted by script name.  The module
+                names are empty for functions and for variables used outside the modules.
+        """
+        if kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown IVR index kind: {kind}, expected one of {', '.join(INDEX_KINDS)}")
+        scripts = {}
+        for script, module_name in self._connection.execute(
+            "SELECT script, module_name FROM ivr_references WHERE kind = ? AND object_name = ? "
+            "ORDER BY script, module_name",
+            (kind, object_name),
+        ):
+            module_names = scripts.setdefault(script, [])
+            if module_name:
+                module_names.append(module_name)
+        return scripts
+
+    def names(self, kind, pattern="*"):
+        """
+        The indexed object names of a kind.
+
+        Args:
+            kind (str): One of INDEX_KINDS.
+            pattern (str, optional): SQLite GLOB pattern of the names, such as "Agent.*". Defaults to all names.
+
+        Returns:
+            dict: The number of IVR scripts using each object, sorted by object name.
+        """
+        if kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown IVR index kind: {kind}, expected one of {', '.join(INDEX_KINDS)}")
+        return dict(
+            self._connection.execute(
+                "SELECT object_name, COUNT(DISTINCT script) FROM ivr_references "
+                "WHERE kind = ? AND object_name GLOB ? GROUP BY object_name ORDER BY object_name",
+                (kind, pattern),
+            )
+        )
+
+    def scripts(self):
+        """The indexed IVR script names with their xmlDefinition hash"""
+        return dict(self._connection.execute("SELECT name, xml_hash FROM ivr_scripts ORDER BY name"))
+
+    def close(self):
+        """Closes the SQLite connection"""
+        self._connection.close()
@@ -1,13 +1,19 @@
-import xml.etree.ElementTree as ET
 import base64
 import collections
+import concurrent.futures
+import hashlib
 import json
+import os
 import re
+import string
 import zlib
 import gzip
 from io import BytesIO
 import logging
 
+import jsbeautifier
+from lxml import etree
+
 
 # Function to decompress the zipped function body
 def decompress_function_body(compressed_body):
@@ -29,92 +35,524 @@ def decompress_function_body(compressed_body):
         logging.info(f"Failed to decompress function body: {e}")
         return None
 
-# Function to extract functions from the IVR XML script and format as proper JavaScript
-def extract_jsfunctions_from_ivr(xml_content):
-    root = ET.fromstring(xml_content)
-    functions = []
-    
-    # Find the <functions> element
-    functions_element = root.find("functions")
-    if functions_element is not None:
-        for entry in functions_element.findall("entry"):
-            function_name = entry.find("value/name").text.strip()
-            function_body = entry.find("value/functionBody").text.strip()
-            
-            # Decompress the function body
-            decompressed_function_body = decompress_function_body(function_body)
-            if decompressed_function_body:
-                # Extract function arguments
-                arguments_list = []
-                for argument in entry.findall("value/arguments/arguments"):
-                    argument_name = argument.find("name").text.strip()
-                    arguments_list.append(argument_name)
-                
-                # Construct the JavaScript function definition
-                arguments_str = ", ".join(arguments_list)  # Join the arguments into a single string
-                function_js = f"function {function_name}({arguments_str}) {{\n{decompressed_function_body}\n}}\n"
-                function_details = {
-                    "name": function_name,
-                    "arguments": arguments_list,
-                    "js": function_js
-                }
-                functions.append(function_details)
-                
+class FunctionCache:
+    """
+    Content-addressed cache of decompressed and formatted IVR JavaScript functions.
+
+    Shared helper functions are copied between IVR scripts, so the same compressed body
+    appears in many scripts.  Entries are keyed by the blake2b digest of their input:
+    the compressed body for decompression, and the function key, see
+    analyze_ivr_xml, with the jsbeautifier version and options for formatting, so
+    entries formatted by another jsbeautifier version are not reused.  With a
+    cache_dir the entries are also stored
+    as <cache_dir>/<kind>/<digest[:2]>/<digest> files, which later runs and the workers
+    of a process pool reuse.
+
+    Arguments:
+        cache_dir: Folder of the on-disk cache. Defaults to None, memory only.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(key_text):
+        """The blake2b hex digest of a cache key"""
+        return hashlib.blake2b(key_text.encode("utf-8"), digest_size=20).hexdigest()
+
+    def get_or_compute(self, kind, key_text, compute, digest=None):
+        """The cached value for key_text, or the value returned by compute().  None is not cached"""
+        if digest is None:
+            digest = self.digest(key_text)
+        key = (kind, digest)
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+
+        path = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, kind, digest[:2], digest)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8", newline="") as cache_file:
+                    self.entries[key] = cache_file.read()
+                self.hits += 1
+                return self.entries[key]
+
+        self.misses += 1
+        value = compute()
+        if value is None:
+            return None
+        self.entries[key] = value
+        if path is not None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # concurrent workers may write the same entry, the rename is atomic
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8", newline="") as cache_file:
+                cache_file.write(value)
+            os.replace(temp_path, path)
+        return value
+
+    def decompress(self, compressed_body, digest=None):
+        """decompress_function_body, once per distinct compressed body, whose digest may be given"""
+        return self.get_or_compute(
+            "decompressed", compressed_body, lambda: decompress_function_body(compressed_body), digest
+        )
+
+    def beautify(self, function_js, beautify_options, function_key=None):
+        """jsbeautifier.beautify, once per distinct function, defaults to the function source as key"""
+        return self.get_or_compute(
+            "beautified",
+            json.dumps([jsbeautifier.__version__, function_key or function_js, beautify_options], sort_keys=True),
+            lambda: jsbeautifier.beautify(function_js, beautify_options),
+        )
+
+
+def _function_details(entry, function_cache, beautify_options=None):
+    # JavaScript definition of a <functions><entry> element
+    function_name = entry.find("value/name").text.strip()
+    function_body = entry.find("value/functionBody").text.strip()
+
+    # Decompress the function body
+    body_digest = function_cache.digest(function_body)
+    decompressed_function_body = function_cache.decompress(function_body, body_digest)
+    if not decompressed_function_body:
+        logging.info(f"Could not decompress function: {function_name}")
+        return None
+
+    # Extract function arguments
+    arguments_list = []
+    for argument in entry.findall("value/arguments/arguments"):
+        argument_name = argument.find("name").text.strip()
+        arguments_list.append(argument_name)
+
+    # Construct the JavaScript function definition
+    arguments_str = ", ".join(arguments_list)  # Join the arguments into a single string
+    function_js = f"function {function_name}({arguments_str}) {{\n{decompressed_function_body}\n}}\n"
+    # functions with the same key have the same source
+    function_key = f"{body_digest}:{function_name}({arguments_str})"
+    if beautify_options is not None:
+        function_js = function_cache.beautify(function_js, beautify_options, function_key)
+    return {
+        "name": function_name,
+        "arguments": arguments_list,
+        "js": function_js,
+        "key": function_key,
+    }
+
+
+def _skill_transfer_details(skill_transfer):
+    # skills of a <skillTransfer> module, the skill objects first and then the
+    # variables that select skills
+    module_name_elem = skill_transfer.find("moduleName")
+    module_name = (
+        module_name_elem.text if module_name_elem is not None else "Unnamed Module"
+    )
+
+    skills = []
+    for extrnal_obj in skill_transfer.iterfind(".//extrnalObj"):
+        skill_name_elem = extrnal_obj.find("name")
+        if skill_name_elem is not None:
+            skills.append({"name": skill_name_elem.text, "type": "skill"})
+
+    for skill_var in skill_transfer.iterfind(".//listOfSkillsEx"):
+        var_selected_elem = skill_var.find("varSelected")
+        if var_selected_elem is not None and var_selected_elem.text == "true":
+            variable_name_elem = skill_var.find("variableName")
+            if variable_name_elem is not None:
+                skills.append({"name": variable_name_elem.text, "type": "variable"})
+
+    return {"moduleName": module_name, "skills": skills}
+
+
+# the only elements the analyzer is notified about, everything else is handled in C
+_ANALYZED_TAGS = ("variableName", "prompt", "skillTransfer", "entry", "modules")
+
+
+def _is_top_level(element):
+    # a direct child of the <ivrScript> root element
+    parent = element.getparent()
+    return parent is not None and parent.getparent() is None
+
+
+def _index_module_names(modules, module_index):
+    # names of the modules that use each variable and prompt, and of each module type
+    for module in modules:
+        if not isinstance(module.tag, str):
+            continue
+        module_name = module.findtext("moduleName")
+        module_index["modules"].setdefault(module.tag, {})[module_name] = None
+        for reference in module.iter("variableName", "prompt"):
+            if reference.tag == "variableName":
+                if "." in (reference.text or ""):
+                    module_index["variables"].setdefault(reference.text, {})[module_name] = None
             else:
-                logging.info(f"Could not decompress function: {function_name}")
-    
-    return functions
+                prompt_name = reference.findtext("name")
+                if prompt_name:
+                    module_index["prompts"].setdefault(prompt_name, {})[module_name] = None
 
 
-def ivr_variable_usage(ivrs, verbose=False):
+def analyze_ivr_xml(
+    xml_definition,
+    name=None,
+    decompress_functions=True,
+    beautify_options=None,
+    function_cache=None,
+    module_names=False,
+):
     """
-    Analyzes a list of IVR (Interactive Voice Response) objects to identify the usage of script variables within them.
+    Collects everything the IVR utilities need from an IVR script in a single parse.
 
-    Args:
-    ivrs (list): A list of IVR objects (should be obtained from the getIvrScripts method).
-    verbose (bool): If True, the function prints the dictionary of variables and their corresponding IVRs in JSON format. Defaults to False.
+    The xmlDefinition is parsed once with lxml iterparse, which only reports the
+    elements of interest, instead of a regex scan and separate ElementTree parses for
+    the variables, the skill transfers and the JavaScript functions.
 
-    The function scans through the 'xmlDefinition' of each IVR object looking for script variables. It ignores any IVR objects with "EXAMPLE" in their name. Each variable is then cataloged along with the IVR names where it appears.
+    Args:
+        xml_definition (str or bytes): The xmlDefinition of the IVR script.
+        name (str, optional): The name of the IVR script, copied to the result.
+        decompress_functions (bool, optional): Decompress the JavaScript function bodies. Defaults to True.
+        beautify_options (dict, optional): Format the JavaScript functions with jsbeautifier
+            using these options, such as {"indent_size": 4}. Defaults to None, not formatted.
+        function_cache (FunctionCache, optional): Cache of the decompressed and formatted
+            functions, shared by the scripts of a domain. Defaults to a cache for this script.
+        module_names (bool, optional): Also collect the names of the modules that use each
+            variable and prompt, and of each module type. Defaults to False.
 
     Returns:
-    OrderedDict: A dictionary where keys are script variable names and values are lists of IVR names where these variables are used. The dictionary is sorted alphabetically by the variable names.
+        dict: The script "name", the "variables" (group.name, in order of first use),
+            the "skill_transfers" (moduleName and skills of each skillTransfer module), the
+            "functions" (name, arguments, js and a key that is the same for functions with
+            the same compressed body, name and arguments), the
+            "prompts" names and the "module_counts" by module type.  With module_names, the
+            "module_names" of the "variables", "prompts" and "modules" by object name.
+
+    Raises:
+        lxml.etree.XMLSyntaxError: If the xmlDefinition is not valid XML.
     """
+    if isinstance(xml_definition, str):
+        xml_definition = xml_definition.encode("utf-8")
+    if function_cache is None:
+        function_cache = FunctionCache()
 
-    # Initialize an empty dictionary to store the script variables and the IVRs where they appear
-    ivr_variables = {}
+    variables = {}
+    prompts = {}
+    # dicts as ordered sets of the module names using each object
+    module_index = {"variables": {}, "prompts": {}, "modules": {}}
+    skill_transfers = []
+    functions = []
+    module_counts = collections.Counter()
+
+    for event, element in etree.iterparse(
+        BytesIO(xml_definition), events=("end",), tag=_ANALYZED_TAGS
+    ):
+        tag = element.tag
+        if tag == "variableName":
+            variable = element.text or ""
+            if "." in variable:
+                variables[variable] = None
+        elif tag == "prompt":
+            prompt_name = element.findtext("name")
+            if prompt_name:
+                prompts[prompt_name] = None
+        elif tag == "skillTransfer":
+            skill_transfers.append(_skill_transfer_details(element))
+        elif tag == "entry":
+            parent = element.getparent()
+            if parent.tag == "functions" and _is_top_level(parent):
+                if decompress_functions:
+                    function_details = _function_details(element, function_cache, beautify_options)
+                    if function_details:
+                        functions.append(function_details)
+                else:
+                    functions.append({"name": element.findtext("value/name", "").strip()})
+        elif tag == "modules" and _is_top_level(element):
+            module_counts.update(module.tag for module in element if isinstance(module.tag, str))
+            if module_names:
+                _index_module_names(element, module_index)
+            # the modules were analyzed as their elements ended
+            element.clear()
+
+    analysis = {
+        "name": name,
+        "variables": list(variables),
+        "skill_transfers": skill_transfers,
+        "functions": functions,
+        "prompts": list(prompts),
+        "module_counts": dict(module_counts),
+    }
+    if module_names:
+        analysis["module_names"] = {
+            kind: {key: list(names) for key, names in index.items()} for kind, index in module_index.items()
+        }
+    return analysis
+
+
+# smallest chunk of IVR scripts sent to a worker, so small scripts are batched
+MIN_CHUNK_BYTES = 256 * 1024
+
+
+def chunk_by_size(items, chunk_bytes):
+    """
+    Groups (name, xmlDefinition) items in order into chunks of about chunk_bytes of XML.
+
+    A chunk ends as soon as it reaches chunk_bytes, so a large script ends its chunk.
+    """
+    chunks = []
+    chunk = []
+    size = 0
+    for item in items:
+        chunk.append(item)
+        size += len(item[1])
+        if size >= chunk_bytes:
+            chunks.append(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _analyze_chunk(chunk, decompress_functions, beautify_options, cache_dir, module_names=False):
+    # runs in the executor workers, errors are returned so the chunk completes
+    function_cache = FunctionCache(cache_dir)
+    results = []
+    for name, xml_definition in chunk:
+        try:
+            results.append(
+                (
+                    name,
+                    analyze_ivr_xml(
+                        xml_definition, name, decompress_functions, beautify_options, function_cache, module_names
+                    ),
+                    None,
+                )
+            )
+        except etree.XMLSyntaxError as e:
+            results.append((name, None, str(e)))
+    return results
 
-    # Compile a regular expression to find script variables in the xmlDefinition attribute
-    script_variable_pattern = re.compile(
-        r"(?<=<variableName>)(.*?)(?=<\/variableName>)"
-    )
 
-    # Iterate over the IVR objects
+def analyze_ivrs(
+    ivrs,
+    exclude=None,
+    decompress_functions=True,
+    beautify_options=None,
+    executor=None,
+    chunk_bytes=None,
+    cache_dir=None,
+    module_names=False,
+):
+    """
+    Analyzes IVR scripts with analyze_ivr_xml, one parse per script.
+
+    The scripts are independent, so with a concurrent.futures.ProcessPoolExecutor the
+    parsing, decompression and formatting run on all cores.  Scripts are sent to the
+    workers in chunks of about chunk_bytes of XML, and the results are merged in the
+    order of the scripts.
+
+    Args:
+        ivrs (iterable): IVR script objects with name and xmlDefinition, from getIVRScripts
+            or the values of the getIVRScripts_ivrs snapshot section.
+        exclude (function, optional): exclude(name) returning True for scripts to skip.
+        decompress_functions (bool, optional): Decompress the JavaScript function bodies. Defaults to True.
+        beautify_options (dict, optional): Format the JavaScript functions with jsbeautifier, see analyze_ivr_xml.
+        executor (concurrent.futures.Executor, optional): Executor for the chunks. Defaults to
+            None, the scripts are analyzed in this process.
+        chunk_bytes (int, optional): XML size of a chunk. Defaults to a quarter of the XML
+            per CPU, and at least MIN_CHUNK_BYTES.
+        cache_dir (str, optional): Folder of the on-disk FunctionCache, so each distinct
+            function is decompressed and formatted once across chunks and runs. Defaults to
+            None, functions are cached in memory for each chunk.
+        module_names (bool, optional): Also collect the module names of each reference, see analyze_ivr_xml.
+
+    Returns:
+        tuple: The analysis by IVR script name, and the parse error by name of the
+            scripts that are not valid XML, which are logged and left out of the analyses.
+    """
+    items = []
     for ivr in ivrs:
-        # Skip IVRs with "EXAMPLE" in their name
-        if "EXAMPLE" in ivr.name:
+        if exclude is not None and exclude(ivr["name"]):
+            continue
+        if not ivr["xmlDefinition"]:
             continue
+        items.append((ivr["name"], ivr["xmlDefinition"]))
 
-        # Find all instances of script variables in the xmlDefinition attribute
-        script_variables = script_variable_pattern.finditer(ivr.xmlDefinition)
+    if executor is None:
+        chunk_results = [_analyze_chunk(items, decompress_functions, beautify_options, cache_dir, module_names)]
+    else:
+        if chunk_bytes is None:
+            total_bytes = sum(len(xml_definition) for name, xml_definition in items)
+            chunk_bytes = max(MIN_CHUNK_BYTES, total_bytes // ((os.cpu_count() or 1) * 4))
+        futures = [
+            executor.submit(
+                _analyze_chunk, chunk, decompress_functions, beautify_options, cache_dir, module_names
+            )
+            for chunk in chunk_by_size(items, chunk_bytes)
+        ]
+        # merged in submission order, so the result does not depend on the worker timing
+        chunk_results = (future.result() for future in futures)
 
-        # Iterate over the script variables
-        for var in script_variables:
-            # Extract the variable name
-            b = var.span()[0]
-            e = var.span()[1]
-            variable = ivr.xmlDefinition[b:e]
-            # Split the variable name into parts at the period
-            variable_parts = variable.split(".")
+    analyses = {}
+    failed = {}
+    for results in chunk_results:
+        for name, analysis, error in results:
+            if error is not None:
+                logging.warning(f"Could not parse IVR script {name}: {error}")
+                failed[name] = error
+                continue
+            analyses[name] = analysis
+    if failed:
+        logging.warning(f"{len(failed)} IVR scripts are not valid XML and were not analyzed")
+    return analyses, failed
 
-            # If the variable has more than one part, add it to the ivr_variables dictionary
-            if len(variable_parts) > 1:
-                if ivr_variables.get(variable, None) == None:
-                    ivr_variables[variable] = []
-                if ivr.name not in ivr_variables[variable]:
-                    ivr_variables[variable].append(ivr.name)
 
-    # Sort the ivr_variables dictionary
-    ivr_variables = collections.OrderedDict(sorted(ivr_variables.items()))
+def build_ivr_indexes(analyses):
+    """
+    Combines IVR script analyses into indexes of the scripts that use each object.
+
+    Args:
+        analyses (dict): The analysis by IVR script name, from analyze_ivrs.
+
+    Returns:
+        dict: "variables", "skills", "prompts" and "functions" indexes, each a dict of
+            the object name to the list of IVR script names using it, sorted by name, and
+            the total "module_counts" by module type.
+    """
+    indexes = {"variables": {}, "skills": {}, "prompts": {}, "functions": {}}
+    module_counts = collections.Counter()
+
+    # dicts as ordered sets, so adding an IVR script name is constant time
+    for name, analysis in analyses.items():
+        for variable in analysis["variables"]:
+            indexes["variables"].setdefault(variable, {})[name] = None
+        for skill_transfer in analysis["skill_transfers"]:
+            for skill in skill_transfer["skills"]:
+                if skill["type"] == "skill":
+                    indexes["skills"].setdefault(skill["name"], {})[name] = None
+        for prompt in analysis["prompts"]:
+            indexes["prompts"].setdefault(prompt, {})[name] = None
+        for function in analysis["functions"]:
+            indexes["functions"].setdefault(function["name"], {})[name] = None
+        module_counts.update(analysis["module_counts"])
+
+    result = {
+        index_name: collections.OrderedDict(
+            (key, list(names)) for key, names in sorted(index.items())
+        )
+        for index_name, index in indexes.items()
+    }
+    result["module_counts"] = dict(module_counts.most_common())
+    return result
+
+
+# getIVRScripts name patterns that partition the scripts by their first character
+NAME_PREFIX_PATTERNS = (
+    [f"^[{letter}{letter.upper()}].*" for letter in string.ascii_lowercase]
+    + [f"^{digit}.*" for digit in string.digits]
+    + ["^[^a-zA-Z0-9].*"]
+)
+
+
+def ivr_name_patterns(names, batch_size=20):
+    """
+    getIVRScripts name patterns that each match one batch of IVR script names exactly.
+
+    Args:
+        names (iterable): The IVR script names.
+        batch_size (int, optional): The number of names of a pattern. Defaults to 20.
+
+    Returns:
+        list: The regular expressions, such as "^(main|billing)$".
+    """
+    names = list(names)
+    return [
+        "^(" + "|".join(re.escape(name) for name in names[start : start + batch_size]) + ")$"
+        for start in range(0, len(names), batch_size)
+    ]
+
+
+def iter_ivr_scripts(service, names=None, batch_size=20, max_workers=1):
+    """
+    Yields the IVR scripts of a domain, fetched with getIVRScripts in batches by name
+    pattern instead of a single response with every xmlDefinition.
+
+    The domain API cannot list the IVR script names without their xmlDefinition, so
+    with the names, for example from IvrReferenceIndex.scripts() or a domain snapshot,
+    each request returns at most batch_size scripts.  Without names the scripts are
+    fetched by the first character of their name.  At most max_workers requests are
+    in flight, and their scripts are yielded in request order, so the generator only
+    holds the responses of the running requests.  A response is not bounded: without
+    names, a single first character may match most of the scripts of a domain.  The
+    memory used also depends on the caller, analyze_ivrs keeps every script it is
+    given, while IvrReferenceIndex.update analyzes the changed scripts in batches.
+
+    Args:
+        service: The zeep service of the client, such as client.throttled_service.
+        names (iterable, optional): The names of the scripts to fetch. Defaults to None,
+            all scripts by NAME_PREFIX_PATTERNS.
+        batch_size (int, optional): The number of names fetched by a request. Defaults to 20.
+        max_workers (int, optional): The number of concurrent requests. Defaults to 1.
+
+    Yields:
+        The ivrScriptDef objects, with name, description and xmlDefinition.
+    """
+    if names is None:
+        patterns = NAME_PREFIX_PATTERNS
+    else:
+        patterns = ivr_name_patterns(names, batch_size)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = collections.deque()
+        for pattern in patterns:
+            pending.append(executor.submit(service.getIVRScripts, pattern))
+            if len(pending) >= max_workers:
+                yield from pending.popleft().result() or []
+        while pending:
+            yield from pending.popleft().result() or []
+
+
+# Function to extract functions from the IVR XML script and format as proper JavaScript
+def extract_jsfunctions_from_ivr(xml_content, function_cache=None):
+    return analyze_ivr_xml(xml_content, function_cache=function_cache)["functions"]
+
+
+def _is_example(name):
+    return "EXAMPLE" in name
+
+
+def ivr_variable_usage(ivrs, verbose=False, analyses=None, executor=None):
+    """
+    Analyzes a list of IVR (Interactive Voice Response) objects to identify the usage of script variables within them.
+
+    Args:
+    ivrs (list): A list of IVR objects (should be obtained from the getIvrScripts method).
+    verbose (bool): If True, the function prints the dictionary of variables and their corresponding IVRs in JSON format. Defaults to False.
+    analyses (dict): Existing analyze_ivrs results to reuse instead of parsing the IVR scripts again. Defaults to None.
+    executor (concurrent.futures.Executor): Executor that parses the IVR scripts, see analyze_ivrs. Defaults to None.
+
+    The function scans through the 'xmlDefinition' of each IVR object looking for script variables. It ignores any IVR objects with "EXAMPLE" in their name. Each variable is then cataloged along with the IVR names where it appears.
+
+    Returns:
+    OrderedDict: A dictionary where keys are script variable names and values are lists of IVR names where these variables are used. The dictionary is sorted alphabetically by the variable names.
+    """
+
+    # Parse each IVR script once, skipping IVRs with "EXAMPLE" in their name
+    if analyses is None:
+        analyses, failed = analyze_ivrs(
+            ivrs,
+            exclude=_is_example,
+            decompress_functions=False,
+            executor=executor,
+        )
+    else:
+        analyses = {
+            name: analysis for name, analysis in analyses.items() if "EXAMPLE" not in name
+        }
+
+    # Catalog the variables with more than one part (group.name) by IVR
+    ivr_variables = build_ivr_indexes(analyses)["variables"]
 
     # If verbose is True, print the ivr_variables dictionary as a JSON object
     if verbose == True:
@@ -123,4 +561,3 @@ def ivr_variable_usage(ivrs, verbose=False):
 
     # Return the ivr_variables dictionary
     return ivr_variables
-
@@ -0,0 +1,218 @@
+import concurrent.futures
+import contextlib
+import os
+import time
+import traceback
+
+from .domain_capture import METHODS, Five9DomainConfig
+
+
+def parse_account_spec(account_spec, default_hostalias="us"):
+    """
+    Splits an "alias[:hostalias]" account specification.
+
+    Args:
+        account_spec (str): A stored credential alias from private/credentials.py,
+            optionally followed by the Five9 host alias, such as "acme:eu".
+        default_hostalias (str, optional): Host alias used when none is given. Defaults to "us".
+
+    Returns:
+        tuple: (account alias, host alias)
+    """
+    account, _, hostalias = account_spec.partition(":")
+    return account, hostalias or default_hostalias
+
+
+def capture_domain(
+    account,
+    api_hostname_alias="us",
+    api_sleep_interval=0.2,
+    methods=None,
+    full_git_status=False,
+    write_archive=False,
+    spill_to_disk=False,
+    log_dir=None,
+):
+    """
+    Captures the snapshot of a single domain.  Runs in a worker process of capture_domains.
+
+    Returns:
+        dict: The capture report with the account, host alias, domain name, status,
+            error, failed methods, timings and total seconds of the capture.
+    """
+    report = {
+        "account": account,
+        "hostalias": api_hostname_alias,
+        "domain": None,
+        "status": "ok",
+        "error": None,
+        "failed_methods": [],
+        "timings": {},
+        "seconds": 0,
+        "log": None,
+    }
+    start = time.perf_counter()
+
+    with contextlib.ExitStack() as stack:
+        if log_dir is not None:
+            os.makedirs(log_dir, exist_ok=True)
+            report["log"] = os.path.join(log_dir, f"{account}_{api_hostname_alias}.log")
+            log_file = stack.enter_context(open(report["log"], "w"))
+            stack.enter_context(contextlib.redirect_stdout(log_file))
+            stack.enter_context(contextlib.redirect_stderr(log_file))
+
+        domain = None
+        try:
+            domain = Five9DomainConfig(
+                account=account,
+                api_hostname_alias=api_hostname_alias,
+                # Five9DomainConfig adds method dependencies to the list it is given
+                methods=list(methods or METHODS),
+                spill_to_disk=spill_to_disk,
+                api_sleep_interval=api_sleep_interval,
+            )
+            report["domain"] = domain.vccConfig.domainName
+            domain.get_domain_objects(
+                full_git_status=full_git_status, write_archive=write_archive
+            )
+            report["failed_methods"] = [
+                {"method": method, "error": error}
+                for method, error in domain.failures
+            ]
+            report["timings"] = dict(domain.timings)
+            if "capture" not in domain.timings:
+                report["status"] = "failed"
+                report["error"] = "Capture did not complete"
+            elif len(domain.failures) > 0:
+                report["status"] = "partial"
+        except Exception as e:
+            traceback.print_exc()
+            report["status"] = "failed"
+            report["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            if domain is not None:
+                domain.close()
+
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def capture_domains(
+    account_specs,
+    max_workers=4,
+    api_sleep_interval=0.2,
+    methods=None,
+    full_git_status=False,
+    write_archive=False,
+    spill_to_disk=False,
+    log_dir=None,
+    default_hostalias="us",
+):
+    """
+    Captures the snapshots of several domains in parallel worker processes.
+
+    Each domain is captured by its own process with its own client, so the total
+    time approaches the time of the slowest domain.  max_workers caps the number
+    of domains captured at the same time and api_sleep_interval is the pause
+    between the detail requests of each domain.  There is no rate budget shared
+    by the processes: each capture only paces its own requests, so max_workers
+    concurrent captures of domains of the same account make up to max_workers
+    times the requests of a single capture.
+
+    Args:
+        account_specs (list): "alias[:hostalias]" account specifications, see parse_account_spec.
+        max_workers (int, optional): Maximum number of concurrent captures. Defaults to 4.
+        api_sleep_interval (float, optional): Seconds between the detail requests of one domain. Defaults to 0.2.
+        methods (list, optional): The methods to capture. Defaults to domain_capture.METHODS.
+        full_git_status (bool, optional): Stage the whole snapshot folder of each domain. Defaults to False.
+        write_archive (bool, optional): Also write the snapshot archive of each domain. Defaults to False.
+        spill_to_disk (bool, optional): Keep the captured objects in temporary SQLite files. Defaults to False.
+        log_dir (str, optional): Folder for the output of each capture.  If not provided, the
+            output of all captures is printed to the console.
+        default_hostalias (str, optional): Host alias of accounts given without one. Defaults to "us".
+
+    Returns:
+        dict: The combined report with the total "seconds" and the capture "reports" in account order.
+    """
+    accounts = [
+        parse_account_spec(account_spec, default_hostalias)
+        for account_spec in account_specs
+    ]
+    start = time.perf_counter()
+    reports = [None] * len(accounts)
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=max(1, min(max_workers, len(accounts)))
+    ) as executor:
+        futures = {
+            executor.submit(
+                capture_domain,
+                account,
+                api_hostname_alias=hostalias,
+                api_sleep_interval=api_sleep_interval,
+                methods=methods,
+                full_git_status=full_git_status,
+                write_archive=write_archive,
+                spill_to_disk=spill_to_disk,
+                log_dir=log_dir,
+            ): i
+            for i, (account, hostalias) in enumerate(accounts)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            account, hostalias = accounts[i]
+            try:
+                reports[i] = future.result()
+            except Exception as e:
+                # the worker process itself failed, for example it was killed
+                reports[i] = {
+                    "account": account,
+                    "hostalias": hostalias,
+                    "domain": None,
+                    "status": "failed",
+                    "error": f"{type(e).__name__}: {e}",
+                    "failed_methods": [],
+                    "timings": {},
+                    "seconds": time.perf_counter() - start,
+                    "log": None,
+                }
+            print(
+                f"{reports[i]['status']:<8} {account}:{hostalias} "
+                f"({reports[i]['seconds']:.1f} seconds)"
+            )
+
+    return {"seconds": time.perf_counter() - start, "reports": reports}
+
+
+def print_capture_report(capture_report):
+    """Prints the per-domain timings and failures of a capture_domains report"""
+    reports = capture_report["reports"]
+    print(
+        f"\n{'Account':<30} {'Domain':<30} {'Status':<8} "
+        f"{'Capture':>9} {'Commit':>8} {'Total':>9}"
+    )
+    for report in reports:
+        timings = report["timings"]
+        print(
+            f"{report['account'] + ':' + report['hostalias']:<30} "
+            f"{report['domain'] or '-':<30} {report['status']:<8} "
+            f"{timings.get('capture', 0):>9.1f} {timings.get('commit', 0):>8.1f} "
+            f"{report['seconds']:>9.1f}"
+        )
+
+    for report in reports:
+        if report["error"] is not None:
+            print(f"\n{report['account']}:{report['hostalias']} failed: {report['error']}")
+        for failure in report["failed_methods"]:
+            print(
+                f"\n{report['account']}:{report['hostalias']} {failure['method']} failed: {failure['error']}"
+            )
+        if report["status"] != "ok" and report["log"] is not None:
+            print(f"\tSee {report['log']}")
+
+    slowest = max((report["seconds"] for report in reports), default=0)
+    print(
+        f"\n{len(reports)} domains captured in {capture_report['seconds']:.1f} seconds "
+        f"(slowest domain {slowest:.1f} seconds, sum of all domains "
+        f"{sum(report['seconds'] for report in reports):.1f} seconds)"
+    )
@@ -0,0 +1,162 @@
+import collections
+import concurrent.futures
+import json
+import logging
+import os
+
+import requests
+import zeep
+
+# HTTP status codes of a request that the gateway ended before the API answered
+OVERSIZED_STATUS_CODES = (502, 504)
+
+
+def is_oversized_response(error):
+    """
+    Whether an error shows a response too large to return in time, such as a timeout
+    of the request or a gateway timeout.
+
+    Args:
+        error (Exception): The error raised by the request.
+
+    Returns:
+        bool: True if fetching less items may succeed.
+    """
+    if isinstance(error, (requests.exceptions.Timeout, TimeoutError)):
+        return True
+    if isinstance(error, zeep.exceptions.TransportError):
+        return error.status_code in OVERSIZED_STATUS_CODES
+    return False
+
+
+class PartitionCheckpoint:
+    """
+    Progress of a prefix partitioned capture, saved as a JSON file after every
+    finished prefix so an interrupted capture can resume.
+
+    Arguments:
+        path: The JSON file.  If it exists its progress is loaded.  Defaults to None, not saved.
+
+    Attributes:
+        completed: The prefixes whose items were processed.
+        split: The prefixes that were replaced by their child prefixes.
+        failed: The error of each prefix that could not be fetched nor split.
+        state: Caller data saved with the progress, such as the size of the output file.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.completed = set()
+        self.split = set()
+        self.failed = {}
+        self.state = {}
+        if path is not None and os.path.exists(path):
+            with open(path, "r") as checkpoint_file:
+                saved = json.load(checkpoint_file)
+            self.completed = set(saved.get("completed", []))
+            self.split = set(saved.get("split", []))
+            self.failed = saved.get("failed", {})
+            self.state = saved.get("state", {})
+
+    def save(self):
+        """Writes the progress, replacing the previous file in one step"""
+        if self.path is None:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as checkpoint_file:
+            json.dump(
+                {
+                    "completed": sorted(self.completed),
+                    "split": sorted(self.split),
+                    "failed": self.failed,
+                    "state": self.state,
+                },
+                checkpoint_file,
+                indent=2,
+            )
+        os.replace(temp_path, self.path)
+
+    def remove(self):
+        """Deletes the checkpoint file, once the capture is complete"""
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def partition_by_prefix(
+    fetch, children, roots=None, max_workers=1, checkpoint=None, split_on=is_oversized_response, max_depth=None
+):
+    """
+    Fetches items, such as users, by name prefix and splits the prefixes that are too large.
+
+    Each prefix is fetched once.  A prefix whose response is too large, which shows
+    as a split_on error such as a timeout, is replaced by its child
+    prefixes, so only the crowded parts of the name space are refined and an empty
+    prefix ends its subtree.  Other errors are recorded in checkpoint.failed, and the
+    prefix is fetched again when the capture is resumed.  Up to max_workers prefixes
+    are fetched concurrently; pass a rate limited service, such as
+    client.throttled_service, to keep within the API rate limits.
+
+    A prefix is marked completed in the checkpoint after the caller processed its
+    items, that is when the next item is requested from the generator.  Prefixes
+    that were completed or split in the checkpoint are not fetched again.
+
+    Args:
+        fetch (function): fetch(prefix) returning the list of items of a prefix.
+        children (function): children(prefix) returning the child prefixes that
+            together cover the prefix, or an empty list when it cannot be split.
+        roots (list, optional): The prefixes to start with. Defaults to children("").
+        max_workers (int, optional): The number of concurrent fetches. Defaults to 1.
+        checkpoint (PartitionCheckpoint, optional): Progress to resume and update.
+            Defaults to None, a checkpoint that is not saved.
+        split_on (function or tuple, optional): split_on(error) returning True for the errors of a
+            too large response, or their exception types. Defaults to is_oversized_response.
+        max_depth (int, optional): The number of times a root prefix may be split. Defaults to None, no limit.
+
+    Yields:
+        tuple: (prefix, items) in the order the fetches complete.
+    """
+    if checkpoint is None:
+        checkpoint = PartitionCheckpoint()
+    # (prefix, depth) items, the depth is the number of splits from the root prefix
+    pending = collections.deque((prefix, 0) for prefix in (children("") if roots is None else roots))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+
+        def submit():
+            while pending and len(running) < max_workers:
+                prefix, depth = pending.popleft()
+                if prefix in checkpoint.completed:
+                    continue
+                if prefix in checkpoint.split:
+                    pending.extend((child, depth + 1) for child in children(prefix))
+                    continue
+                running[executor.submit(fetch, prefix)] = (prefix, depth)
+
+        submit()
+        while running:
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                prefix, depth = running.pop(future)
+                try:
+                    items = future.result()
+                except Exception as e:
+                    child_prefixes = []
+                    oversized = isinstance(e, split_on) if isinstance(split_on, tuple) else split_on(e)
+                    if oversized and (max_depth is None or depth < max_depth):
+                        child_prefixes = children(prefix)
+                    if child_prefixes:
+                        logging.info(f"Splitting prefix {prefix} into {len(child_prefixes)} prefixes: {e}")
+                        checkpoint.split.add(prefix)
+                        pending.extend((child, depth + 1) for child in child_prefixes)
+                    else:
+                        logging.error(f"Could not fetch prefix {prefix}: {e}")
+                        checkpoint.failed[prefix] = str(e)
+                    checkpoint.save()
+                    continue
+
+                yield prefix, items or []
+                checkpoint.completed.add(prefix)
+                checkpoint.failed.pop(prefix, None)
+                checkpoint.save()
+            submit()
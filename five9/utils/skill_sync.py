@@ -0,0 +1,204 @@
+import logging
+import re
+
+from .bulk_executor import run_bulk_updates
+
+# the requests of a user skill change, by operation
+USER_SKILL_OPERATIONS = ("userSkillAdd", "userSkillRemove", "userSkillModify")
+
+
+def skill_name_pattern(skill_names):
+    """The getSkillsInfo pattern matching exactly the given skill names"""
+    return "^(" + "|".join(re.escape(name) for name in skill_names) + ")$"
+
+
+def user_skill_index(skills_info=None, users_info=None):
+    """
+    Indexes the skills of each user, from one getSkillsInfo or getUsersInfo response.
+
+    Args:
+        skills_info (list, optional): skillInfo objects from getSkillsInfo, a skill with its users.
+        users_info (list, optional): userInfo objects from getUsersInfo, a user with its skills.
+
+    Returns:
+        dict: {userName: {skillName: level}}, only users with at least one skill
+            are in the index of skills_info.
+    """
+    index = {}
+    for skill_info in skills_info or []:
+        skill_name = skill_info["skill"]["name"]
+        for user_skill in skill_info["users"] or []:
+            index.setdefault(user_skill["userName"], {})[skill_name] = user_skill["level"]
+    for user_info in users_info or []:
+        user_skills = index.setdefault(user_info["generalInfo"]["userName"], {})
+        for user_skill in user_info["skills"] or []:
+            user_skills[user_skill["skillName"]] = user_skill["level"]
+    return index
+
+
+def plan_skill_sync(index, users, skills_to_add, skills_to_remove=(), profiles=None):
+    """
+    Computes the skill changes that bring users to the target skills, and nothing more.
+
+    A skill to add is only added to the users without it, and a skill to remove is
+    only removed from the users that have it.  The level of a skill a user already
+    has is only modified when skills_to_add gives explicit levels.  When profiles are
+    given, the changes of a user profile whose users are all in users are made once
+    on the profile with modifyUserProfileSkills instead of once per user; explicit
+    levels are still set per user, and the per user changes of the profile users are
+    kept in "fallback" in case the profile change fails.
+
+    Args:
+        index (dict): {userName: {skillName: level}}, see user_skill_index.
+        users (list): The user names to update.
+        skills_to_add (dict or list): {skillName: level} of the skills the users should
+            have at that level, or a list of skill names added at level 1 and kept at
+            their current level.
+        skills_to_remove (list, optional): The skill names the users should not have.
+        profiles (list, optional): userProfile objects from getUserProfiles, with their skills and users.
+
+    Returns:
+        dict:
+            "profiles": {userProfileName: {"add": [skillName], "remove": [skillName]}}
+            "users": {userName: [(operation, skillName, level)]} in the order to run them,
+                operation is one of USER_SKILL_OPERATIONS.
+            "fallback": {userProfileName: {userName: [(operation, skillName, level)]}} the
+                changes of the users of each profile change without it.
+            "unchanged": The user names without changes of their own.
+    """
+    explicit_levels = isinstance(skills_to_add, dict)
+    if not explicit_levels:
+        skills_to_add = {skill_name: 1 for skill_name in skills_to_add}
+    skills_to_remove = [name for name in skills_to_remove if name not in skills_to_add]
+    target_users = set(users)
+
+    def user_operations(current, covered):
+        operations = []
+        for skill_name in skills_to_remove:
+            if skill_name in current and skill_name not in covered:
+                operations.append(("userSkillRemove", skill_name, current[skill_name]))
+        for skill_name, level in skills_to_add.items():
+            if skill_name in covered:
+                # added by the profile change, at the default level
+                if explicit_levels and level != 1:
+                    operations.append(("userSkillModify", skill_name, level))
+            elif skill_name not in current:
+                operations.append(("userSkillAdd", skill_name, level))
+            elif explicit_levels and current[skill_name] != level:
+                operations.append(("userSkillModify", skill_name, level))
+        return operations
+
+    plan = {"profiles": {}, "users": {}, "fallback": {}, "unchanged": []}
+    # the skills that a profile change covers, by user
+    profile_skills = {}
+    for profile in profiles or []:
+        profile_users = set(profile["users"] or [])
+        if not profile_users:
+            continue
+        if not profile_users <= target_users:
+            if profile_users & target_users:
+                logging.warning(
+                    f"User profile {profile['name']} has users that are not updated, "
+                    f"its {len(profile_users & target_users)} updated users are changed one by one"
+                )
+            continue
+        current_skills = set(profile["skills"] or [])
+        add = [name for name in skills_to_add if name not in current_skills]
+        remove = [name for name in skills_to_remove if name in current_skills]
+        if not (add or remove):
+            continue
+        plan["profiles"][profile["name"]] = {"add": add, "remove": remove}
+        plan["fallback"][profile["name"]] = {
+            user_name: user_operations(index.get(user_name, {}), set())
+            for user_name in users
+            if user_name in profile_users
+        }
+        for user_name in profile_users:
+            profile_skills[user_name] = set(add) | set(remove)
+
+    for user_name in users:
+        operations = user_operations(index.get(user_name, {}), profile_skills.get(user_name, set()))
+        if operations:
+            plan["users"][user_name] = operations
+        else:
+            plan["unchanged"].append(user_name)
+    return plan
+
+
+def run_skill_sync(service, plan, skill_ids, max_workers=4, journal=None, backoff_seconds=2):
+    """
+    Makes the changes of a skill sync plan concurrently, the profile changes first.
+
+    The users of a profile whose change failed get the changes of the plan
+    "fallback" one by one instead, so they do not miss the skills of the profile.
+
+    Args:
+        service: The service to call, such as client.throttled_service to keep within the API rate limits.
+        plan (dict): The changes, from plan_skill_sync.
+        skill_ids (dict): The id of each skill name, from getSkillsInfo or getSkills.
+        max_workers (int, optional): The number of concurrent requests. Defaults to 4.
+        journal (UpdateJournal, optional): Log of the finished profiles and users, to resume
+            an interrupted sync. Defaults to None.
+        backoff_seconds (float, optional): The wait before retrying a rate limited request. Defaults to 2.
+
+    Returns:
+        dict: The run_bulk_updates results of the "profiles" and of the "users".
+    """
+
+    def update_profile(item):
+        profile_name, changes = item
+        return service.modifyUserProfileSkills(
+            userProfileName=profile_name, addSkills=changes["add"], removeSkills=changes["remove"]
+        )
+
+    # the number of operations made for each user, so a retried user continues
+    # after the last successful operation
+    done_operations = {}
+
+    def update_user(item):
+        user_name, operations = item
+        for operation, skill_name, level in operations[done_operations.get(user_name, 0):]:
+            user_skill = {
+                "id": skill_ids.get(skill_name, None),
+                "level": level,
+                "skillName": skill_name,
+                "userName": user_name,
+            }
+            getattr(service, operation)(userSkill=user_skill)
+            done_operations[user_name] = done_operations.get(user_name, 0) + 1
+
+    profile_results = run_bulk_updates(
+        plan["profiles"].items(),
+        update_profile,
+        key=lambda item: f"profile:{item[0]}",
+        max_workers=max_workers,
+        journal=journal,
+        backoff_seconds=backoff_seconds,
+        desc="Updating user profile skills",
+    )
+
+    user_operations = dict(plan["users"])
+    for profile_name, fallback in plan.get("fallback", {}).items():
+        if f"profile:{profile_name}" not in profile_results["failed"]:
+            continue
+        logging.warning(
+            f"User profile {profile_name} was not changed, its {len(fallback)} users are changed one by one"
+        )
+        for user_name, operations in fallback.items():
+            if operations:
+                user_operations[user_name] = operations
+            else:
+                user_operations.pop(user_name, None)
+
+    return {
+        "profiles": profile_results,
+        "users": run_bulk_updates(
+            user_operations.items(),
+            update_user,
+            key=lambda item: item[0],
+            max_workers=max_workers,
+            journal=journal,
+            backoff_seconds=backoff_seconds,
+            desc="Updating user skills",
+        ),
+    }
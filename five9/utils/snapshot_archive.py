@@ -0,0 +1,258 @@
+import collections.abc
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+from .snapshot_serializer import snapshot_json_default
+
+
+ARCHIVE_EXTENSION = "f9snap"
+
+ARCHIVE_MAGIC = b"F9SNAP1\n"
+ARCHIVE_FOOTER_MAGIC = b"F9SNAPIX"
+
+# index offset, index length, footer magic
+ARCHIVE_FOOTER = struct.Struct(">QQ8s")
+
+
+class SnapshotArchiveError(Exception):
+    pass
+
+
+class SnapshotArchiveWriter:
+    """
+    Writes domain objects to a single compressed snapshot archive file.
+
+    Each object is stored as an individually zlib-compressed JSON record so that
+    any object can be read back with a single seek.  The index of record offsets
+    by section (domain_objects key) and object name is written at the end of the
+    file when the writer is closed.
+
+    Arguments:
+        path: The target archive file.  It is replaced when the writer is closed.
+        compression_level: zlib compression level for the records.  Default is 6.
+    """
+
+    def __init__(self, path, compression_level=6):
+        self.path = path
+        self.compression_level = compression_level
+        self.index = {}
+
+        dirpath = os.path.dirname(path)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+
+        self._temp_path = f"{path}.tmp"
+        self._file = open(self._temp_path, "wb")
+        self._file.write(ARCHIVE_MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._temp_path)
+
+    def _write_record(self, value):
+        record = zlib.compress(
+            json.dumps(
+                value,
+                sort_keys=True,
+                separators=(",", ":"),
+                default=snapshot_json_default,
+            ).encode("utf-8"),
+            self.compression_level,
+        )
+        offset = self._file.tell()
+        self._file.write(record)
+        return [offset, len(record)]
+
+    def add(self, section, value):
+        """Stores a whole domain_objects value (such as the getSkills list) as one record"""
+        self.index[section] = {"kind": "value", "entry": self._write_record(value)}
+
+    def add_object(self, section, name, value):
+        """Stores a single named object of a section (such as one IVR script)"""
+        section_index = self.index.setdefault(
+            section, {"kind": "objects", "entries": {}}
+        )
+        section_index["entries"][name] = self._write_record(value)
+
+    def add_domain_objects(self, domain_objects):
+        """Stores every section of a Five9DomainConfig.domain_objects mapping"""
+        for section, value in domain_objects.items():
+            if isinstance(value, collections.abc.Mapping):
+                self.index.setdefault(section, {"kind": "objects", "entries": {}})
+                for name, domain_object in value.items():
+                    self.add_object(section, name, domain_object)
+            else:
+                self.add(section, value)
+
+    def close(self):
+        index_offset = self._file.tell()
+        index_record = zlib.compress(
+            json.dumps({"version": 1, "sections": self.index}).encode("utf-8")
+        )
+        self._file.write(index_record)
+        self._file.write(
+            ARCHIVE_FOOTER.pack(index_offset, len(index_record), ARCHIVE_FOOTER_MAGIC)
+        )
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+
+def write_snapshot_archive(domain_objects, path, compression_level=6):
+    """
+    Writes a Five9DomainConfig.domain_objects mapping to a snapshot archive file.
+
+    Args:
+        domain_objects (dict): The domain objects to store.
+        path (str): The target archive file.
+        compression_level (int, optional): zlib compression level. Defaults to 6.
+
+    Returns:
+        str: The path of the archive file.
+    """
+    with SnapshotArchiveWriter(path, compression_level=compression_level) as writer:
+        writer.add_domain_objects(domain_objects)
+    return path
+
+
+class ArchiveSection(collections.abc.Mapping):
+    """Read-only mapping of object name to object that decompresses each object on first access"""
+
+    def __init__(self, archive, section, entries):
+        self._archive = archive
+        self.section = section
+        self._entries = entries
+        self._loaded = {}
+
+    def __getitem__(self, name):
+        try:
+            return self._loaded[name]
+        except KeyError:
+            pass
+        value = self._archive.read_record(self._entries[name])
+        self._loaded[name] = value
+        return value
+
+    def read_raw(self, name):
+        """The compressed record of an object, without decoding it"""
+        entry = self._entries[name]
+        return self._archive._read_bytes(entry[0], entry[1])
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+
+class SnapshotArchive(collections.abc.Mapping):
+    """
+    Read-only, lazily loaded view of a snapshot archive written by SnapshotArchiveWriter.
+
+    Only the index is read when the archive is opened.  Sections are mappings of
+    domain_objects keys to values; sections stored by object name are returned as
+    ArchiveSection mappings that load each object on first access.
+
+    Arguments:
+        path: The archive file.
+        use_mmap: Memory-map the archive instead of reading records with seek/read.
+    """
+
+    def __init__(self, path, use_mmap=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "rb")
+        self._mmap = None
+        self._sections = {}
+
+        if self._file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            self._file.close()
+            raise SnapshotArchiveError(f"{path} is not a domain snapshot archive")
+
+        if use_mmap:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._file.seek(-ARCHIVE_FOOTER.size, os.SEEK_END)
+        index_offset, index_length, footer_magic = ARCHIVE_FOOTER.unpack(
+            self._file.read(ARCHIVE_FOOTER.size)
+        )
+        if footer_magic != ARCHIVE_FOOTER_MAGIC:
+            self.close()
+            raise SnapshotArchiveError(f"{path} has no snapshot archive index")
+
+        self.index = json.loads(
+            zlib.decompress(self._read_bytes(index_offset, index_length))
+        )["sections"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _read_bytes(self, offset, length):
+        if self._mmap is not None:
+            return self._mmap[offset : offset + length]
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    def read_record(self, entry):
+        """Decompresses and decodes the record at the given [offset, length] index entry"""
+        return json.loads(zlib.decompress(self._read_bytes(entry[0], entry[1])))
+
+    def load(self, section, name=None):
+        """
+        Loads a single object from the archive without caching it.
+
+        Args:
+            section (str): The domain_objects key, such as "getIVRScripts_ivrs".
+            name (str, optional): The object name for sections stored by object name.
+
+        Returns:
+            The decoded object.
+        """
+        section_index = self.index[section]
+        if section_index["kind"] == "value":
+            return self.read_record(section_index["entry"])
+        return self.read_record(section_index["entries"][name])
+
+    def __getitem__(self, section):
+        try:
+            return self._sections[section]
+        except KeyError:
+            pass
+        section_index = self.index[section]
+        if section_index["kind"] == "value":
+            value = self.read_record(section_index["entry"])
+        else:
+            value = ArchiveSection(self, section, section_index["entries"])
+        self._sections[section] = value
+        return value
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, section):
+        return section in self.index
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
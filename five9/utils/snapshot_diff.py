@@ -0,0 +1,232 @@
+import collections.abc
+import json
+import os
+import time
+
+from .snapshot_serializer import snapshot_json_default
+
+
+# key used to index the items of list sections, such as the getSkills list
+LIST_ITEM_KEY = "name"
+
+
+def _raw_record(section, name):
+    """
+    The stored bytes of an object of a lazily loaded snapshot section, or None.
+
+    Objects of the same snapshot format are written in a canonical form, so equal
+    stored bytes mean equal objects and the object does not need to be decoded.
+    """
+    read_raw = getattr(section, "read_raw", None)
+    if read_raw is None:
+        return None
+    return read_raw(name)
+
+
+def index_section(value):
+    """
+    Indexes a domain_objects value by object name.
+
+    Mapping values (such as "getIVRScripts_ivrs") are already indexed by name.
+    List values (such as "getSkills") are indexed by the "name" of each item, or
+    by position for items without a name.  Items sharing a name are numbered by
+    their occurrence among the items of that name, "name", "name[2]", ..., so
+    inserting other items does not change their index.  Any other value is a
+    single object with an empty name.
+    """
+    if isinstance(value, collections.abc.Mapping):
+        return value
+    if isinstance(value, list):
+        indexed = {}
+        occurrences = {}
+        for position, item in enumerate(value):
+            if isinstance(item, collections.abc.Mapping) and item.get(LIST_ITEM_KEY) is not None:
+                name = str(item[LIST_ITEM_KEY])
+                occurrences[name] = occurrences.get(name, 0) + 1
+                if occurrences[name] > 1:
+                    name = f"{name}[{occurrences[name]}]"
+            else:
+                name = f"[{position}]"
+            indexed[name] = item
+        return indexed
+    return {"": value}
+
+
+def _named_items(items):
+    """Items of a list indexed by name when every item has one, otherwise None"""
+    indexed = {}
+    for item in items:
+        if not isinstance(item, collections.abc.Mapping):
+            return None
+        name = item.get(LIST_ITEM_KEY)
+        if name is None or name in indexed:
+            return None
+        indexed[name] = item
+    return indexed
+
+
+def diff_fields(old, new, path=""):
+    """
+    Field level differences between two versions of a domain object.
+
+    Args:
+        old: The previous version of the object.
+        new: The current version of the object.
+        path (str, optional): Path of the compared values inside the object.
+
+    Returns:
+        list: {"path", "change", "old", "new"} dicts, where change is "added",
+            "removed" or "modified".  Paths use "." for fields and [n] for list
+            positions, or [name] for lists of named objects.
+    """
+    if old == new:
+        return []
+
+    if isinstance(old, collections.abc.Mapping) and isinstance(new, collections.abc.Mapping):
+        changes = []
+        for key in sorted(set(old) | set(new), key=str):
+            field_path = f"{path}.{key}" if path else str(key)
+            if key not in new:
+                changes.append({"path": field_path, "change": "removed", "old": old[key], "new": None})
+            elif key not in old:
+                changes.append({"path": field_path, "change": "added", "old": None, "new": new[key]})
+            else:
+                changes.extend(diff_fields(old[key], new[key], field_path))
+        return changes
+
+    if isinstance(old, list) and isinstance(new, list):
+        old_named = _named_items(old)
+        new_named = _named_items(new)
+        if old_named is not None and new_named is not None:
+            old_items, new_items = old_named, new_named
+            keys = list(old_named) + [name for name in new_named if name not in old_named]
+        else:
+            old_items, new_items = dict(enumerate(old)), dict(enumerate(new))
+            keys = range(max(len(old), len(new)))
+
+        changes = []
+        for key in keys:
+            item_path = f"{path}[{key}]"
+            if key not in new_items:
+                changes.append({"path": item_path, "change": "removed", "old": old_items[key], "new": None})
+            elif key not in old_items:
+                changes.append({"path": item_path, "change": "added", "old": None, "new": new_items[key]})
+            else:
+                changes.extend(diff_fields(old_items[key], new_items[key], item_path))
+        return changes
+
+    return [{"path": path, "change": "modified", "old": old, "new": new}]
+
+
+def diff_domain_objects(old_objects, new_objects, sections=None):
+    """
+    Computes the changeset between two Five9DomainConfig.domain_objects mappings.
+
+    Objects are indexed by section (domain_objects key) and name.  Objects of
+    lazily loaded sections (snapshot archives and folders) whose stored bytes match
+    are skipped without decoding them; the other objects are compared with ==,
+    which stops at the first difference, and field level differences are only
+    computed for changed objects.
+
+    Args:
+        old_objects (Mapping): The domain objects of the previous snapshot.
+        new_objects (Mapping): The domain objects of the current snapshot.
+        sections (list, optional): Only compare these domain_objects keys.
+
+    Returns:
+        dict: The changeset with
+            "added": {section: [names]},
+            "removed": {section: [names]},
+            "modified": {section: {name: [field changes, see diff_fields]}},
+            "unchanged": the number of unchanged objects,
+            "seconds": the time taken by the comparison.
+    """
+    start = time.perf_counter()
+    changeset = {"added": {}, "removed": {}, "modified": {}, "unchanged": 0}
+
+    if sections is None:
+        sections = list(old_objects) + [key for key in new_objects if key not in old_objects]
+
+    for section in sections:
+        old_section = index_section(old_objects[section]) if section in old_objects else {}
+        new_section = index_section(new_objects[section]) if section in new_objects else {}
+
+        added = [name for name in new_section if name not in old_section]
+        removed = [name for name in old_section if name not in new_section]
+        if added:
+            changeset["added"][section] = sorted(added)
+        if removed:
+            changeset["removed"][section] = sorted(removed)
+
+        compare_raw = type(old_section) is type(new_section)
+        modified = {}
+        for name in old_section:
+            if name not in new_section:
+                continue
+
+            if compare_raw:
+                old_raw = _raw_record(old_section, name)
+                if old_raw is not None and old_raw == _raw_record(new_section, name):
+                    changeset["unchanged"] += 1
+                    continue
+
+            changes = diff_fields(old_section[name], new_section[name])
+            if changes:
+                modified[name] = changes
+            else:
+                changeset["unchanged"] += 1
+
+        if modified:
+            changeset["modified"][section] = modified
+
+    changeset["seconds"] = time.perf_counter() - start
+    return changeset
+
+
+def print_changeset(changeset, verbose=False):
+    """Prints a summary of a diff_domain_objects changeset, with the field changes when verbose"""
+    for section in sorted(set(changeset["added"]) | set(changeset["removed"]) | set(changeset["modified"])):
+        print(f"\n{section}")
+        for name in changeset["added"].get(section, []):
+            print(f"\t+ {name}")
+        for name in changeset["removed"].get(section, []):
+            print(f"\t- {name}")
+        for name, changes in changeset["modified"].get(section, {}).items():
+            print(f"\t~ {name} ({len(changes)} changes)")
+            if verbose == True:
+                for change in changes:
+                    print(
+                        f"\t\t{change['change']:<8} {change['path']}: "
+                        f"{json.dumps(change['old'], default=snapshot_json_default)} -> "
+                        f"{json.dumps(change['new'], default=snapshot_json_default)}"
+                    )
+
+    print(
+        f"\n{sum(len(names) for names in changeset['added'].values())} added, "
+        f"{sum(len(names) for names in changeset['removed'].values())} removed, "
+        f"{sum(len(names) for names in changeset['modified'].values())} modified, "
+        f"{changeset['unchanged']} unchanged objects compared in {changeset['seconds']:.3f} seconds"
+    )
+
+
+def export_snapshot_revision(repo, revision, target_path):
+    """
+    Writes the files of a previous commit of a domain snapshot repo to a folder, so
+    that it can be loaded with Five9DomainConfig.from_snapshot and compared.
+
+    Args:
+        repo (git.Repo): The repo of the domain snapshot folder.
+        revision (str): The commit to export, such as "HEAD~1".
+        target_path (str): The folder to write the snapshot files to.
+
+    Returns:
+        str: The target path.
+    """
+    for item in repo.commit(revision).tree.traverse():
+        if item.type != "blob":
+            continue
+        file_path = os.path.join(target_path, *item.path.split("/"))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as snapshotFile:
+            snapshotFile.write(item.data_stream.read())
+    return target_path
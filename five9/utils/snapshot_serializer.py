@@ -0,0 +1,168 @@
+import datetime
+import decimal
+import json
+from json.encoder import INFINITY, encode_basestring_ascii
+
+
+def snapshot_json_default(obj):
+    """json.dumps fallback for the types returned in zeep responses"""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _float_repr(value):
+    # same representation as the json module with allow_nan=True
+    if value != value:
+        return "NaN"
+    if value == INFINITY:
+        return "Infinity"
+    if value == -INFINITY:
+        return "-Infinity"
+    return float.__repr__(value)
+
+
+def _key_repr(key):
+    # same key coercion as the json module
+    if isinstance(key, str):
+        return key
+    if isinstance(key, float):
+        return _float_repr(key)
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, int):
+        return int.__repr__(key)
+    raise TypeError(
+        f"keys must be str, int, float, bool or None, not {type(key).__name__}"
+    )
+
+
+def snapshot_dumps(obj, sort_keys=True, indent=4):
+    """
+    Serializes a domain object to the JSON text used for the domain snapshot files.
+
+    The output is identical to json.dumps(obj, sort_keys=sort_keys, indent=indent)
+    after converting datetimes to ISO strings, but the object is encoded in a single
+    pass without copying it first.  Accepts zeep objects as well as the dicts and
+    lists returned by zeep.helpers.serialize_object.  Dates, times and datetimes are
+    written as ISO strings and Decimals as JSON numbers.
+
+    Args:
+        obj: The domain object to serialize.
+        sort_keys (bool, optional): Sort the keys of every dict. Defaults to True.
+        indent (int, optional): Number of spaces per indentation level. Defaults to 4.
+
+    Returns:
+        str: The JSON text.
+
+    Raises:
+        TypeError: If the object contains a value that can not be serialized.
+    """
+    if indent is None:
+        return json.dumps(obj, sort_keys=sort_keys, default=snapshot_json_default)
+
+    indent_string = " " * indent if isinstance(indent, int) else indent
+    newlines = ["\n"]
+
+    chunks = []
+    append = chunks.append
+
+    # literal JSON text for the common scalar types, checked by exact type
+    scalar_encoders = {
+        str: encode_basestring_ascii,
+        int: int.__repr__,
+        float: _float_repr,
+        bool: lambda value: "true" if value else "false",
+        type(None): lambda value: "null",
+        datetime.datetime: lambda value: encode_basestring_ascii(value.isoformat()),
+        datetime.date: lambda value: encode_basestring_ascii(value.isoformat()),
+    }
+    get_scalar_encoder = scalar_encoders.get
+
+    def newline(level):
+        while len(newlines) <= level:
+            newlines.append(newlines[-1] + indent_string)
+        return newlines[level]
+
+    def encode_dict(value, level):
+        if not value:
+            append("{}")
+            return
+        items = sorted(value.items()) if sort_keys else value.items()
+        separator = "," + newline(level + 1)
+        append("{" + newline(level + 1))
+        first = True
+        for key, item in items:
+            if first:
+                first = False
+            else:
+                append(separator)
+            if type(key) is not str:
+                key = _key_repr(key)
+            scalar_encoder = get_scalar_encoder(type(item))
+            if scalar_encoder is not None:
+                append(encode_basestring_ascii(key) + ": " + scalar_encoder(item))
+            else:
+                append(encode_basestring_ascii(key) + ": ")
+                encode(item, level + 1)
+        append(newline(level) + "}")
+
+    def encode_list(value, level):
+        if not value:
+            append("[]")
+            return
+        separator = "," + newline(level + 1)
+        append("[" + newline(level + 1))
+        first = True
+        for item in value:
+            if first:
+                first = False
+            else:
+                append(separator)
+            scalar_encoder = get_scalar_encoder(type(item))
+            if scalar_encoder is not None:
+                append(scalar_encoder(item))
+            else:
+                encode(item, level + 1)
+        append(newline(level) + "]")
+
+    def encode(value, level):
+        scalar_encoder = get_scalar_encoder(type(value))
+        if scalar_encoder is not None:
+            append(scalar_encoder(value))
+        elif isinstance(value, str):
+            append(encode_basestring_ascii(value))
+        elif value is None:
+            append("null")
+        elif value is True:
+            append("true")
+        elif value is False:
+            append("false")
+        elif isinstance(value, int):
+            append(int.__repr__(value))
+        elif isinstance(value, float):
+            append(_float_repr(value))
+        elif isinstance(value, (list, tuple)):
+            encode_list(value, level)
+        elif isinstance(value, dict):
+            encode_dict(value, level)
+        elif isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+            append(encode_basestring_ascii(value.isoformat()))
+        elif isinstance(value, decimal.Decimal):
+            append(str(value))
+        elif hasattr(value, "__values__"):
+            # zeep CompoundValue objects keep their elements in __values__
+            encode_dict(value.__values__, level)
+        else:
+            raise TypeError(
+                f"Object of type {type(value).__name__} is not JSON serializable"
+            )
+
+    encode(obj, 0)
+    return "".join(chunks)
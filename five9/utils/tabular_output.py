@@ -0,0 +1,362 @@
+import csv
+import datetime
+import logging
+import os
+
+from .general import FALSE_TOKENS, TRUE_TOKENS
+
+# pyarrow is optional, it is only needed for the parquet and arrow formats
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+# output format by file extension
+OUTPUT_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+
+COLUMN_TYPES = ("string", "bool", "int", "float", "timestamp")
+
+
+def output_format_for_path(path, default="csv"):
+    """The output format of a file name by its extension, such as "parquet" for users.parquet"""
+    return OUTPUT_FORMATS.get(os.path.splitext(path)[1].lower(), default)
+
+
+def _is_null(value):
+    return value is None or value == ""
+
+
+def _to_string(value):
+    return None if value is None else str(value)
+
+
+def _to_bool(value):
+    if _is_null(value):
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    token = str(value).strip().lower()
+    if token in TRUE_TOKENS:
+        return True
+    if token in FALSE_TOKENS:
+        return False
+    raise ValueError(f"Not a boolean: {value!r}")
+
+
+def _to_int(value):
+    if _is_null(value):
+        return None
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(f"Not an integer: {value!r}")
+        return int(value)
+    return int(value)
+
+
+def _to_float(value):
+    if _is_null(value):
+        return None
+    return float(value)
+
+
+def _to_timestamp(value):
+    if _is_null(value):
+        return None
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    return datetime.datetime.fromisoformat(str(value).strip())
+
+
+CONVERTERS = {
+    "string": _to_string,
+    "bool": _to_bool,
+    "int": _to_int,
+    "float": _to_float,
+    "timestamp": _to_timestamp,
+}
+
+
+def _string_type(value):
+    # the type of a text value, such as a report or CSV field.  Boolean and timestamp
+    # text stays string, its spelling, such as "TRUE" or "2024-01-31T10:00", could
+    # not be written back if the column is widened to string
+    value = value.strip()
+    # leading zeros are significant, such as in zip codes
+    if len(value) > 1 and value[0] == "0" and value[1] != ".":
+        return "string"
+    try:
+        int(value)
+        return "int"
+    except ValueError:
+        pass
+    try:
+        float(value)
+        return "float"
+    except ValueError:
+        pass
+    return "string"
+
+
+def infer_column_type(values, parse_strings=False):
+    """
+    Infers the COLUMN_TYPES name of a column from its values.
+
+    Args:
+        values (iterable): The values of the column, None and "" are nulls.
+        parse_strings (bool, optional): Infer the numeric type of text values, such as "12"
+            as an int, instead of treating all text as string. Defaults to False.
+
+    Returns:
+        str: The column type, "string" when the values have several types or are all null.
+    """
+    seen = set()
+    for value in values:
+        if _is_null(value):
+            continue
+        if isinstance(value, str):
+            if not parse_strings:
+                return "string"
+            seen.add(_string_type(value))
+        elif isinstance(value, bool):
+            seen.add("bool")
+        elif isinstance(value, int):
+            seen.add("int")
+        elif isinstance(value, float):
+            seen.add("float")
+        elif isinstance(value, (datetime.date, datetime.datetime)):
+            seen.add("timestamp")
+        else:
+            return "string"
+    if len(seen) == 1:
+        return seen.pop()
+    if seen == {"int", "float"}:
+        return "float"
+    return "string"
+
+
+def _widened_type(column_type, values):
+    # the type of a column whose values do not all convert to its type: int widens
+    # to float if they are numbers, anything else to string
+    if column_type == "int":
+        try:
+            for value in values:
+                _to_float(value)
+            return "float"
+        except (TypeError, ValueError):
+            pass
+    return "string"
+
+
+def _arrow_type(column_type):
+    return {
+        "string": pyarrow.string(),
+        "bool": pyarrow.bool_(),
+        "int": pyarrow.int64(),
+        "float": pyarrow.float64(),
+        "timestamp": pyarrow.timestamp("us"),
+    }[column_type]
+
+
+class TableWriter:
+    """
+    Writes rows to a CSV, Parquet or Arrow IPC file in batches of batch_rows.
+
+    Parquet and Arrow files are typed and compressed, each batch is written as a row
+    group (a record batch for Arrow) so the memory used does not depend on the number
+    of rows.  Column types that are not given are inferred from the first batch, see
+    infer_column_type.  When a value of a later batch does not convert to an inferred
+    type, such as "5.5" in an int column, the column is widened to float, or else to
+    string, and the batches already written are rewritten with the wider type, their
+    values converted like the values of the new batches.  A
+    value that does not convert to a type given in types raises ValueError.  The
+    parquet and arrow formats need the optional pyarrow package.
+
+    Arguments:
+        path: The output file, its directory is created if needed.
+        columns: The column names.
+        output_format: "csv", "parquet" or "arrow". Defaults to the format of the file extension.
+        types: dict of column name to a COLUMN_TYPES name. Defaults to None, inferred.
+        batch_rows: The number of rows of a batch. Defaults to 65536.
+        compression: The Parquet or Arrow compression codec. Defaults to "zstd".
+        parse_strings: Infer and convert the types of text values, such as report results. Defaults to False.
+        append: Append to an existing CSV file, the header is only written to a new file. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        path,
+        columns,
+        output_format=None,
+        types=None,
+        batch_rows=65536,
+        compression="zstd",
+        parse_strings=False,
+        append=False,
+    ):
+        self.path = path
+        self.columns = list(columns)
+        self.output_format = output_format or output_format_for_path(path)
+        self.types = dict(types or {})
+        self.batch_rows = batch_rows
+        self.compression = compression
+        self.parse_strings = parse_strings
+        self.row_count = 0
+        self._rows = []
+        self._file = None
+        self._writer = None
+        self._schema = None
+        self._inferred_columns = set()
+
+        if self.output_format not in ("csv", "parquet", "arrow"):
+            raise ValueError(f"Unknown output format: {self.output_format}, expected csv, parquet or arrow")
+        unknown_types = set(self.types.values()) - set(COLUMN_TYPES)
+        if unknown_types:
+            raise ValueError(f"Unknown column types: {sorted(unknown_types)}, expected one of {', '.join(COLUMN_TYPES)}")
+        if self.output_format != "csv":
+            if pyarrow is None:
+                raise ImportError(
+                    f"pyarrow is required to write {self.output_format} files, install it with: pip install pyarrow"
+                )
+            if append:
+                raise ValueError(f"{self.output_format} files cannot be appended to, only csv files")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if self.output_format == "csv":
+            write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+            self._file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._file)
+            if write_header:
+                self._writer.writerow(self.columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_row(self, row):
+        """Adds a row, a list of values in column order or a dict by column name"""
+        if isinstance(row, dict):
+            row = [row.get(column) for column in self.columns]
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_rows:
+            self.flush()
+
+    def write_rows(self, rows):
+        """Adds rows, see write_row"""
+        for row in rows:
+            self.write_row(row)
+
+    def flush(self):
+        """Writes the buffered rows as a batch"""
+        if not self._rows:
+            return
+        if self.output_format == "csv":
+            self._writer.writerows(self._rows)
+            self._file.flush()
+        else:
+            self._write_batch(self._rows)
+        self.row_count += len(self._rows)
+        self._rows = []
+
+    def _open_columnar(self, rows):
+        # the schema is fixed by the first batch, later batches are converted to it
+        for index, column in enumerate(self.columns):
+            if column not in self.types:
+                self.types[column] = infer_column_type((row[index] for row in rows), self.parse_strings)
+                self._inferred_columns.add(column)
+        self._schema = pyarrow.schema(
+            [pyarrow.field(column, _arrow_type(self.types[column])) for column in self.columns]
+        )
+        if self.output_format == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema, compression=self.compression)
+        else:
+            self._file = pyarrow.OSFile(self.path, "wb")
+            self._writer = pyarrow.ipc.new_file(
+                self._file, self._schema, options=pyarrow.ipc.IpcWriteOptions(compression=self.compression)
+            )
+
+    def _write_batch(self, rows):
+        if self._schema is None:
+            self._open_columnar(rows)
+        arrays = []
+        for index, column in enumerate(self.columns):
+            column_values = [row[index] for row in rows]
+            try:
+                values = list(map(CONVERTERS[self.types[column]], column_values))
+            except (TypeError, ValueError) as e:
+                if column not in self._inferred_columns:
+                    raise ValueError(f"Column {column} of type {self.types[column]}: {e}") from e
+                self._widen_column(column, _widened_type(self.types[column], column_values), e)
+                values = list(map(CONVERTERS[self.types[column]], column_values))
+            arrays.append(pyarrow.array(values, type=_arrow_type(self.types[column])))
+        table = pyarrow.Table.from_arrays(arrays, schema=self._schema)
+        if self.output_format == "parquet":
+            self._writer.write_table(table, row_group_size=len(rows))
+        else:
+            self._writer.write_table(table)
+
+    def _widen_column(self, column, column_type, error):
+        # the schema of a parquet or arrow file cannot change once a batch is written,
+        # so the batches written so far are copied to a new file with the wider type
+        logging.warning(
+            f"Column {column} of inferred type {self.types[column]} widened to {column_type}: {error}"
+        )
+        self.types[column] = column_type
+        self._writer.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        written_path = f"{self.path}.widen.tmp"
+        os.replace(self.path, written_path)
+        self._open_columnar([])
+        index = self.columns.index(column)
+        converter = CONVERTERS[column_type]
+
+        def widened(table):
+            # the written values go through the converter of the new rows, so a bool
+            # widened to string reads "True" in all rows
+            values = pyarrow.array(
+                list(map(converter, table.column(index).to_pylist())), type=_arrow_type(column_type)
+            )
+            return table.set_column(index, self._schema.field(index), values).cast(self._schema)
+
+        with pyarrow.OSFile(written_path, "rb") as source:
+            if self.output_format == "parquet":
+                written = pyarrow.parquet.ParquetFile(source)
+                for row_group in range(written.num_row_groups):
+                    table = widened(written.read_row_group(row_group))
+                    self._writer.write_table(table, row_group_size=table.num_rows)
+            else:
+                written = pyarrow.ipc.open_file(source)
+                for batch in range(written.num_record_batches):
+                    self._writer.write_table(widened(pyarrow.Table.from_batches([written.get_batch(batch)])))
+        os.remove(written_path)
+
+    def close(self):
+        """Writes the remaining rows and closes the file"""
+        self.flush()
+        if self.output_format != "csv" and self._schema is None:
+            # no rows, an empty file with the schema is still written
+            self._open_columnar([])
+        if self._writer is not None and self.output_format != "csv":
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+        self._writer = None
+        self._file = None
@@ -0,0 +1,169 @@
+import datetime
+
+from .general import compile_datatype_converter, zeep_values
+
+# the datatypes that can be compared with a CSV column, the others such as
+# mediaTypeConfig are nested objects
+SCALAR_TYPES = (bool, int, float, datetime.datetime, datetime.date, str)
+
+
+def _is_blank(value):
+    return value is None or value == ""
+
+
+def user_field_types(vcc_users, fieldnames=None):
+    """
+    Infers the datatype of each user field from the values of all users.
+
+    The type of a field is the type of its first value that is not None, so a field
+    that is empty for the first user is still typed by the other users.
+
+    Args:
+        vcc_users (list): The users, from getUsersGeneralInfo.
+        fieldnames (list, optional): The fields to type. Defaults to the fields of the first user.
+
+    Returns:
+        dict: The datatype by field name, str for the fields that are None for all users.
+    """
+    if not vcc_users:
+        return {}
+    user_values = [zeep_values(user) for user in vcc_users]
+    if fieldnames is None:
+        fieldnames = list(user_values[0])
+    field_types = {}
+    for fieldname in fieldnames:
+        field_types[fieldname] = next(
+            (type(values[fieldname]) for values in user_values if values.get(fieldname) is not None),
+            str,
+        )
+    return field_types
+
+
+def compile_column_converters(field_types):
+    """
+    Compiles the converter of each CSV column, once per column instead of once per value.
+
+    A blank cell converts to None, except for string columns where it stays "".
+
+    Args:
+        field_types (dict): The datatype by field name, see user_field_types.
+
+    Returns:
+        dict: converter(value) by field name.
+
+    Raises:
+        ValueError: If a field is a nested object, such as mediaTypeConfig, that cannot be set from a CSV cell.
+    """
+    unsupported = sorted(name for name, datatype in field_types.items() if datatype not in SCALAR_TYPES)
+    if unsupported:
+        raise ValueError(f"These fields cannot be updated from a csv column: {', '.join(unsupported)}")
+
+    converters = {}
+    for fieldname, datatype in field_types.items():
+        converter = compile_datatype_converter(datatype)
+        if datatype is str:
+            converters[fieldname] = converter
+        else:
+            converters[fieldname] = (
+                lambda value, converter=converter: None if _is_blank(value) else converter(value)
+            )
+    return converters
+
+
+def diff_users(vcc_users, csv_rows, key="userName"):
+    """
+    Compares the users of a CSV file with the VCC users, one column at a time.
+
+    The CSV rows are matched to the VCC users by key, then each column is converted
+    with its compiled converter and compared with the VCC values of the matched
+    users.  A blank cell of a non-string column leaves the field unchanged, and an
+    empty string equals None.
+
+    Args:
+        vcc_users (list): The users, from getUsersGeneralInfo.
+        csv_rows (iterable): The CSV rows as dicts by field name, from csv.DictReader.
+        key (str, optional): The field that matches the rows to the users. Defaults to "userName".
+
+    Returns:
+        dict:
+            "changes": {key value: {field: (current value, new value)}} of the users with
+                differing fields, in the order of vcc_users.
+            "errors": {key value: {field: error message}} of the values that could not be converted.
+            "unmatched": The key values of the CSV rows without a VCC user.
+
+    Raises:
+        ValueError: If the CSV rows have no key column, or a column is not a field of the
+            users or cannot be set from a CSV cell.
+    """
+    csv_rows = list(csv_rows)
+    if csv_rows and key not in csv_rows[0]:
+        raise ValueError(f"The csv file has no {key} column")
+    csv_rows = {row[key]: row for row in csv_rows}
+    result = {"changes": {}, "errors": {}, "unmatched": []}
+    if not csv_rows:
+        return result
+
+    user_values = [zeep_values(user) for user in vcc_users]
+    allowed_fields = list(user_values[0]) if user_values else []
+    fieldnames = [fieldname for fieldname in next(iter(csv_rows.values())) if fieldname != key]
+    disallowed_fields = sorted(set(fieldnames) - set(allowed_fields))
+    if disallowed_fields:
+        allowed_fields_string = "\n\t".join(sorted(allowed_fields))
+        raise ValueError(
+            f"These headers in the csv file:\n\t{', '.join(disallowed_fields)}\n\n"
+            f"are not in the allowed fields list:\n\t{allowed_fields_string}"
+        )
+
+    matched_keys = []
+    matched_values = []
+    matched_rows = []
+    for values in user_values:
+        row = csv_rows.get(values[key])
+        if row is not None:
+            matched_keys.append(values[key])
+            matched_values.append(values)
+            matched_rows.append(row)
+    matched = set(matched_keys)
+    result["unmatched"] = [row_key for row_key in csv_rows if row_key not in matched]
+
+    converters = compile_column_converters(user_field_types(vcc_users, fieldnames))
+    changes = {}
+    for fieldname in fieldnames:
+        converter = converters[fieldname]
+        column = [row[fieldname] for row in matched_rows]
+        try:
+            targets = list(map(converter, column))
+        except (ValueError, TypeError, AttributeError):
+            # convert cell by cell to report each value that cannot be converted
+            targets = []
+            for row_key, value in zip(matched_keys, column):
+                try:
+                    targets.append(converter(value))
+                except (ValueError, TypeError, AttributeError) as e:
+                    result["errors"].setdefault(row_key, {})[fieldname] = str(e)
+                    targets.append(None)
+
+        for index, (target, values) in enumerate(zip(targets, matched_values)):
+            current = values[fieldname]
+            if target == current or target is None or (target == "" and current is None):
+                continue
+            changes.setdefault(index, {})[fieldname] = (current, target)
+
+    result["changes"] = {matched_keys[index]: changes[index] for index in sorted(changes)}
+    return result
+
+
+def apply_user_changes(user, changes):
+    """
+    Sets the new values of a change set on a user object.
+
+    Args:
+        user: The user object, from getUsersGeneralInfo.
+        changes (dict): {field: (current value, new value)}, a user entry of the diff_users changes.
+
+    Returns:
+        The user object.
+    """
+    for fieldname, (_, new_value) in changes.items():
+        user[fieldname] = new_value
+    return user